@@ -0,0 +1,115 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+
+class CacheStore:
+    def __init__(self, path, ttl=None, max_bytes=None):
+        """
+        Small persistent key/value cache on top of SQLite.
+
+        The database runs in WAL mode so several Streamlit sessions (threads) and
+        server processes can share one file.
+
+        Args:
+            path (str): SQLite file path.
+            ttl (float | None): Seconds an entry stays fresh. None means forever.
+            max_bytes (int | None): Total value size cap; least recently used entries are evicted past it.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB, meta TEXT, created REAL, accessed REAL, size INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+        self._conn.commit()
+
+    def is_fresh(self, entry) -> bool:
+        return self.ttl is None or (time.time() - entry["created"]) < self.ttl
+
+    def get_entry(self, key):
+        """Return {"value", "meta", "created"} for `key` even if it is stale, or None. Does not count hits."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, meta, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return {"value": row[0], "meta": json.loads(row[1] or "{}"), "created": row[2]}
+
+    def get(self, key):
+        """Return the cached value if present and fresh, else None."""
+        entry = self.get_entry(key)
+        if entry is not None and self.is_fresh(entry):
+            self.record(True)
+            return entry["value"]
+        self.record(False)
+        return None
+
+    def record(self, hit: bool):
+        """Count a lookup made by a caller that reads entries itself (e.g. HTTPCache)."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def put(self, key, value, meta=None):
+        now = time.time()
+        size = len(value) if value is not None else 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, meta, created, accessed, size) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, value, json.dumps(meta or {}), now, now, size),
+            )
+            self._conn.commit()
+            self._evict()
+
+    def touch(self, key):
+        """Mark a stale entry as fresh again (e.g. after an HTTP 304)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE entries SET created = ?, accessed = ? WHERE key = ?", (now, now, key))
+            self._conn.commit()
+
+    def _evict(self):
+        if not self.max_bytes:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% of the cap so we don't evict on every single insert
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall():
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        self._conn.commit()
+        logging.info(f"🧹 Evicted {removed} entries from {self.path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
@@ -1,62 +1,432 @@
+import contextvars
+import hashlib
+import threading
+import time
 import numpy as np
-from openai import OpenAI
-from sklearn.cluster import KMeans, AgglomerativeClustering
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import KMeans, AgglomerativeClustering, MiniBatchKMeans
 from sklearn.metrics import silhouette_score
 import logging
+from agents.llm_cache import get_completion_cache
+from agents.openai_gateway import get_gateway
+from agents.run_store import RunStore
+from agents.utils import estimate_tokens, truncate_to_tokens
+
+STATE_KEY = "categorizer"
+NO_DESCRIPTION = "No description available."
+
+def _vector_key(vector):
+    return hashlib.sha1(np.ascontiguousarray(vector, dtype=np.float32).tobytes()).hexdigest()[:16]
+
+
+def _fit_minibatch(embeddings, k, init, sample_size, seed=42):
+    """Fit MiniBatchKMeans for one candidate k and score it with a sampled silhouette. Runs in a worker process."""
+    start = time.perf_counter()
+    if init is not None:
+        model = MiniBatchKMeans(n_clusters=k, init=init, n_init=1, random_state=seed, batch_size=4096)
+    else:
+        model = MiniBatchKMeans(n_clusters=k, n_init=3, random_state=seed, batch_size=4096)
+    labels = model.fit_predict(embeddings)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score = silhouette_score(embeddings, labels, sample_size=min(sample_size, len(embeddings)), random_state=seed)
+    return {
+        "k": k,
+        "labels": labels,
+        "centroids": model.cluster_centers_,
+        "silhouette": float(score),
+        "fit_seconds": round(fit_seconds, 3),
+        "silhouette_seconds": round(time.perf_counter() - start, 3),
+        "warm_start": init is not None,
+    }
+
 
 class CategorizerAgent:
-    def __init__(self, api_key, n_clusters=5):
-        self.client = OpenAI(api_key=api_key)
+    describe_model = "gpt-4"
+
+    def __init__(self, api_key, n_clusters=5, cache=None, large_n=1000, k_candidates=None,
+                 silhouette_sample=2000, max_workers=None, describe_concurrency=4, prompt_token_budget=3000, client=None,
+                 incremental=False, state_store=None, max_inertia_drift=0.25, max_silhouette_drop=0.05,
+                 stable_jaccard=0.8, embedding_model=None):
+        """
+        Args:
+            api_key (str): OpenAI API key.
+            n_clusters (int): Cluster count for the exact path (and the centre of the large-n sweep).
+            cache (CompletionCache): Completion cache for cluster descriptions.
+            large_n (int): From this many firms on, use MiniBatchKMeans + sampled silhouette.
+            k_candidates (list of int): k values swept in large-n mode; defaults to 1-4× n_clusters.
+            silhouette_sample (int): Points sampled for the silhouette score in large-n mode.
+            max_workers (int): Processes used for the k sweep (None lets the pool decide).
+            describe_concurrency (int): Cluster descriptions requested at the same time.
+            prompt_token_budget (int): Token budget for the member summaries in one describe prompt.
+            client (OpenAIGateway): Shared client; the process-wide gateway for `api_key` when omitted.
+            incremental (bool): Keep centroids, IDs and descriptions between runs. New or changed firms
+                join the nearest existing centroid; a full recluster only runs once drift crosses a threshold.
+            state_store (RunStore | None): Where incremental state is kept; defaults to <cache root>/runs.sqlite.
+            max_inertia_drift (float): Relative growth of mean squared distance to the assigned centroid,
+                against the last full recluster, that triggers a recluster.
+            max_silhouette_drop (float): Drop in (sampled) silhouette against the last full recluster
+                that triggers a recluster.
+            stable_jaccard (float): After a recluster, a cluster whose members overlap its predecessor's
+                by at least this Jaccard keeps the old description instead of being re-described.
+            embedding_model (str | None): Model the embeddings come from; part of the incremental state key,
+                so vectors from different models never share centroids.
+        """
+        self.client = client or get_gateway(api_key)
+        self.cache = cache or get_completion_cache()
         self.n_clusters = n_clusters
+        self.large_n = large_n
+        self.k_candidates = k_candidates
+        self.silhouette_sample = silhouette_sample
+        self.max_workers = max_workers
+        self.describe_concurrency = describe_concurrency
+        self.prompt_token_budget = prompt_token_budget
         self.cluster_map = {}
+        self.centroids = {}
+        self.incremental = incremental
+        self.state_store = state_store or (RunStore() if incremental else None)
+        self.max_inertia_drift = max_inertia_drift
+        self.max_silhouette_drop = max_silhouette_drop
+        self.stable_jaccard = stable_jaccard
+        self.embedding_model = embedding_model
+        self._incremental_lock = threading.Lock()
+        self.last_cluster_report = {}
+        self.last_describe_report = {}
+        self.last_incremental_report = {}
 
     def dynamic_cluster(self, embeddings):
         try:
+            if len(embeddings) >= self.large_n:
+                return self._cluster_large(np.asarray(embeddings, dtype=np.float32))
+
+            start = time.perf_counter()
             if len(embeddings) < 3:
                 logging.info("Using KMeans due to small dataset")
-                return KMeans(n_clusters=1, random_state=42).fit_predict(embeddings)
+                labels = KMeans(n_clusters=1, random_state=42).fit_predict(embeddings)
+                self._report("KMeans", 1, None, len(embeddings), {"fit_seconds": time.perf_counter() - start})
+                return labels
 
             # Try Agglomerative and KMeans, pick one with better silhouette
-            k_labels = KMeans(n_clusters=min(self.n_clusters, len(embeddings)), random_state=42).fit_predict(embeddings)
-            a_labels = AgglomerativeClustering(n_clusters=min(self.n_clusters, len(embeddings))).fit_predict(embeddings)
+            k = min(self.n_clusters, len(embeddings))
+            k_labels = KMeans(n_clusters=k, random_state=42).fit_predict(embeddings)
+            k_seconds = time.perf_counter() - start
+            a_labels = AgglomerativeClustering(n_clusters=k).fit_predict(embeddings)
+            a_seconds = time.perf_counter() - start - k_seconds
 
             k_score = silhouette_score(embeddings, k_labels)
             a_score = silhouette_score(embeddings, a_labels)
+            timings = {"kmeans_seconds": k_seconds, "agglomerative_seconds": a_seconds,
+                       "silhouette_seconds": time.perf_counter() - start - k_seconds - a_seconds}
 
             logging.info(f"KMeans Silhouette: {k_score:.3f}, Agglomerative Silhouette: {a_score:.3f}")
-            return k_labels if k_score >= a_score else a_labels
+            if k_score >= a_score:
+                self._report("KMeans", k, k_score, len(embeddings), timings)
+                return k_labels
+            self._report("AgglomerativeClustering", k, a_score, len(embeddings), timings)
+            return a_labels
 
         except Exception as e:
             logging.error(f"Clustering failed: {e}")
             return [0] * len(embeddings)
 
-    def categorize(self, embeddings, vc_names, summaries_dict):
-        try:
-            labels = self.dynamic_cluster(embeddings)
+    def _cluster_large(self, embeddings):
+        """MiniBatchKMeans sweep over candidate k in a process pool, warm-started from the previous run's centroids."""
+        n = len(embeddings)
+        candidates = self.k_candidates or [self.n_clusters * m for m in (1, 2, 3, 4)]
+        candidates = sorted({k for k in candidates if 2 <= k < n})
 
-            self.cluster_map = {}
-            for i, label in enumerate(labels):
-                if label not in self.cluster_map:
-                    self.cluster_map[label] = []
-                self.cluster_map[label].append(vc_names[i])
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = []
+            for k in candidates:
+                init = self.centroids.get(k)
+                if init is not None and init.shape[1] != embeddings.shape[1]:
+                    init = None
+                futures.append(pool.submit(_fit_minibatch, embeddings, k, init, self.silhouette_sample))
+            fits = [f.result() for f in futures]
 
-            clusters = []
-            for cluster_id, members in self.cluster_map.items():
-                cluster_summaries = "\n".join([f"{m}: {summaries_dict[m]}" for m in members])
-                description = self.describe_cluster(cluster_summaries)
+        best = max(fits, key=lambda f: f["silhouette"])
+        for fit in fits:
+            self.centroids[fit["k"]] = fit["centroids"]
 
-                clusters.append({
-                    "cluster_id": cluster_id,
-                    "description": description,
-                    "members": members
-                })
+        timings = {"sweep_seconds": time.perf_counter() - start,
+                   "per_k": {f["k"]: {"fit_seconds": f["fit_seconds"], "silhouette_seconds": f["silhouette_seconds"],
+                                      "silhouette": round(f["silhouette"], 3), "warm_start": f["warm_start"]}
+                             for f in fits}}
+        self._report("MiniBatchKMeans", best["k"], best["silhouette"], n, timings)
+        return best["labels"]
 
-            return clusters
+    def _report(self, algorithm, k, silhouette, n, timings):
+        self.last_cluster_report = {
+            "algorithm": algorithm,
+            "k": k,
+            "silhouette": round(silhouette, 3) if silhouette is not None else None,
+            "n": n,
+            "timings": {key: round(v, 3) if isinstance(v, float) else v for key, v in timings.items()},
+        }
+        logging.info(f"📈 Clustered {n} firms with {algorithm} (k={k}) in "
+                     f"{sum(v for v in timings.values() if isinstance(v, float)):.2f}s")
+
+    def config(self) -> dict:
+        """Settings that change what `categorize` returns for the same inputs (part of stage checkpoint keys)."""
+        return {
+            "n_clusters": self.n_clusters,
+            "large_n": self.large_n,
+            "k_candidates": self.k_candidates,
+            "silhouette_sample": self.silhouette_sample,
+            "prompt_token_budget": self.prompt_token_budget,
+            "describe_model": self.describe_model,
+            "incremental": self.incremental,
+            "max_inertia_drift": self.max_inertia_drift,
+            "max_silhouette_drop": self.max_silhouette_drop,
+            "stable_jaccard": self.stable_jaccard,
+        }
+
+    def categorize(self, embeddings, vc_names, summaries_dict):
+        try:
+            if self.incremental:
+                return self._categorize_incremental(np.asarray(embeddings, dtype=np.float32), list(vc_names),
+                                                    summaries_dict)
+
+            labels = self.dynamic_cluster(embeddings)
+            cluster_map, member_rows = self._group(labels, vc_names)
+            vectors = np.asarray(embeddings, dtype=np.float32)
+            prompts = {
+                cluster_id: self._cluster_prompt_block(vectors[member_rows[cluster_id]], members, summaries_dict)
+                for cluster_id, members in cluster_map.items()
+            }
+            return self._clusters(cluster_map, self._describe_all(prompts, cluster_map))
 
         except Exception as e:
             logging.error(f"Categorization failed: {e}")
             return []
 
+    @staticmethod
+    def _group(labels, vc_names):
+        """({cluster_id: [vc names]}, {cluster_id: [embedding rows]}) for one run's labels."""
+        cluster_map, member_rows = {}, {}
+        for i, label in enumerate(labels):
+            label = int(label)
+            if label not in cluster_map:
+                cluster_map[label] = []
+                member_rows[label] = []
+            cluster_map[label].append(vc_names[i])
+            member_rows[label].append(i)
+        return cluster_map, member_rows
+
+    def _clusters(self, cluster_map, descriptions):
+        # The shared agent may serve concurrent runs: each run works on its own map and only the finished one is published
+        self.cluster_map = cluster_map
+        return [{"cluster_id": cluster_id, "description": descriptions[cluster_id], "members": members}
+                for cluster_id, members in cluster_map.items()]
+
+    # Incremental mode
+
+    def _silhouette(self, vectors, labels):
+        n_labels = len(set(labels))
+        if n_labels < 2 or n_labels >= len(vectors):
+            return None
+        return float(silhouette_score(vectors, labels, sample_size=min(self.silhouette_sample, len(vectors)),
+                                      random_state=42))
+
+    @staticmethod
+    def _inertia(vectors, labels, cluster_ids, centroids):
+        """Mean squared distance of each firm to its cluster's centroid."""
+        rows = {cid: i for i, cid in enumerate(cluster_ids)}
+        assigned = centroids[[rows[label] for label in labels]]
+        return float(np.mean(np.sum((vectors - assigned) ** 2, axis=1)))
+
+    def _state_key(self, dim) -> str:
+        """State name for one embedding space; firms may join or leave between runs without losing the clusters."""
+        return f"{STATE_KEY}:{self.embedding_model}:{int(dim)}"
+
+    def _categorize_incremental(self, vectors, vc_names, summaries_dict):
+        # State is read, updated and written back per run; concurrent runs on the shared agent take turns
+        with self._incremental_lock:
+            start = time.perf_counter()
+            key = self._state_key(vectors.shape[1])
+            state = self.state_store.get_state(key)
+            if not state or state["dim"] != vectors.shape[1] or not state["cluster_ids"]:
+                return self._recluster(vectors, vc_names, summaries_dict, key, None, "no previous clusters", start)
+            return self._assign(vectors, vc_names, summaries_dict, key, state, start)
+
+    def _assign(self, vectors, vc_names, summaries_dict, key, state, start):
+        """
+        Keep the stored clusters: new or changed firms join the nearest centroid and firms that left are
+        dropped, unless drift forces a recluster.
+        """
+        cluster_ids, centroids = state["cluster_ids"], state["centroids"]
+        keys = [_vector_key(v) for v in vectors]
+        squared = (np.sum(vectors ** 2, axis=1)[:, None] - 2 * vectors @ centroids.T
+                   + np.sum(centroids ** 2, axis=1)[None, :])
+        nearest = np.argmin(squared, axis=1)
+
+        labels, assigned = [], 0
+        for i, name in enumerate(vc_names):
+            previous = state["members"].get(name)
+            if previous is not None and previous[1] == keys[i] and previous[0] in cluster_ids:
+                labels.append(previous[0])
+            else:
+                labels.append(cluster_ids[nearest[i]])
+                assigned += 1
+
+        inertia = self._inertia(vectors, labels, cluster_ids, centroids)
+        drift = inertia / state["inertia"] - 1 if state["inertia"] > 0 else 0.0
+        silhouette = self._silhouette(vectors, labels) if state["silhouette"] is not None else None
+        drop = state["silhouette"] - silhouette if silhouette is not None else 0.0
+        if drift > self.max_inertia_drift:
+            return self._recluster(vectors, vc_names, summaries_dict, key, state, f"inertia drift {drift:.2f}", start)
+        if drop > self.max_silhouette_drop:
+            return self._recluster(vectors, vc_names, summaries_dict, key, state, f"silhouette drop {drop:.3f}", start)
+
+        cluster_map, member_rows = self._group(labels, vc_names)
+        descriptions = dict(zip(cluster_ids, state["descriptions"]))
+        # Only a cluster whose description failed last time goes back to the LLM
+        prompts = {
+            cid: self._cluster_prompt_block(vectors[member_rows[cid]], members, summaries_dict)
+            for cid, members in cluster_map.items() if descriptions.get(cid, NO_DESCRIPTION) == NO_DESCRIPTION
+        }
+        descriptions.update(self._describe_all(prompts, cluster_map) if prompts else {})
+
+        state["members"] = {name: [label, member_key] for name, label, member_key in zip(vc_names, labels, keys)}
+        state["descriptions"] = [descriptions[cid] for cid in cluster_ids]
+        self.state_store.put_state(key, state)
+        self._incremental_report("assign", len(vc_names), assigned, len(cluster_map), len(prompts), drift, drop, start)
+        return self._clusters(cluster_map, descriptions)
+
+    def _match_ids(self, groups, state):
+        """Old cluster ID (Hungarian matching on member Jaccard) and overlap for each new label, or (None, 0)."""
+        old_groups = {}
+        for name, (cid, _) in state["members"].items():
+            old_groups.setdefault(cid, set()).add(name)
+        old_ids, new_labels = list(old_groups), list(groups)
+        if not old_ids:
+            return {label: (None, 0.0) for label in new_labels}
+
+        overlap = np.zeros((len(new_labels), len(old_ids)))
+        for i, label in enumerate(new_labels):
+            for j, cid in enumerate(old_ids):
+                union = len(groups[label] | old_groups[cid])
+                overlap[i, j] = len(groups[label] & old_groups[cid]) / union if union else 0.0
+        matched = {label: (None, 0.0) for label in new_labels}
+        for i, j in zip(*linear_sum_assignment(-overlap)):
+            if overlap[i, j] > 0:
+                matched[new_labels[i]] = (old_ids[j], float(overlap[i, j]))
+        return matched
+
+    def _recluster(self, vectors, vc_names, summaries_dict, key, state, reason, start):
+        logging.info(f"🧭 Full recluster: {reason}")
+        raw = [int(label) for label in self.dynamic_cluster(vectors)]
+        groups = {}
+        for name, label in zip(vc_names, raw):
+            groups.setdefault(label, set()).add(name)
+
+        matched = self._match_ids(groups, state) if state else {label: (label, 0.0) for label in groups}
+        # Unmatched clusters get IDs never used before, so an old ID always means the same group of firms
+        next_id = state["next_id"] if state else 0
+        ids = {}
+        for label in sorted(groups):
+            cid = matched[label][0]
+            if cid is None:
+                cid, next_id = next_id, next_id + 1
+            ids[label] = cid
+        next_id = max([next_id] + [cid + 1 for cid in ids.values()])
+
+        labels = [ids[label] for label in raw]
+        cluster_map, member_rows = self._group(labels, vc_names)
+        cluster_ids = sorted(cluster_map)
+        centroids = np.stack([vectors[member_rows[cid]].mean(axis=0) for cid in cluster_ids]).astype(np.float32)
+
+        old_descriptions = dict(zip(state["cluster_ids"], state["descriptions"])) if state else {}
+        descriptions, prompts = {}, {}
+        for label, cid in ids.items():
+            old = old_descriptions.get(cid, NO_DESCRIPTION)
+            if state and matched[label][1] >= self.stable_jaccard and old != NO_DESCRIPTION:
+                descriptions[cid] = old
+            else:
+                prompts[cid] = self._cluster_prompt_block(vectors[member_rows[cid]], cluster_map[cid], summaries_dict)
+        descriptions.update(self._describe_all(prompts, cluster_map) if prompts else {})
+
+        self.state_store.put_state(key, {
+            "dim": int(vectors.shape[1]),
+            "cluster_ids": cluster_ids,
+            "centroids": centroids,
+            "descriptions": [descriptions[cid] for cid in cluster_ids],
+            "members": {name: [label, _vector_key(v)] for name, label, v in zip(vc_names, labels, vectors)},
+            "inertia": self._inertia(vectors, labels, cluster_ids, centroids),
+            "silhouette": self._silhouette(vectors, labels),
+            "next_id": next_id,
+        })
+        self._incremental_report("recluster", len(vc_names), len(vc_names), len(cluster_map), len(prompts), None, None,
+                                 start, reason)
+        return self._clusters(cluster_map, descriptions)
+
+    def _incremental_report(self, mode, n, assigned, clusters, described, drift, drop, start, reason=None):
+        self.last_incremental_report = {
+            "mode": mode,
+            "reason": reason,
+            "n": n,
+            "assigned": assigned,
+            "clusters": clusters,
+            "described": described,
+            "reused_descriptions": clusters - described,
+            "inertia_drift": round(drift, 3) if drift is not None else None,
+            "silhouette_drop": round(drop, 3) if drop is not None else None,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        logging.info(f"🧭 Clusters ({mode}): {assigned}/{n} firms assigned, "
+                     f"{described}/{clusters} clusters described")
+
+    def _cluster_prompt_block(self, member_vectors, members, summaries_dict):
+        """
+        Build the describe_cluster text block within `prompt_token_budget`, adding the members
+        closest to the cluster centroid first. Returns (text_block, members_used, tokens).
+        """
+        centroid = member_vectors.mean(axis=0)
+        order = np.argsort(np.linalg.norm(member_vectors - centroid, axis=1), kind="stable")
+
+        lines, tokens = [], 0
+        for idx in order:
+            line = f"{members[idx]}: {summaries_dict[members[idx]]}"
+            line_tokens = estimate_tokens(line)
+            if tokens + line_tokens > self.prompt_token_budget:
+                if not lines:
+                    # Always describe at least the most central member
+                    line = truncate_to_tokens(line, self.prompt_token_budget)
+                    lines.append(line)
+                    tokens += estimate_tokens(line)
+                break
+            lines.append(line)
+            tokens += line_tokens
+        return "\n".join(lines), len(lines), tokens
+
+    def _describe_all(self, prompts, cluster_map):
+        """Describe every cluster concurrently (bounded by describe_concurrency) and record per-cluster stats."""
+        def run(cluster_id):
+            text_block, used, tokens = prompts[cluster_id]
+            start = time.perf_counter()
+            description = self.describe_cluster(text_block)
+            return cluster_id, description, used, tokens, time.perf_counter() - start
+
+        descriptions, report = {}, {}
+        workers = max(1, min(self.describe_concurrency, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="describe") as pool:
+            futures = [pool.submit(contextvars.copy_context().run, run, cluster_id) for cluster_id in prompts]
+            for cluster_id, description, used, tokens, seconds in (f.result() for f in futures):
+                descriptions[cluster_id] = description
+                report[cluster_id] = {
+                    "members": len(cluster_map[cluster_id]),
+                    "members_in_prompt": used,
+                    "prompt_tokens": tokens,
+                    "seconds": round(seconds, 3),
+                }
+                logging.info(f"🏷️ Cluster {cluster_id}: described {used}/{len(cluster_map[cluster_id])} "
+                             f"members in {tokens} tokens, {seconds:.1f}s")
+        self.last_describe_report = report
+        return descriptions
+
     def describe_cluster(self, text_block):
         try:
             prompt = f"""
@@ -66,12 +436,7 @@ You are an investment intelligence analyst. Provide a 1-2 sentence summary that
 
 Return only the summary description.
 """
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.4
-            )
-            return response.choices[0].message.content.strip()
+            return self.cache.complete(self.client, self.describe_model, [{"role": "user", "content": prompt}], temperature=0.4)
         except Exception as e:
             logging.error(f"Failed to describe cluster: {e}")
-            return "No description available."
+            return NO_DESCRIPTION
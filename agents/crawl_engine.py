@@ -0,0 +1,70 @@
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+
+class HostThrottle:
+    def __init__(self, delay=1.0):
+        """
+        Per-host politeness gate shared by every crawl worker.
+
+        Args:
+            delay (float): Minimum number of seconds between two requests to the same host.
+        """
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        """Block until a request to the host of `url` is allowed, then reserve the next slot."""
+        if not self.delay or self.delay <= 0:
+            return
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.delay
+        pause = slot - now
+        if pause > 0:
+            time.sleep(pause)
+
+
+class CrawlEngine:
+    def __init__(self, max_workers=8):
+        """
+        Bounded worker pool that fans out one task per VC.
+
+        Args:
+            max_workers (int): Global limit on VCs being processed at the same time.
+        """
+        self.max_workers = max_workers
+
+    def run(self, items, task):
+        """
+        Run `task(item)` for every item concurrently.
+
+        Returns:
+            dict: {item: result} in the order of `items`. Items whose task raised are
+            logged and left out, exactly like the old serial loop's `continue`.
+        """
+        items = list(items)
+        results = {}
+        if not items:
+            return results
+
+        workers = max(1, min(self.max_workers, len(items)))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vc-crawl") as pool:
+            # Copy the context so each task records into the caller's run trace
+            futures = [(item, pool.submit(contextvars.copy_context().run, task, item)) for item in items]
+            for item, future in futures:
+                try:
+                    results[item] = future.result()
+                except Exception as e:
+                    logging.error(f"⚠️ Error processing {item}: {e}")
+
+        logging.info(f"⏱️ Crawled {len(items)} VC sites in {time.perf_counter() - start:.1f}s with {workers} workers")
+        return results
@@ -0,0 +1,187 @@
+# document_ingest.py — Streaming, budgeted text extraction for founder uploads (PDF, DOCX, TXT)
+
+import codecs
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+from PyPDF2 import PdfReader
+
+from agents.utils import clean_text
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+TXT_CHUNK = 64 * 1024
+
+
+def sniff_format(data: bytes) -> str:
+    """"pdf", "docx" or "txt", from the leading bytes (Streamlit hands us bytes, not filenames)."""
+    head = data[:1024].lstrip()
+    if head.startswith(b"%PDF"):
+        return "pdf"
+    if data.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+    return "txt"
+
+
+def iter_txt(data: bytes):
+    """Decoded text in ~64 KB pieces, split on whitespace so no word straddles two pieces."""
+    if data.startswith(codecs.BOM_UTF16_LE) or data.startswith(codecs.BOM_UTF16_BE):
+        decoder = codecs.getincrementaldecoder("utf-16")(errors="replace")
+    else:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    carry = ""
+    for start in range(0, len(data), TXT_CHUNK):
+        text = carry + decoder.decode(data[start:start + TXT_CHUNK])
+        cut = max(text.rfind(" "), text.rfind("\n"))
+        if cut < 0:
+            carry = text
+            continue
+        carry = text[cut:]
+        yield text[:cut]
+    tail = carry + decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_docx(data: bytes):
+    """One string per paragraph, streamed from word/document.xml without building the XML tree."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive, archive.open("word/document.xml") as document:
+        parts = []
+        for _, element in ElementTree.iterparse(document, events=("end",)):
+            if element.tag == _W + "t":
+                parts.append(element.text or "")
+            elif element.tag in (_W + "tab", _W + "br"):
+                parts.append(" ")
+            elif element.tag == _W + "p":
+                if parts:
+                    yield "".join(parts)
+                parts = []
+                element.clear()
+
+
+_worker_readers = {}
+
+
+def _extract_pages(path, start, stop):
+    # Each worker parses a document once and keeps the last few, so later ranges of the same upload are cheap
+    reader = _worker_readers.get(path)
+    if reader is None:
+        reader = _worker_readers[path] = PdfReader(path)
+        while len(_worker_readers) > 4:
+            _worker_readers.pop(next(iter(_worker_readers)))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Process-wide page-extraction pool. Workers are spawned, not forked, since the server is multithreaded."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=min(4, os.cpu_count() or 1),
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+
+def _reset_pdf_pool(pool):
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is pool:
+            _pdf_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pdf(data: bytes, workers=None, parallel_min_pages=32, pages_per_task=8):
+    """
+    Page texts in page order.
+
+    Small PDFs are read page by page in-process. Large ones are split into page ranges that
+    the shared worker pool extracts (PyPDF2 is pure Python, so threads would not help), keeping
+    at most `workers` ranges in flight so a consumer that stops early wastes little work. Workers
+    read the document from a temporary file rather than receiving its bytes with every task.
+    """
+    reader = PdfReader(io.BytesIO(data))
+    n_pages = len(reader.pages)
+    workers = workers or min(4, os.cpu_count() or 1)
+    if n_pages < parallel_min_pages or workers <= 1:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    ranges = [(start, min(start + pages_per_task, n_pages)) for start in range(0, n_pages, pages_per_task)]
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as handle:
+        handle.write(data)
+    pool, in_flight, done = get_pdf_pool(), [], 0
+    try:
+        in_flight = [pool.submit(_extract_pages, handle.name, *r) for r in ranges[:workers]]
+        next_range = len(in_flight)
+        while in_flight:
+            pages = in_flight.pop(0).result()
+            if next_range < len(ranges):
+                in_flight.append(pool.submit(_extract_pages, handle.name, *ranges[next_range]))
+                next_range += 1
+            done += len(pages)
+            yield from pages
+    except BrokenProcessPool as e:
+        logging.warning(f"⚠️ PDF worker pool failed ({e}); reading the remaining pages in-process")
+        _reset_pdf_pool(pool)
+        for i in range(done, n_pages):
+            yield reader.pages[i].extract_text() or ""
+    finally:
+        # Reached when the consumer has its budget: drop the ranges nobody will read
+        for future in in_flight:
+            future.cancel()
+        os.unlink(handle.name)
+
+
+def read_document(data: bytes, max_chars=None, workers=None) -> dict:
+    """
+    Extract cleaned text from an uploaded document, stopping once `max_chars` of useful
+    (cleaned) text has been collected.
+
+    Args:
+        data (bytes): Raw upload.
+        max_chars (int | None): Character budget; None reads everything.
+        workers (int | None): Large-PDF page ranges extracted in parallel on the shared pool.
+
+    Returns:
+        dict: {"text", "format", "units_read", "truncated"} where units are pages, paragraphs or text pieces.
+    """
+    fmt = sniff_format(data)
+    pieces = {"pdf": lambda: iter_pdf(data, workers), "docx": lambda: iter_docx(data), "txt": lambda: iter_txt(data)}[fmt]()
+
+    parts, chars, units, truncated = [], 0, 0, False
+    try:
+        for piece in pieces:
+            units += 1
+            cleaned = clean_text(piece)
+            if not cleaned:
+                continue
+            parts.append(cleaned)
+            chars += len(cleaned) + 1
+            if max_chars is not None and chars >= max_chars:
+                truncated = True
+                break
+    finally:
+        pieces.close()
+
+    text = " ".join(parts)
+    if max_chars is not None:
+        text = text[:max_chars]
+    logging.info(f"📄 Read {units} {fmt} units → {len(text)} chars{' (budget reached)' if truncated else ''}")
+    return {"text": text, "format": fmt, "units_read": units, "truncated": truncated}
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, writers must not share a directory
+    fcntl = None
+
+from agents.utils import cache_dir
+
+
+class EmbeddingStore:
+    def __init__(self, directory=None, model="text-embedding-ada-002"):
+        """
+        Persistent text-hash → float32 vector cache.
+
+        Vectors live in one raw float32 matrix file that is opened with np.memmap, so
+        loading costs nothing until rows are read. A JSON index maps text hashes to rows.
+        Several instances and processes may share a directory: writers hold a file lock,
+        only ever append, and pick up each other's rows from the index on disk.
+
+        Args:
+            directory (str | None): Where to keep vectors.f32 and index.json; defaults to
+                <cache root>/embeddings/<model>.
+            model (str): Embedding model the vectors belong to.
+        """
+        self.model = model
+        self.directory = directory or cache_dir("embeddings", model)
+        os.makedirs(self.directory, exist_ok=True)
+        self.matrix_path = os.path.join(self.directory, "vectors.f32")
+        self.index_path = os.path.join(self.directory, "index.json")
+        self.lock_path = os.path.join(self.directory, "index.lock")
+        self._lock = threading.Lock()
+        self.dim = None
+        self.rows = {}
+        self._matrix = None
+        self._index_seen = None
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        """(Re)read the on-disk index; caller holds self._lock."""
+        try:
+            seen = self._index_version()
+        except FileNotFoundError:
+            return
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+            self.dim = index["dim"]
+            self.rows = index["rows"]
+            self._index_seen = seen
+            self._remap()
+        except Exception as e:
+            logging.warning(f"⚠️ Ignoring unreadable embedding index {self.index_path}: {e}")
+            self.dim, self.rows, self._matrix = None, {}, None
+
+    def _index_version(self):
+        # os.replace gives every rewrite a new inode, so this changes even within one mtime tick
+        stat = os.stat(self.index_path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _refresh(self):
+        """Reload the index if another instance or process rewrote it; caller holds self._lock."""
+        try:
+            seen = self._index_version()
+        except FileNotFoundError:
+            return
+        if seen != self._index_seen:
+            self._load()
+
+    def _remap(self):
+        # Rows are indexed by position; an interrupted writer can leave unindexed gaps, so map up to the last row
+        n = max(self.rows.values()) + 1 if self.rows else 0
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(n, self.dim)) if n else None
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, keys):
+        """Return {key: vector} for the keys that are stored. Vectors are read-only memmap views."""
+        with self._lock:
+            keys = list(keys)
+            if any(k not in self.rows for k in keys):
+                self._refresh()
+            matrix = self._matrix
+            return {k: matrix[self.rows[k]] for k in keys if k in self.rows}
+
+    def add(self, keys, vectors):
+        """Append new vectors (n × dim) for `keys` at the end of the matrix file and persist the index."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when lock_file closes
+            # Another instance may have appended since we last looked: start from the index on disk
+            self._refresh()
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dim {vectors.shape[1]} does not match store dim {self.dim}")
+
+            new, seen = [], set()
+            for k, v in zip(keys, vectors):
+                if k not in self.rows and k not in seen:
+                    seen.add(k)
+                    new.append((k, v))
+            if not new:
+                return
+
+            row_bytes = self.dim * 4
+            mode = "r+b" if os.path.exists(self.matrix_path) else "wb"
+            with open(self.matrix_path, mode) as f:
+                # Never truncate: readers may have the file mapped. Rows a crashed writer appended
+                # without indexing them are skipped, and a partial row is padded out.
+                size = f.seek(0, os.SEEK_END)
+                start = max(-(-size // row_bytes), max(self.rows.values()) + 1 if self.rows else 0)
+                f.seek(start * row_bytes)
+                f.write(np.stack([v for _, v in new]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            for i, (k, _) in enumerate(new):
+                self.rows[k] = start + i
+
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"model": self.model, "dim": self.dim, "rows": self.rows}, f)
+            os.replace(tmp_path, self.index_path)
+            self._index_seen = self._index_version()
+            self._remap()
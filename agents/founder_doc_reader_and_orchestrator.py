@@ -1,44 +1,41 @@
+import contextvars
+import hashlib
 import logging
-from agents.utils import clean_text
-from PyPDF2 import PdfReader
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from agents.cache_store import CacheStore
+from agents.categorizer_agent import NO_DESCRIPTION
+from agents.crawl_engine import CrawlEngine
+from agents.document_ingest import read_document
+from agents.stage_scheduler import Stage, StageScheduler
+from agents.text_reducer import TextReducer
+from agents.instrumentation import span, start_run
+from agents.instrumentation import record_cache
+from agents.run_store import RunStore, fingerprint
+from agents.utils import cache_dir
+from agents.vc_index import VCIndex
 
-class FounderDocReaderAgent:
-    def __init__(self):
-        pass
+# Listener for partial results of the run on this context (set by run_stream); None when nobody listens
+_listener = contextvars.ContextVar("vchunter_listener", default=None)
 
-    def extract_text(self, uploaded_file) -> str:
-        try:
-            reader = PdfReader(uploaded_file)
-            text = "\n".join([page.extract_text() or "" for page in reader.pages])
-            return clean_text(text)
-        except Exception as e:
-            return f"Error reading file: {e}"
 
+def _emit(kind, **data):
+    listener = _listener.get()
+    if listener is not None:
+        listener({"type": kind, **data})
 
-class VCHunterOrchestrator:
-    def __init__(self, agents):
-        self.scraper = agents['scraper']
-        self.portfolio_enricher = agents['portfolio']
-        self.summarizer = agents['summarizer']
-        self.embedder = agents['embedder']
-        self.categorizer = agents['categorizer']
-        self.relationship = agents['relationship']
-        self.visualizer = agents['visualizer']
-        self.matcher = agents['matcher']
-        self.chatbot = agents['chatbot']
-        self.gap = agents['gap']
-        self.similar = agents['similar']
 
-    def run(self, founder_text: str):
-        logging.info("🔍 Summarizing founder text...")
-        founder_summary = self.summarizer.summarize_founder(founder_text)
-        logging.info("🧠 Generating founder embedding...")
-        founder_embeds = self.embedder.embed([founder_summary])
-        if not founder_embeds:
-            raise ValueError("Founder embedding failed.")
-        founder_vec = founder_embeds[0]
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
 
-        vc_urls = [
+VC_URLS = [
     "https://a16z.com",
     "https://www.sequoiacap.com",
     "https://www.benchmark.com",
@@ -61,62 +58,437 @@ class VCHunterOrchestrator:
     "https://www.signal.vc"
 ]
 
-        vc_summaries, vc_portfolios = {}, {}
-        for url in vc_urls:
+
+class FounderDocReaderAgent:
+    def __init__(self, max_chars=20_000, page_workers=None, cache=None):
+        """
+        Reads founder uploads (PDF, DOCX, TXT) up to a useful character budget.
+
+        Args:
+            max_chars (int): Cleaned characters kept per upload; extraction stops once reached.
+            page_workers (int | None): Processes used for large PDFs.
+            cache (CacheStore | None): Extracted text keyed by content hash; defaults to
+                <cache root>/documents.sqlite.
+        """
+        self.max_chars = max_chars
+        self.page_workers = page_workers
+        self.cache = cache or CacheStore(os.path.join(cache_dir(), "documents.sqlite"),
+                                         ttl=30 * 24 * 3600, max_bytes=64 * 1024 * 1024)
+
+    def extract_text(self, uploaded_file, max_chars=None) -> str:
+        """Cleaned text of an upload (bytes or a file-like object), at most `max_chars` characters."""
+        max_chars = self.max_chars if max_chars is None else max_chars
+        try:
+            data = uploaded_file if isinstance(uploaded_file, bytes) else uploaded_file.read()
+            key = f"{hashlib.sha256(data).hexdigest()}:{max_chars}"
+            cached = self.cache.get(key)
+            record_cache("document", cached is not None)
+            if cached is not None:
+                return cached.decode("utf-8")
+
+            text = read_document(data, max_chars=max_chars, workers=self.page_workers)["text"]
+            self.cache.put(key, text.encode("utf-8"))
+            return text
+        except Exception as e:
+            logging.error(f"❌ Could not read founder document: {e}")
+            return f"Error reading file: {e}"
+
+
+class VCHunterOrchestrator:
+    def __init__(self, agents, stage_timeouts=None, max_workers=8, run_store=None, refresh_after=24 * 3600,
+                 founder_vector="summary", chunk_tokens=500, pooling="mean"):
+        """
+        Args:
+            agents (dict): Agent instances keyed by role (scraper, portfolio, summarizer, ...).
+            stage_timeouts (dict): Optional {stage name: seconds} overrides of STAGE_TIMEOUTS.
+            max_workers (int): Stages allowed to run at the same time.
+            run_store (RunStore | None): Checkpoints for resuming runs; defaults to <cache root>/runs.sqlite.
+            refresh_after (float): Seconds a VC checkpoint is trusted without re-crawling the site.
+            founder_vector (str): Default founder vector mode. "summary" embeds the GPT-4 founder summary;
+                "chunks" embeds the whole document in chunks and pools them, with the summary produced
+                alongside for display only.
+            chunk_tokens (int): Chunk size in "chunks" mode.
+            pooling (str): "mean" or "attention" pooling of chunk vectors in "chunks" mode.
+        """
+        self.scraper = agents['scraper']
+        self.portfolio_enricher = agents['portfolio']
+        self.summarizer = agents['summarizer']
+        self.embedder = agents['embedder']
+        self.categorizer = agents['categorizer']
+        self.relationship = agents['relationship']
+        self.visualizer = agents['visualizer']
+        self.matcher = agents['matcher']
+        self.chatbot = agents['chatbot']
+        self.gap = agents['gap']
+        self.similar = agents['similar']
+        self.crawler = agents.get('crawler') or CrawlEngine()
+        self.reducer = agents.get('reducer') or TextReducer()
+        self.stage_timeouts = {**self.STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        self.max_workers = max_workers
+        self.run_store = run_store or RunStore()
+        self.refresh_after = refresh_after
+        self.founder_vector = founder_vector
+        self.chunk_tokens = chunk_tokens
+        self.pooling = pooling
+        self.last_stage_report = {}
+        self.last_trace = {}
+
+    STAGE_TIMEOUTS = {
+        "founder_summary": 180,
+        "founder_vec": 60,
+        "clusters": 600,
+        "relationships": 300,
+        "matches": 60,
+        "gap": 60,
+        "similar": 120,
+    }
+
+    # Bump a checkpointed stage's version whenever its code changes what it returns for the same inputs
+    STAGE_VERSIONS = {
+        "clusters": 2,
+        "relationships": 2,
+        "company_embeddings": 2,
+    }
+
+    def _stage_config(self, name):
+        """Everything besides the stage's data inputs that shapes its result, folded into its checkpoint key."""
+        config = {"version": self.STAGE_VERSIONS.get(name, 1), "embedding_model": self.embedder.model}
+        if name == "clusters":
+            config["categorizer"] = self.categorizer.config()
+        elif name == "relationships":
+            # A class or a functools.partial of one; either repr is stable and carries any bound options
+            config["relationship"] = repr(self.relationship)
+        return config
+
+    @classmethod
+    def _is_empty(cls, result):
+        """True for a failed stage's result: an empty collection, a tuple with an empty part, or a dict of empties."""
+        if isinstance(result, tuple):
+            return any(cls._is_empty(part) for part in result)
+        if isinstance(result, dict):
+            return all(cls._is_empty(value) for value in result.values())
+        return len(result) == 0
+
+    @classmethod
+    def _is_failed(cls, name, result):
+        """True for a result worth retrying rather than checkpointing: empty, or clusters the LLM failed to describe."""
+        if cls._is_empty(result):
+            return True
+        # Like the completion cache, keep failed descriptions out of storage so the next run asks again
+        return name == "clusters" and any(c.get("description") == NO_DESCRIPTION for c in result)
+
+    def _stage(self, name, fn, deps=(), required=True, default=None, checkpoint=False):
+        if checkpoint:
+            fn = self._checkpointed(name, fn)
+        return Stage(name, fn, deps, timeout=self.stage_timeouts.get(name), required=required, default=default)
+
+    def _checkpointed(self, name, fn):
+        """Wrap a stage so it reuses its stored result while the fingerprint of its inputs is unchanged."""
+        def run(**inputs):
+            key = fingerprint(name, self._stage_config(name), inputs)
+            cached = self.run_store.get_stage(name, key)
+            if cached is not None:
+                logging.info(f"♻️ Stage {name}: inputs unchanged, reusing checkpoint")
+                return cached
+            result = fn(**inputs)
+            if not self._is_failed(name, result):
+                self.run_store.put_stage(name, key, result)
+            return result
+        return run
+
+    def _process_vc(self, url):
+        """
+        Scrape → enrich → summarize a single VC. Runs on a crawl worker thread, which hands the
+        summary to the summarizer and moves on; returns (Future of the summary, pages).
+
+        Each artifact is checkpointed as soon as it exists. A fresh checkpoint is reused without
+        touching the network; an older one is reused only if the re-crawled pages are unchanged.
+        """
+        checkpoint = self.run_store.get_vc(url)
+        if checkpoint is not None and time.time() - checkpoint["saved_at"] < self.refresh_after:
+            logging.info(f"♻️ Resuming {url} from checkpoint")
+            return self._summarize_vc(url, checkpoint), checkpoint["pages"]
+
+        logging.info(f"🌐 Scraping VC site: {url}")
+        with span("scrape", vc=url):
+            result = self.scraper.scrape(url)
+        site_text = "\n".join(result["site_text"].values())
+        logging.info(f"📚 Enriching portfolio for: {url}")
+        with span("enrich", vc=url):
+            enriched_texts = self.portfolio_enricher.enrich(result["portfolio_links"])
+
+        inputs = fingerprint(site_text, enriched_texts)
+        if checkpoint is not None and checkpoint["fingerprint"] == inputs and checkpoint.get("summary"):
+            logging.info(f"♻️ {url} unchanged since its last crawl; reusing its summary")
+            self.run_store.put_vc(url, checkpoint)
+            return _resolved(checkpoint["summary"]), checkpoint["pages"]
+
+        with span("reduce", vc=url):
+            reduced = self.reducer.reduce(url, site_text, enriched_texts)
+        record = {"fingerprint": inputs, "site_text": reduced["site_text"], "portfolio_text": reduced["portfolio_text"],
+                  "pages": reduced["pages"], "summary": None}
+        if site_text or enriched_texts:
+            self.run_store.put_vc(url, record)
+        return self._summarize_vc(url, record), record["pages"]
+
+    def _summarize_vc(self, url, record):
+        if record.get("summary"):
+            return _resolved(record["summary"])
+        logging.info(f"📝 Summarizing site and portfolio for: {url}")
+        future = self.summarizer.submit(record["site_text"], record["portfolio_text"], url=url)
+
+        def checkpoint(done):
+            if done.result():
+                self.run_store.put_vc(url, {**record, "summary": done.result()})
+
+        future.add_done_callback(checkpoint)
+        return future
+
+    def _crawl(self, vc_urls):
+        progress, lock = {"done": 0, "total": len(vc_urls)}, threading.Lock()
+
+        def report(url, summary):
+            with lock:
+                progress["done"] += 1
+                done = progress["done"]
+            _emit("vc_summary", vc=url, summary=summary, done=done, total=progress["total"])
+
+        def process(url):
             try:
-                logging.info(f"🌐 Scraping VC site: {url}")
-                result = self.scraper.scrape(url)
-                site_text = "\n".join(result["site_text"].values())
-                logging.info(f"📚 Enriching portfolio for: {url}")
-                enriched_texts = self.portfolio_enricher.enrich(result["portfolio_links"])
-                portfolio_text = "\n".join(enriched_texts.values())
-                logging.info(f"📝 Summarizing site and portfolio for: {url}")
-                summary = self.summarizer.summarize(site_text, portfolio_text)
-
-                if summary:
-                    vc_summaries[url] = summary
-                    vc_portfolios[url] = list(enriched_texts.keys())
-            except Exception as e:
-                logging.error(f"⚠️ Error processing {url}: {e}")
-                continue
+                summary, pages = self._process_vc(url)
+            except Exception:
+                report(url, "")
+                raise
+            # The summary may land after this worker has moved on, on a summarizer thread
+            context, reported = contextvars.copy_context(), Future()
+
+            def on_summary(done):
+                try:
+                    context.run(report, url, done.result())
+                finally:
+                    reported.set_result(done.result())
+
+            summary.add_done_callback(on_summary)
+            return reported, pages
+
+        vc_summaries, vc_portfolios, portfolio_texts, dropped = {}, {}, {}, []
+        for url, (summary, enriched_texts) in self.crawler.run(vc_urls, process).items():
+            summary = summary.result()
+            if summary:
+                vc_summaries[url] = summary
+                vc_portfolios[url] = list(enriched_texts.keys())
+                portfolio_texts.update(enriched_texts)
+            else:
+                dropped.append(url)
+
+        if dropped:
+            # Transient API errors were already retried; what is left is worth seeing, not hiding
+            logging.warning(f"⚠️ {len(dropped)} VC(s) left out without a summary: {', '.join(dropped[:10])}"
+                            f"{' …' if len(dropped) > 10 else ''}")
 
         if not vc_summaries:
             raise ValueError("No VC summaries could be processed.")
+        return {"summaries": vc_summaries, "portfolios": vc_portfolios, "portfolio_texts": portfolio_texts}
 
+    def _embed_vcs(self, vc_crawl):
         logging.info("🔢 Embedding VC summaries...")
-        embeddings = self.embedder.embed([vc_summaries[url] for url in vc_summaries])
-        if not embeddings:
+        embeddings = self.embedder.embed(list(vc_crawl["summaries"].values()))
+        if len(embeddings) == 0:
             raise ValueError("VC embeddings failed.")
+        return embeddings
 
-        vc_to_vectors = dict(zip(vc_summaries.keys(), embeddings))
-        vc_to_companies = vc_portfolios
-
+    def _categorize(self, vc_crawl, vc_embeddings):
         logging.info("📈 Categorizing VC firms...")
-        clusters = self.categorizer.categorize(embeddings, list(vc_summaries.keys()), vc_summaries)
-        cluster_map = {vc: cluster['cluster_id'] for cluster in clusters for vc in cluster['members']}
+        summaries = vc_crawl["summaries"]
+        return self.categorizer.categorize(vc_embeddings, list(summaries.keys()), summaries)
 
+    def _relationships(self, vc_crawl, vc_embeddings):
         logging.info("🔗 Analyzing co-investment and relationships...")
-        relationship_graph = self.relationship(vc_to_companies, vc_to_vectors).analyze()
+        vc_to_vectors = dict(zip(vc_crawl["summaries"].keys(), vc_embeddings))
+        return self.relationship(vc_crawl["portfolios"], vc_to_vectors).analyze()
+
+    def _embed_companies(self, vc_crawl):
+        logging.info("🏢 Embedding portfolio companies...")
+        portfolio_texts = vc_crawl["portfolio_texts"]
+        company_names = list(portfolio_texts.keys())
+        company_embeddings = self.embedder.embed([portfolio_texts[c] for c in company_names])
+        return company_names if len(company_embeddings) else [], company_embeddings
 
-        logging.info("📊 Generating visualizations...")
-        visuals = self.visualizer.plot_all(embeddings, list(vc_summaries.keys()), clusters, relationship_graph)
+    def _assemble_index(self, vc_crawl, vc_embeddings, clusters, relationships, company_embeddings):
+        logging.info(f"💾 Completion cache: {self.summarizer.cache.stats()}")
+        logging.info(f"📝 VC summaries so far: {self.summarizer.stats()}")
+        company_names, company_vectors = company_embeddings
+        return VCIndex(
+            summaries=vc_crawl["summaries"],
+            embeddings=vc_embeddings,
+            clusters=clusters,
+            portfolios=vc_crawl["portfolios"],
+            portfolio_texts=vc_crawl["portfolio_texts"],
+            relationships=relationships,
+            company_names=company_names,
+            company_embeddings=company_vectors,
+        )
 
-        logging.info("🎯 Matching VCs to founder...")
-        matches = self.matcher.match(founder_vec, embeddings, list(vc_summaries.keys()), cluster_map)
+    def _vc_stages(self, vc_urls):
+        """Founder-independent stages, ending in a "vc_index" stage."""
+        return [
+            self._stage("vc_crawl", lambda: self._crawl(vc_urls or VC_URLS)),
+            self._stage("vc_embeddings", self._embed_vcs, ["vc_crawl"]),
+            self._stage("clusters", self._categorize, ["vc_crawl", "vc_embeddings"], required=False, default=[],
+                        checkpoint=True),
+            self._stage("relationships", self._relationships, ["vc_crawl", "vc_embeddings"],
+                        required=False, default={"co_investment": []}, checkpoint=True),
+            self._stage("company_embeddings", self._embed_companies, ["vc_crawl"], required=False,
+                        default=([], np.empty((0, 0), dtype=np.float32)), checkpoint=True),
+            self._stage("vc_index", self._assemble_index,
+                        ["vc_crawl", "vc_embeddings", "clusters", "relationships", "company_embeddings"]),
+        ]
 
-        logging.info("🚪 Detecting whitespace/gap opportunities...")
-        gap = self.gap.detect(founder_vec, embeddings, [c['cluster_id'] for c in clusters])
+    def _founder_stages(self, founder_text, founder_vector="summary"):
+        """Founder-side stages; they need a "vc_index" stage to exist in the same DAG."""
+        def summarize_founder():
+            logging.info("🔍 Summarizing founder text...")
+            return self.summarizer.summarize_founder(founder_text)
 
-        logging.info("🔍 Finding similar portfolio companies...")
-        similar = self.similar.find_similar(founder_vec, vc_to_vectors, vc_to_companies)
+        def embed_founder(founder_summary):
+            logging.info("🧠 Generating founder embedding...")
+            founder_embeds = self.embedder.embed([founder_summary])
+            if len(founder_embeds) == 0:
+                raise ValueError("Founder embedding failed.")
+            return founder_embeds[0]
+
+        def embed_document():
+            logging.info("🧩 Embedding the founder document in chunks...")
+            founder_embeds = self.embedder.embed_documents([founder_text], chunk_tokens=self.chunk_tokens,
+                                                           pooling=self.pooling)
+            if len(founder_embeds) == 0:
+                raise ValueError("Founder embedding failed.")
+            return founder_embeds[0]
+
+        if founder_vector == "chunks":
+            # The vector no longer waits for GPT-4; the summary is only shown, so it may fail on its own
+            founder = [self._stage("founder_summary", summarize_founder, required=False, default=""),
+                       self._stage("founder_vec", embed_document)]
+        elif founder_vector == "summary":
+            founder = [self._stage("founder_summary", summarize_founder),
+                       self._stage("founder_vec", embed_founder, ["founder_summary"])]
+        else:
+            raise ValueError(f"Unknown founder vector mode {founder_vector!r}")
+
+        def visualize(vc_index):
+            logging.info("📊 Generating visualizations...")
+            return self.visualizer.plot_all(vc_index.embeddings, vc_index.vc_names, vc_index.clusters, vc_index.relationships)
+
+        def match(founder_vec, vc_index):
+            logging.info("🎯 Matching VCs to founder...")
+            return self.matcher.match(founder_vec, vc_index.embeddings, vc_index.vc_names, vc_index.cluster_map,
+                                      index=vc_index.vc_vector_index)
+
+        def detect_gap(founder_vec, vc_index):
+            logging.info("🚪 Detecting whitespace/gap opportunities...")
+            return self.gap.detect(founder_vec, vc_index.embeddings, [c['cluster_id'] for c in vc_index.clusters])
+
+        def find_similar(founder_vec, vc_index):
+            logging.info("🔍 Finding similar portfolio companies...")
+            return self.similar.rank(founder_vec, vc_index.company_names, vc_index.company_embeddings,
+                                     vc_index.company_to_vcs, index=vc_index.company_vector_index)
+
+        return founder + [
+            self._stage("visuals", visualize, ["vc_index"], required=False, default={}),
+            self._stage("matches", match, ["founder_vec", "vc_index"], required=False, default=[]),
+            self._stage("gap", detect_gap, ["founder_vec", "vc_index"], required=False, default=[]),
+            self._stage("similar", find_similar, ["founder_vec", "vc_index"], required=False, default=[]),
+        ]
+
+    def _run_stages(self, name, stages):
+        """Run a stage DAG under a fresh run trace; returns (results, stage report, trace dict)."""
+        scheduler = StageScheduler(max_workers=self.max_workers)
+        completed = []
+
+        def on_result(stage, result, timing):
+            completed.append(stage)
+            _emit("stage", stage=stage, result=result, status=timing["status"], seconds=timing["seconds"],
+                  completed=len(completed), total=len(stages))
+
+        with start_run(name) as trace:
+            try:
+                results = scheduler.run(stages, on_result=on_result)
+            finally:
+                self.last_stage_report = scheduler.last_report
+        self.last_trace = {**trace.to_dict(), "stage_report": scheduler.last_report}
+        try:
+            logging.info(f"🧾 Run trace written to {trace.save()}")
+        except OSError as e:
+            logging.warning(f"⚠️ Could not write run trace: {e}")
+        return results, scheduler.last_report, self.last_trace
+
+    def build_vc_index(self, vc_urls=None) -> VCIndex:
+        """Run the founder-independent half of the pipeline: crawl, summarize, embed, cluster, relate."""
+        results, _, _ = self._run_stages("build_index", self._vc_stages(vc_urls))
+        return results["vc_index"]
+
+    def run_founder(self, founder_text: str, index: VCIndex):
+        """Run the founder half of the pipeline against a prebuilt VC index."""
+        return self.run(founder_text, index=index)
+
+    def run(self, founder_text: str, index: VCIndex = None, vc_urls=None, founder_vector=None):
+        """
+        Full pipeline as a stage DAG. Founder summarization/embedding runs alongside the VC
+        crawl of `vc_urls` (default VC_URLS), or against `index` when one is prebuilt, and every
+        founder-side stage starts as soon as the founder vector and the VC index exist.
+        `founder_vector` ("summary" or "chunks") overrides the orchestrator's default mode.
+        """
+        founder_vector = founder_vector or self.founder_vector
+        vc_stages = self._vc_stages(vc_urls) if index is None else [self._stage("vc_index", lambda: index)]
+        founder_stages = self._founder_stages(founder_text, founder_vector)
+        results, stage_report, trace = self._run_stages("analysis", vc_stages + founder_stages)
+        vc_index = results["vc_index"]
 
         return {
-            "founder_summary": founder_summary,
-            "vc_summaries": list(vc_summaries.values()),
-            "clusters": clusters,
-            "relationships": relationship_graph,
-            "visuals": visuals,
-            "matches": matches,
-            "gap": gap,
-            "similar_companies": similar
+            "founder_summary": results["founder_summary"],
+            "vc_summaries": list(vc_index.summaries.values()),
+            "clusters": vc_index.clusters,
+            "relationships": vc_index.relationships,
+            "visuals": results["visuals"],
+            "matches": results["matches"],
+            "gap": results["gap"],
+            "similar_companies": results["similar"],
+            "index_version": vc_index.version,
+            "vc_index": vc_index,
+            "founder_vector": founder_vector,
+            "stage_report": stage_report,
+            "trace": trace
         }
+
+    def run_stream(self, founder_text: str, index: VCIndex = None, vc_urls=None, founder_vector=None):
+        """
+        `run`, yielding partial results while it works instead of only the final dict.
+
+        Events are dicts with a "type":
+            "stage": {"stage", "result", "status", "seconds", "completed", "total"} as each stage resolves
+                (founder_summary, vc_embeddings, clusters, relationships, vc_index, matches, visuals, ...).
+            "vc_summary": {"vc", "summary", "done", "total"} as each VC of a crawl is summarized
+                ("summary" is empty for a VC that failed).
+            "done": {"results"}: the dict `run` returns; always the last event.
+        A pipeline failure is raised from the generator.
+        """
+        events = queue.Queue()
+
+        def work():
+            _listener.set(events.put)
+            try:
+                results = self.run(founder_text, index=index, vc_urls=vc_urls, founder_vector=founder_vector)
+                events.put({"type": "done", "results": results})
+            except Exception as e:
+                events.put({"type": "error", "error": e})
+
+        # The pipeline runs on its own thread so the caller can render each event as it arrives
+        threading.Thread(target=contextvars.copy_context().run, args=(work,), daemon=True,
+                         name="orchestrator-run").start()
+        while True:
+            event = events.get()
+            if event["type"] == "error":
+                raise event["error"]
+            yield event
+            if event["type"] == "done":
+                return
@@ -0,0 +1,124 @@
+# html_extract.py — Single-pass, DOM-free HTML text extraction shared by the scraper and enricher
+
+from html.parser import HTMLParser
+
+SKIP_TAGS = {"script", "style", "noscript"}
+CHUNK_SIZE = 16 * 1024
+
+
+class _StreamingExtractor(HTMLParser):
+    def __init__(self, max_text_chars=None, max_paragraphs=None, collect_links=True):
+        super().__init__(convert_charrefs=True)
+        self.max_text_chars = max_text_chars
+        self.max_paragraphs = max_paragraphs
+        self.collect_links = collect_links
+        self.strings = []
+        self.text_chars = 0
+        self.links = []
+        self.paragraphs = []
+        self._skip_depth = 0
+        self._node = []
+        self._paragraph = None
+        self.done = False
+
+    def _flush(self):
+        # One text node ends at every tag boundary; this mirrors BeautifulSoup's stripped_strings
+        if not self._node:
+            return
+        string = "".join(self._node).strip()
+        self._node = []
+        if not string:
+            return
+        if self._paragraph is not None:
+            self._paragraph.append(string)
+        if self.max_text_chars is None or self.text_chars < self.max_text_chars:
+            self.strings.append(string)
+            self.text_chars += len(string) + 1
+        self._check_done()
+
+    def _check_done(self):
+        text_full = self.max_text_chars is not None and self.text_chars >= self.max_text_chars
+        paragraphs_full = self.max_paragraphs is not None and len(self.paragraphs) >= self.max_paragraphs
+        # Links can appear anywhere, so we can only stop early when they are not wanted
+        if text_full and (self.max_paragraphs is None or paragraphs_full) and not self.collect_links:
+            self.done = True
+
+    def _close_paragraph(self):
+        if self._paragraph is not None:
+            if self.max_paragraphs is None or len(self.paragraphs) < self.max_paragraphs:
+                self.paragraphs.append("".join(self._paragraph))
+            self._paragraph = None
+            self._check_done()
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "a" and self.collect_links:
+            href = dict(attrs).get("href")
+            if href is not None:
+                self.links.append(href)
+        elif tag == "p":
+            # An unclosed <p> is implicitly closed by the next one
+            self._close_paragraph()
+            self._paragraph = []
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "p":
+            self._close_paragraph()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in SKIP_TAGS or tag == "p":
+            self.handle_endtag(tag)
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._node.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+
+def extract(html: str, max_text_chars=None, max_paragraphs=None, collect_links=True, max_bytes=None) -> dict:
+    """
+    Extract visible text, link targets and paragraph texts from HTML in one streaming pass.
+
+    The document is fed to a tree-less parser in chunks, so no DOM is ever built. Parsing
+    stops as soon as every requested budget is met, or once `max_bytes` characters of
+    markup have been consumed.
+
+    Args:
+        html (str): Raw HTML.
+        max_text_chars (int | None): Stop collecting visible text after this many characters.
+        max_paragraphs (int | None): Number of <p> texts to keep.
+        collect_links (bool): Whether to record <a href> values (raw, not joined to a base URL).
+        max_bytes (int | None): Hard cap on the amount of markup parsed.
+
+    Returns:
+        dict: {"text", "links", "paragraphs", "bytes_read"}.
+    """
+    parser = _StreamingExtractor(max_text_chars, max_paragraphs, collect_links)
+    limit = len(html or "") if max_bytes is None else min(len(html or ""), max_bytes)
+    read = 0
+    while read < limit and not parser.done:
+        chunk = html[read:min(read + CHUNK_SIZE, limit)]
+        parser.feed(chunk)
+        read += len(chunk)
+    if not parser.done:
+        parser.close()
+    parser._flush()
+    parser._close_paragraph()
+
+    text = " ".join(parser.strings)
+    if max_text_chars is not None:
+        text = text[:max_text_chars]
+    return {"text": text, "links": parser.links, "paragraphs": parser.paragraphs, "bytes_read": read}
+
+
+def extract_visible_text(html: str, max_chars=None) -> str:
+    """Visible page text (no script/style/noscript), whitespace-joined like BeautifulSoup's stripped_strings."""
+    return extract(html, max_text_chars=max_chars, collect_links=False)["text"]
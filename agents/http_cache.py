@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+
+from agents.cache_store import CacheStore
+from agents.instrumentation import record_cache, record_http
+from agents.utils import cache_dir, canonicalize_url
+
+
+class CachedResponse:
+    def __init__(self, url, status_code, text, headers=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.from_cache = from_cache
+
+
+class HTTPCache:
+    def __init__(self, path=None, ttl=24 * 3600, max_bytes=512 * 1024 * 1024):
+        """
+        On-disk page cache with ETag / Last-Modified revalidation.
+
+        Args:
+            path (str | None): SQLite file; defaults to <cache root>/http.sqlite.
+            ttl (float): Seconds a page is served without touching the network.
+            max_bytes (int): Size cap across all stored bodies (LRU eviction).
+        """
+        self.store = CacheStore(path or os.path.join(cache_dir(), "http.sqlite"), ttl=ttl, max_bytes=max_bytes)
+        self.revalidated = 0
+        self._lock = threading.Lock()
+
+    def get(self, session, url, headers=None, timeout=10, throttle=None):
+        """
+        Fetch `url` through `session` (a requests.Session or the requests module).
+
+        Fresh entries are returned without a request. Stale entries are revalidated with
+        a conditional GET and reused on 304. Only 200 responses are stored. `throttle`
+        (a HostThrottle) is only waited on when the network is actually used.
+        """
+        key = canonicalize_url(url)
+        entry = self.store.get_entry(key)
+
+        if entry is not None and self.store.is_fresh(entry):
+            self.store.record(True)
+            record_cache("http", True)
+            record_http(url, len(entry["value"]), from_cache=True)
+            return CachedResponse(url, 200, entry["value"].decode("utf-8"), entry["meta"], from_cache=True)
+        self.store.record(False)
+        record_cache("http", False)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry["meta"].get("etag"):
+                request_headers["If-None-Match"] = entry["meta"]["etag"]
+            if entry["meta"].get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["meta"]["last_modified"]
+
+        if throttle is not None:
+            throttle.wait(url)
+        response = session.get(url, timeout=timeout, headers=request_headers)
+        record_http(url, len(response.content or b""))
+
+        if response.status_code == 304 and entry is not None:
+            self.store.touch(key)
+            with self._lock:
+                self.revalidated += 1
+            logging.debug(f"♻️ Revalidated {url}")
+            return CachedResponse(url, 200, entry["value"].decode("utf-8"), entry["meta"], from_cache=True)
+
+        if response.status_code == 200:
+            # Only keep validators the server actually sent; a locally made-up date could
+            # make a server answer 304 for a page that changed after we fetched it.
+            meta = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            self.store.put(key, response.text.encode("utf-8"), meta)
+
+        return CachedResponse(url, response.status_code, response.text, dict(response.headers))
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "revalidated": self.revalidated}
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_http_cache() -> HTTPCache:
+    """Process-wide HTTPCache so every agent and Streamlit session shares one connection."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = HTTPCache()
+        return _shared_cache
@@ -0,0 +1,296 @@
+# instrumentation.py — Per-run traces and process-wide Prometheus metrics for the pipeline
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from agents.utils import cache_dir
+
+_current_trace = contextvars.ContextVar("vchunter_trace", default=None)
+
+_MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_mb():
+    """Current resident set size in MB (Linux /proc), or None where it can't be read cheaply."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * _PAGE_SIZE / _MB, 1)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# tracemalloc keeps one process-wide peak, so spans that overlap share it: every span start/end folds
+# the peak since the last fold into each open span, then resets it
+_memory_lock = threading.Lock()
+_open_spans = {}
+
+
+def _fold_traced_peak():
+    # Caller holds _memory_lock
+    current, peak = tracemalloc.get_traced_memory()
+    for entry in _open_spans.values():
+        entry[1] = max(entry[1], peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+class ProcessMetrics:
+    """Monotonic counters across every run in this process, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+
+    def inc(self, name, value=1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            items = sorted(self._counters.items())
+        lines, typed = [], set()
+        for (name, labels), value in items:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = ProcessMetrics()
+
+
+class RunTrace:
+    def __init__(self, name):
+        """
+        Everything measured during one pipeline run: agent/stage spans, HTTP bytes per host,
+        tokens per model, embedding batch sizes and cache lookups.
+
+        Args:
+            name (str): Run kind, e.g. "analysis" or "build_index".
+        """
+        self.run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self.name = name
+        self.started = time.time()
+        self.wall_seconds = None
+        self.spans = []
+        self.http = defaultdict(lambda: {"requests": 0, "bytes": 0, "cached": 0})
+        self.tokens = defaultdict(lambda: {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        self.embedding_batches = []
+        self.cache = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self.text_reduction = {"sites": 0, "input_tokens": 0, "kept_tokens": 0}
+        self._lock = threading.Lock()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            by_name = defaultdict(lambda: {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "errors": 0})
+            for span in self.spans:
+                agg = by_name[span["name"]]
+                agg["count"] += 1
+                agg["seconds"] = round(agg["seconds"] + span["seconds"], 3)
+                agg["max_seconds"] = max(agg["max_seconds"], span["seconds"])
+                agg["errors"] += span["error"] is not None
+                for field in ("rss_delta_mb", "traced_peak_delta_mb"):
+                    if span.get(field) is not None:
+                        agg[f"max_{field}"] = max(agg.get(f"max_{field}", span[field]), span[field])
+            cache = {
+                name: {**c, "hit_rate": round(c["hits"] / (c["hits"] + c["misses"]), 3) if c["hits"] + c["misses"] else 0.0}
+                for name, c in self.cache.items()
+            }
+            return {
+                "run_id": self.run_id,
+                "name": self.name,
+                "started": self.started,
+                "wall_seconds": self.wall_seconds,
+                "span_summary": dict(by_name),
+                "spans": list(self.spans),
+                "http": dict(self.http),
+                "tokens": dict(self.tokens),
+                "embedding_batches": list(self.embedding_batches),
+                "cache": cache,
+                "text_reduction": dict(self.text_reduction),
+            }
+
+    def save(self, directory=None) -> str:
+        directory = directory or cache_dir("traces")
+        path = os.path.join(directory, f"{self.run_id}.json")
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        return path
+
+
+@contextmanager
+def start_run(name):
+    """
+    Make a new RunTrace current for this context (and the pools that copy it) and yield it.
+
+    Set VCHUNTER_TRACE_MEMORY=1 (or run Python with -X tracemalloc) to also record each span's peak
+    traced memory; tracemalloc slows allocation-heavy runs about 3×, so it is off by default.
+    """
+    if os.getenv("VCHUNTER_TRACE_MEMORY") == "1" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    trace = RunTrace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.wall_seconds = round(time.time() - trace.started, 3)
+        _current_trace.reset(token)
+        METRICS.inc("vchunter_runs_total", run=name)
+        METRICS.inc("vchunter_run_seconds_total", trace.wall_seconds, run=name)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block (an agent call or a stage) and record it on the current trace, with the change in
+    RSS over the block and, while tracemalloc is tracing, the block's peak traced memory.
+    """
+    start = time.perf_counter()
+    rss_start = _rss_mb()
+    key = object()
+    traced = tracemalloc.is_tracing()
+    if traced:
+        with _memory_lock:
+            current = _fold_traced_peak()
+            _open_spans[key] = [current, current]
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = repr(e)
+        raise
+    finally:
+        seconds = round(time.perf_counter() - start, 4)
+        rss_end = _rss_mb()
+        memory = {"rss_mb": rss_end,
+                  "rss_delta_mb": round(rss_end - rss_start, 1) if rss_end is not None and rss_start is not None else None}
+        if traced:
+            with _memory_lock:
+                if tracemalloc.is_tracing():
+                    _fold_traced_peak()
+                traced_start, traced_peak = _open_spans.pop(key)
+            # Peak Python/NumPy heap while the block ran, and how far it rose above the level at its start
+            memory["traced_peak_mb"] = round(traced_peak / _MB, 1)
+            memory["traced_peak_delta_mb"] = round((traced_peak - traced_start) / _MB, 1)
+        METRICS.inc("vchunter_span_seconds_total", seconds, span=name)
+        METRICS.inc("vchunter_span_calls_total", span=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            with trace._lock:
+                trace.spans.append({"name": name, "seconds": seconds, **memory, "error": error, **attrs})
+
+
+def record_http(url, nbytes, from_cache=False):
+    host = urlparse(url).netloc.lower()
+    METRICS.inc("vchunter_http_bytes_total", 0 if from_cache else nbytes, host=host)
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            entry = trace.http[host]
+            entry["requests"] += 1
+            if from_cache:
+                entry["cached"] += 1
+            else:
+                entry["bytes"] += nbytes
+
+
+def record_tokens(model, prompt_tokens, completion_tokens=0):
+    METRICS.inc("vchunter_llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    METRICS.inc("vchunter_llm_tokens_total", completion_tokens, model=model, kind="completion")
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            entry = trace.tokens[model]
+            entry["calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+
+
+def record_embedding_batch(model, size, tokens=0):
+    METRICS.inc("vchunter_embedding_inputs_total", size, model=model)
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.embedding_batches.append({"model": model, "size": size, "tokens": tokens})
+
+
+def record_cache(name, hit, count=1):
+    if not count:
+        return
+    METRICS.inc("vchunter_cache_lookups_total", count, cache=name, result="hit" if hit else "miss")
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.cache[name]["hits" if hit else "misses"] += count
+
+
+def record_text_reduction(input_tokens, kept_tokens):
+    METRICS.inc("vchunter_text_reduction_tokens_total", input_tokens, kind="input")
+    METRICS.inc("vchunter_text_reduction_tokens_total", kept_tokens, kind="kept")
+    trace = _current_trace.get()
+    if trace is not None:
+        with trace._lock:
+            trace.text_reduction["sites"] += 1
+            trace.text_reduction["input_tokens"] += input_tokens
+            trace.text_reduction["kept_tokens"] += kept_tokens
+
+
+def usage_tokens(response):
+    """(prompt_tokens, completion_tokens) from an OpenAI response, zeros when usage is missing."""
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = METRICS.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_metrics_server = None
+_metrics_lock = threading.Lock()
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """
+    Serve /metrics in Prometheus text format from a daemon thread (once per process).
+
+    The metrics carry per-host crawl and token counts, so they are only served on loopback
+    unless `host` (e.g. "0.0.0.0") is passed explicitly.
+    """
+    global _metrics_server
+    with _metrics_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True, name="metrics").start()
+            logging.info(f"📡 Prometheus metrics on http://{host}:{port}/metrics")
+        return _metrics_server
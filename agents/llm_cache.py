@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from agents.cache_store import CacheStore
+from agents.instrumentation import record_cache, record_tokens, usage_tokens
+from agents.utils import cache_dir
+
+
+class CompletionCache:
+    def __init__(self, path=None, ttl=30 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+        """
+        Persistent chat-completion cache keyed on a hash of (model, messages, temperature).
+
+        Args:
+            path (str | None): SQLite file; defaults to <cache root>/completions.sqlite.
+            ttl (float): Seconds a completion is reused.
+            max_bytes (int): Size cap across all stored completions (LRU eviction).
+        """
+        self.store = CacheStore(path or os.path.join(cache_dir(), "completions.sqlite"), ttl=ttl, max_bytes=max_bytes)
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model, messages, temperature=None) -> str:
+        payload = json.dumps({"model": model, "messages": messages, "temperature": temperature}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, model, messages, temperature=None):
+        """The cached completion text for this request, or None on a miss (counted either way)."""
+        entry = self.store.get_entry(self.key(model, messages, temperature))
+        if entry is not None and self.store.is_fresh(entry):
+            self.store.record(True)
+            with self._lock:
+                self.saved_seconds += entry["meta"].get("latency", 0.0)
+            record_cache("completion", True)
+            return entry["value"].decode("utf-8")
+        self.store.record(False)
+        record_cache("completion", False)
+        return None
+
+    def save(self, model, messages, text, latency=0.0, temperature=None):
+        """Store a completion obtained elsewhere (e.g. one entry of a packed request); empty texts are skipped."""
+        if text:
+            self.store.put(self.key(model, messages, temperature), text.encode("utf-8"),
+                           {"model": model, "latency": round(latency, 3)})
+
+    def complete(self, client, model, messages, temperature=None) -> str:
+        """
+        Return the stripped completion text, calling `client.chat.completions.create` only on a miss.
+        API errors propagate to the caller, and empty replies are never cached.
+        """
+        cached = self.lookup(model, messages, temperature)
+        if cached is not None:
+            return cached
+
+        kwargs = {"temperature": temperature} if temperature is not None else {}
+        start = time.perf_counter()
+        response = client.chat.completions.create(model=model, messages=messages, **kwargs)
+        latency = time.perf_counter() - start
+        record_tokens(model, *usage_tokens(response))
+        text = response.choices[0].message.content.strip()
+
+        self.save(model, messages, text, latency, temperature)
+        logging.debug(f"🤖 {model} completion took {latency:.1f}s")
+        return text
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "saved_seconds": round(self.saved_seconds, 1)}
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    """Process-wide CompletionCache shared by every agent that talks to the chat API."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = CompletionCache()
+        return _shared_cache
@@ -1,86 +1,531 @@
-from openai import OpenAI
+import contextvars
+import itertools
+import json
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
 import logging
+from agents.embedding_store import EmbeddingStore
+from agents.instrumentation import record_cache, record_embedding_batch, record_tokens, span, usage_tokens
+from agents.llm_cache import get_completion_cache
+from agents.openai_gateway import get_gateway
+from agents.utils import chunk_text, estimate_tokens, truncate_to_tokens
+from agents.vector_index import VectorIndex, _normalize, _top_k
 
 class LLMSummarizerAgent:
-    def __init__(self, api_key):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key, cache=None, client=None, model="gpt-4", vc_model=None, pack_size=1,
+                 pack_tokens=12_000, pack_wait=0.5, max_workers=16):
+        """
+        Args:
+            api_key (str): OpenAI API key.
+            cache (CompletionCache | None): Completion cache; the process-wide one by default.
+            client: OpenAI-compatible client; the shared gateway by default.
+            model (str): Model for founder summaries, and for VC summaries unless `vc_model` is set.
+            vc_model (str | None): Model tier for bulk VC summaries (e.g. a faster, cheaper model).
+            pack_size (int): VCs summarized per request. Above 1, VCs are packed into one request
+                whose reply is a JSON object keyed by VC URL (structured output, so `vc_model` must
+                support json_schema response formats); entries that fail validation are retried alone.
+            pack_tokens (int): Prompt-token budget of one packed request.
+            pack_wait (float): Seconds a partly filled pack waits for more VCs before it is sent.
+            max_workers (int): VC summarization requests in flight at the same time.
+        """
+        self.client = client or get_gateway(api_key)
+        self.cache = cache or get_completion_cache()
+        self.model = model
+        self.vc_model = vc_model or model
+        self.pack_size = pack_size
+        self.pack_tokens = pack_tokens
+        self.pack_wait = pack_wait
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vc-summarize")
+        self._pending, self._pending_tokens, self._timer = [], 0, None
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._counts = Counter()
 
-    def summarize(self, site_text, portfolio_text):
+    @staticmethod
+    def _vc_messages(site_text, portfolio_text):
+        content = f"Summarize the VC firm based on their website:\n\n{site_text[:3000]}\n\nPortfolio:\n{portfolio_text[:3000]}"
+        return [{"role": "user", "content": content}]
+
+    def _count(self, **values):
+        with self._lock:
+            self._counts.update(values)
+
+    def _summarize_one(self, key, site_text, portfolio_text):
+        """One request for one VC (cache already checked); "" on failure."""
+        messages = self._vc_messages(site_text, portfolio_text)
         try:
-            content = f"Summarize the VC firm based on their website:\n\n{site_text[:3000]}\n\nPortfolio:\n{portfolio_text[:3000]}"
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": content}]
-            )
-            return response.choices[0].message.content.strip()
+            with span("summarize", vc=key, vcs=1):
+                start = time.perf_counter()
+                response = self.client.chat.completions.create(model=self.vc_model, messages=messages)
+                latency = time.perf_counter() - start
+            prompt, completion = usage_tokens(response)
+            record_tokens(self.vc_model, prompt, completion)
+            summary = response.choices[0].message.content.strip()
+            self._count(requests=1, vcs=1, prompt_tokens=prompt, completion_tokens=completion)
+            self.cache.save(self.vc_model, messages, summary, latency)
+            return summary
         except Exception as e:
             logging.error(f"Summarization failed: {e}")
             return ""
 
+    def _summarize_pack(self, entries):
+        """
+        Summarize (key, site_text, portfolio_text) entries in one request.
+
+        Returns:
+            dict: {key: summary} for the entries the reply covered with a non-empty string; the rest
+            are left to the caller to retry alone.
+        """
+        firms = "\n\n".join(f"VC: {key}\nWebsite:\n{site_text[:3000]}\nPortfolio:\n{portfolio_text[:3000]}"
+                             for key, site_text, portfolio_text in entries)
+        content = ("Summarize each VC firm below based on its website and portfolio. Reply with a JSON object "
+                   "mapping every firm's URL, exactly as written after \"VC:\", to its summary.\n\n" + firms)
+        schema = {"type": "object", "properties": {key: {"type": "string"} for key, _, _ in entries},
+                  "required": [key for key, _, _ in entries], "additionalProperties": False}
+        try:
+            with span("summarize", vcs=len(entries)):
+                start = time.perf_counter()
+                response = self.client.chat.completions.create(
+                    model=self.vc_model, messages=[{"role": "user", "content": content}],
+                    response_format={"type": "json_schema",
+                                     "json_schema": {"name": "vc_summaries", "strict": True, "schema": schema}},
+                )
+                latency = time.perf_counter() - start
+            prompt, completion = usage_tokens(response)
+            record_tokens(self.vc_model, prompt, completion)
+            self._count(requests=1, packed_requests=1, prompt_tokens=prompt, completion_tokens=completion)
+            reply = json.loads(response.choices[0].message.content or "{}")
+        except Exception as e:
+            logging.error(f"Packed summarization of {len(entries)} VCs failed: {e}")
+            return {}
+
+        summaries = {}
+        for key, site_text, portfolio_text in entries:
+            summary = reply.get(key) if isinstance(reply, dict) else None
+            if isinstance(summary, str) and summary.strip():
+                summaries[key] = summary.strip()
+                # Cached under the single-VC request, so either path reuses it
+                self.cache.save(self.vc_model, self._vc_messages(site_text, portfolio_text), summaries[key],
+                                latency / len(entries))
+        self._count(vcs=len(summaries))
+        if len(summaries) < len(entries):
+            logging.warning(f"⚠️ Packed reply covered {len(summaries)}/{len(entries)} VCs; retrying the rest alone")
+        return summaries
+
+    def _run(self, context, fn, *args):
+        # Each task runs in a copy of its submitter's context, so spans and token counts land on that run's trace
+        return self._executor.submit(context.copy().run, fn, *args)
+
+    def _take_pending(self):
+        # Caller holds self._lock
+        pack, self._pending, self._pending_tokens = self._pending, [], 0
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return pack
+
+    def _flush_pending(self):
+        with self._lock:
+            pack = self._take_pending()
+        if pack:
+            self._run(pack[0][4], self._dispatch, pack)
+
+    def _dispatch(self, pack):
+        summaries = {}
+        try:
+            if len(pack) > 1:
+                summaries = self._summarize_pack([entry[:3] for entry in pack])
+        finally:
+            # Entries the packed reply missed (or a pack of one) go out as single requests
+            for key, site_text, portfolio_text, future, context in pack:
+                if key in summaries:
+                    future.set_result(summaries[key])
+                else:
+                    self._count(fallbacks=int(len(pack) > 1))
+                    self._run(context, self._summarize_one, key, site_text, portfolio_text).add_done_callback(
+                        lambda done, future=future: future.set_result(done.result()))
+
+    def submit(self, site_text, portfolio_text, url=None) -> Future:
+        """
+        Queue one VC for summarization without waiting for it.
+
+        With `pack_size` > 1 the VC joins the pack being filled, which is sent once it holds
+        `pack_size` VCs or `pack_tokens` prompt tokens, or `pack_wait` seconds after its first VC.
+
+        Returns:
+            Future: Resolves to the summary, or "" when summarization failed.
+        """
+        context = contextvars.copy_context()
+        cached = self.cache.lookup(self.vc_model, self._vc_messages(site_text, portfolio_text))
+        if cached is not None:
+            self._count(cached=1)
+            future = Future()
+            future.set_result(cached)
+            return future
+        key = url or f"vc-{next(self._ids)}"
+        if self.pack_size <= 1:
+            return self._run(context, self._summarize_one, key, site_text, portfolio_text)
+
+        tokens = estimate_tokens(site_text[:3000]) + estimate_tokens(portfolio_text[:3000])
+        future, ready = Future(), []
+        with self._lock:
+            if self._pending and (self._pending_tokens + tokens > self.pack_tokens
+                                  or any(entry[0] == key for entry in self._pending)):
+                ready.append(self._take_pending())
+            self._pending.append((key, site_text, portfolio_text, future, context))
+            self._pending_tokens += tokens
+            if len(self._pending) >= self.pack_size:
+                ready.append(self._take_pending())
+            elif self._timer is None:
+                self._timer = threading.Timer(self.pack_wait, self._flush_pending)
+                self._timer.daemon = True
+                self._timer.start()
+        for pack in ready:
+            self._run(pack[0][4], self._dispatch, pack)
+        return future
+
+    def summarize(self, site_text, portfolio_text, url=None):
+        try:
+            return self.submit(site_text, portfolio_text, url=url).result()
+        except Exception as e:
+            logging.error(f"Summarization failed: {e}")
+            return ""
+
+    def summarize_many(self, vcs):
+        """
+        Summarize many VCs whose text is already at hand: packs of `pack_size` (or one request per
+        VC when it is 1), with the last partial pack sent at once instead of after `pack_wait`.
+
+        Args:
+            vcs (dict): {VC URL: (site_text, portfolio_text)}.
+
+        Returns:
+            dict: {VC URL: summary}, "" where summarization failed.
+        """
+        futures = {url: self.submit(site_text, portfolio_text, url=url) for url, (site_text, portfolio_text) in vcs.items()}
+        self._flush_pending()
+        return {url: future.result() for url, future in futures.items()}
+
+    def stats(self) -> dict:
+        """VC summarization counters; tokens_per_vc covers VCs summarized by the API (not cache hits)."""
+        with self._lock:
+            counts = dict(self._counts)
+        tokens = counts.get("prompt_tokens", 0) + counts.get("completion_tokens", 0)
+        return {**counts, "tokens_per_vc": round(tokens / counts["vcs"], 1) if counts.get("vcs") else None}
+
     def summarize_founder(self, text):
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": f"Summarize this founder's idea:\n\n{text[:4000]}"}]
+            return self.cache.complete(
+                self.client, self.model, [{"role": "user", "content": f"Summarize this founder's idea:\n\n{text[:4000]}"}]
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
             logging.error(f"Founder summarization failed: {e}")
             return ""
 
 
 class EmbedderAgent:
-    def __init__(self, api_key):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key, model="text-embedding-ada-002", store=None,
+                 max_batch_tokens=100_000, max_batch_size=2048, max_input_tokens=8000, client=None):
+        self.client = client or get_gateway(api_key)
+        self.model = model
+        self.store = store or EmbeddingStore(model=model)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_input_tokens = max_input_tokens
+
+    def _batches(self, texts):
+        batch, batch_tokens = [], 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if batch and (batch_tokens + tokens > self.max_batch_tokens or len(batch) >= self.max_batch_size):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            yield batch
 
     def embed(self, texts):
+        """
+        Embed `texts` and return an (n, dim) float32 array in input order.
+
+        Inputs are truncated to the model's token limit, deduplicated, looked up in the
+        persistent store, and only the misses are sent in token-budgeted batches.
+        Returns an empty array if any batch fails.
+        """
         try:
-            if not texts:
-                return []
-            response = self.client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=texts
-            )
-            return [e.embedding for e in response.data]
+            if len(texts) == 0:
+                return np.empty((0, 0), dtype=np.float32)
+            texts = [truncate_to_tokens(t or " ", self.max_input_tokens) for t in texts]
+            keys = [self.store.key(t) for t in texts]
+            unique = dict(zip(keys, texts))
+            found = self.store.get(unique.keys())
+            missing = [k for k in unique if k not in found]
+            record_cache("embedding", True, len(found))
+            record_cache("embedding", False, len(missing))
+
+            if missing:
+                new_vectors = []
+                for batch in self._batches([unique[k] for k in missing]):
+                    response = self.client.embeddings.create(model=self.model, input=batch)
+                    new_vectors.extend(e.embedding for e in response.data)
+                    record_embedding_batch(self.model, len(batch), usage_tokens(response)[0])
+                    logging.info(f"🔢 Embedded batch of {len(batch)} texts")
+                new_vectors = np.asarray(new_vectors, dtype=np.float32)
+                self.store.add(missing, new_vectors)
+                found.update(zip(missing, new_vectors))
+
+            logging.info(f"🔢 Embeddings: {len(texts)} requested, {len(unique)} unique, {len(missing)} fetched")
+            return np.stack([found[k] for k in keys]).astype(np.float32)
         except Exception as e:
             logging.error(f"Embedding failed: {e}")
-            return []
+            return np.empty((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts, chunk_tokens=500, pooling="mean", max_chunks=256, temperature=0.05):
+        """
+        One vector per whole document, without summarizing it first.
+
+        Every document is split into chunks of about `chunk_tokens` tokens; the chunks of all
+        documents go through `embed` together (so through as few batched API calls as the token
+        budget allows) and each document's chunk vectors are pooled into one unit vector.
+
+        Args:
+            texts (list of str): Documents.
+            chunk_tokens (int): Tokens per chunk.
+            pooling (str): "mean" weights chunks by length; "attention" additionally softmax-weights
+                them by similarity to the document's mean, so off-topic chunks (boilerplate, legal
+                text, appendices) count for less.
+            max_chunks (int): Chunks embedded per document (its first ones).
+            temperature (float): Softmax temperature for attention pooling.
+
+        Returns:
+            np.ndarray: (n, dim) float32 array in input order; empty if embedding fails.
+        """
+        if pooling not in ("mean", "attention"):
+            raise ValueError(f"Unknown pooling {pooling!r}")
+        chunked = [(chunk_text(text, chunk_tokens) or [text or " "])[:max_chunks] for text in texts]
+        vectors = self.embed([chunk for chunks in chunked for chunk in chunks])
+        if len(vectors) == 0:
+            return vectors
+
+        pooled, start = [], 0
+        for chunks in chunked:
+            unit = _normalize(vectors[start:start + len(chunks)])
+            start += len(chunks)
+            weights = np.array([len(c) for c in chunks], dtype=np.float32)
+            if pooling == "attention" and len(chunks) > 1:
+                centroid = _normalize(weights @ unit)[0]
+                scores = (unit @ centroid) / temperature
+                weights = weights * np.exp(scores - scores.max())
+            pooled.append(_normalize(weights @ unit)[0])
+        logging.info(f"🧩 Embedded {len(texts)} document(s) as {start} chunks ({pooling} pooling)")
+        return np.stack(pooled).astype(np.float32)
 
 
 class FounderMatchAgent:
-    def match(self, founder_vec, vc_vecs, vc_names, cluster_map):
+    def __init__(self, top_k=None):
+        self.top_k = top_k
+
+    def match(self, founder_vec, vc_vecs, vc_names, cluster_map, index=None):
+        """Rank VCs by cosine similarity. Queries `index` (a VectorIndex) when given, else an exact index over vc_vecs."""
         try:
-            scores = cosine_similarity([founder_vec], vc_vecs)[0]
-            ranked = sorted(zip(vc_names, scores), key=lambda x: x[1], reverse=True)
+            if index is None:
+                index = VectorIndex.build(vc_names, vc_vecs)
+            ranked = index.search(founder_vec, k=self.top_k)
             return [{"vc": name, "score": round(score, 3), "cluster": cluster_map.get(name, "N/A")} for name, score in ranked]
         except Exception as e:
             logging.error(f"Founder matching failed: {e}")
             return []
 
+    def match_batch(self, founder_vecs, vc_vecs, vc_names, cluster_map):
+        """Rank VCs for many founders from one founders × VCs score matrix; one list per founder, in input order."""
+        try:
+            index = VectorIndex.build(vc_names, vc_vecs)
+            return [
+                [{"vc": name, "score": round(score, 3), "cluster": cluster_map.get(name, "N/A")} for name, score in ranked]
+                for ranked in index.search_batch(founder_vecs, k=self.top_k)
+            ]
+        except Exception as e:
+            logging.error(f"Batch founder matching failed: {e}")
+            return [[] for _ in range(len(founder_vecs))]
+
 
 class ChatbotAgent:
-    def __init__(self, api_key):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, api_key, cache=None, client=None, embedder=None, top_k_vcs=5, top_k_clusters=2,
+                 context_token_budget=2000, summary_tokens=250, history_turns=4, max_sessions=256):
+        """
+        Answers questions about the founder and the VC landscape from retrieved context.
+
+        Each question is embedded and matched against the VC index: the closest VC summaries and
+        cluster descriptions (plus what earlier turns of the same session retrieved) go into the
+        prompt within `context_token_budget`, so prompt size does not grow with the universe.
+
+        Args:
+            api_key (str): OpenAI API key.
+            cache (CompletionCache): Completion cache for `create`.
+            client (OpenAIGateway): Shared client; the process-wide gateway for `api_key` when omitted.
+            embedder (EmbedderAgent): Embeds questions with the index's embedding model.
+            top_k_vcs (int): VC summaries retrieved per question.
+            top_k_clusters (int): Cluster descriptions retrieved per question.
+            context_token_budget (int): Tokens of VC and cluster context per prompt.
+            summary_tokens (int): Tokens kept of each VC summary.
+            history_turns (int): Previous question/answer pairs replayed to the model.
+            max_sessions (int): Conversations kept in memory (least recently used dropped).
+        """
+        self.client = client or get_gateway(api_key)
+        self.cache = cache or get_completion_cache()
+        self.embedder = embedder or EmbedderAgent(api_key=api_key, client=self.client)
+        self.top_k_vcs = top_k_vcs
+        self.top_k_clusters = top_k_clusters
+        self.context_token_budget = context_token_budget
+        self.summary_tokens = summary_tokens
+        self.history_turns = history_turns
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._centroids = {}
+        self._lock = threading.Lock()
 
     def create(self, vc_summaries, founder_summary):
         try:
             content = f"Here are VC summaries:\n{vc_summaries}\n\nAnd the founder summary:\n{founder_summary}"
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": content}]
-            )
-            return response.choices[0].message.content.strip()
+            return self.cache.complete(self.client, "gpt-4", [{"role": "user", "content": content}])
         except Exception as e:
             logging.error(f"Chatbot generation failed: {e}")
             return "Chatbot could not generate a response."
 
+    def _session(self, session_id, index_version):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session["index_version"] != index_version:
+                session = {"index_version": index_version, "history": [], "vcs": [], "clusters": []}
+                self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
+
+    def _cluster_centroids(self, index):
+        """(cluster ids, unit centroid matrix) of an index's clusters, computed once per index version."""
+        with self._lock:
+            cached = self._centroids.get(index.version)
+        if cached is not None:
+            return cached
+
+        rows = {name: i for i, name in enumerate(index.vc_names)}
+        ids, centroids = [], []
+        for cluster in index.clusters:
+            members = [rows[m] for m in cluster["members"] if m in rows]
+            if members:
+                ids.append(cluster["cluster_id"])
+                centroids.append(np.asarray(index.embeddings, dtype=np.float32)[members].mean(axis=0))
+        result = (ids, _normalize(centroids) if centroids else None)
+        with self._lock:
+            # Sessions on an older index version may still be open, so keep a few versions around
+            self._centroids[index.version] = result
+            while len(self._centroids) > 4:
+                self._centroids.pop(next(iter(self._centroids)))
+        return result
+
+    def retrieve(self, question, index, session=None):
+        """VC names and cluster IDs most relevant to `question`, with the session's earlier picks after them."""
+        vecs = self.embedder.embed([question])
+        if len(vecs) == 0:
+            raise ValueError("Question embedding failed.")
+        vcs = [name for name, _ in index.vc_vector_index.search(vecs[0], k=self.top_k_vcs)]
+
+        cluster_ids, centroids = self._cluster_centroids(index)
+        clusters = []
+        if centroids is not None:
+            clusters = [cluster_ids[i] for i in _top_k(centroids @ _normalize(vecs)[0], self.top_k_clusters)]
+
+        if session is not None:
+            # Follow-ups ("and the second one?") keep what earlier turns looked at
+            vcs = list(dict.fromkeys(vcs + session["vcs"]))[:2 * self.top_k_vcs]
+            clusters = list(dict.fromkeys(clusters + session["clusters"]))[:2 * self.top_k_clusters]
+        return vcs, clusters
+
+    def _messages(self, question, index, founder_summary, vcs, clusters, history):
+        by_id = {c["cluster_id"]: c for c in index.clusters}
+        blocks, tokens = [], 0
+        lines = [f"- Cluster {cid} ({len(by_id[cid]['members'])} firms): {by_id[cid]['description']}"
+                 for cid in clusters if cid in by_id]
+        lines += [f"- {vc}: {truncate_to_tokens(index.summaries[vc], self.summary_tokens)}"
+                  for vc in vcs if vc in index.summaries]
+        for line in lines:
+            line_tokens = estimate_tokens(line)
+            if tokens + line_tokens > self.context_token_budget:
+                break
+            blocks.append(line)
+            tokens += line_tokens
+
+        system = (
+            "You are VC Hunter's analyst. Answer the founder's question using the founder summary and the "
+            "VC context below; say so when the context does not cover it.\n\n"
+            f"Founder summary:\n{truncate_to_tokens(founder_summary or 'Not available.', 600)}\n\n"
+            "Relevant VC clusters and firms:\n" + ("\n".join(blocks) or "None retrieved.")
+        )
+        messages = [{"role": "system", "content": system}]
+        for past_question, past_answer in history[-self.history_turns:]:
+            messages.append({"role": "user", "content": past_question})
+            messages.append({"role": "assistant", "content": truncate_to_tokens(past_answer, 300)})
+        messages.append({"role": "user", "content": question})
+        return messages
+
+    def stream(self, question, index, founder_summary="", session_id=None):
+        """
+        Yield the answer to `question` as it is generated.
+
+        Args:
+            question (str): The user's question.
+            index (VCIndex): The VC index the analysis ran against.
+            founder_summary (str): Summary of the founder's documents.
+            session_id (str | None): Conversation key; follow-ups in a session reuse its history and context.
+        """
+        session = self._session(session_id, index.version) if session_id is not None else None
+        answer = []
+        try:
+            vcs, clusters = self.retrieve(question, index, session)
+            history = session["history"] if session is not None else []
+            messages = self._messages(question, index, founder_summary, vcs, clusters, history)
+            for token in self.client.stream_chat("gpt-4", messages):
+                answer.append(token)
+                yield token
+        except Exception as e:
+            logging.error(f"Chatbot generation failed: {e}")
+            if not answer:
+                yield "Chatbot could not generate a response."
+            return
+
+        if session is not None:
+            with self._lock:
+                session["history"].append((question, "".join(answer)))
+                del session["history"][:-self.history_turns]
+                session["vcs"], session["clusters"] = vcs, clusters
+
+    def ask(self, question, index, founder_summary="", session_id=None) -> str:
+        """`stream`, collected into one string."""
+        return "".join(self.stream(question, index, founder_summary, session_id))
+
 
 class GapAnalysisAgent:
     def detect(self, founder_vec, embeddings, cluster_ids):
         try:
-            similarities = cosine_similarity([founder_vec], embeddings)[0]
-            return [{"cluster": cid, "similarity": round(similarities[i], 3)} for i, cid in enumerate(cluster_ids)]
+            similarities = cosine_similarity(np.reshape(founder_vec, (1, -1)), embeddings)[0]
+            return [{"cluster": cid, "similarity": round(float(similarities[i]), 3)} for i, cid in enumerate(cluster_ids)]
         except Exception as e:
             logging.error(f"Gap detection failed: {e}")
             return []
+
+    def detect_batch(self, founder_vecs, embeddings, cluster_ids):
+        """`detect` for many founders with a single cosine_similarity call; one list per founder."""
+        try:
+            similarities = cosine_similarity(np.asarray(founder_vecs), embeddings)
+            return [[{"cluster": cid, "similarity": round(float(row[i]), 3)} for i, cid in enumerate(cluster_ids)]
+                    for row in similarities]
+        except Exception as e:
+            logging.error(f"Batch gap detection failed: {e}")
+            return [[] for _ in range(len(founder_vecs))]
@@ -0,0 +1,323 @@
+# openai_gateway.py — One rate-limited, retrying, coalescing OpenAI client shared by every agent
+
+import asyncio
+import hashlib
+import json
+import logging
+import queue
+import random
+import threading
+import time
+
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
+
+from agents.instrumentation import METRICS, record_tokens, usage_tokens
+from agents.utils import estimate_tokens
+
+# Requests and tokens per minute, per model. Set these to your account's tier; None disables a limit.
+DEFAULT_LIMITS = {
+    "gpt-4": {"rpm": 500, "tpm": 300_000},
+    "gpt-4o-mini": {"rpm": 500, "tpm": 200_000},
+    "text-embedding-ada-002": {"rpm": 3000, "tpm": 1_000_000},
+}
+FALLBACK_LIMIT = {"rpm": 500, "tpm": 200_000}
+
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        """
+        Refills continuously at `per_minute` / 60 units per second up to a one-minute burst.
+        Only touched from the gateway's event loop, so it needs no lock.
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount) -> float:
+        """Take `amount` units, sleeping until they are available; returns the seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return waited
+            delay = (amount - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+    def adjust(self, delta):
+        """Charge (or refund) the difference between an estimate and the actual usage; may go negative."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class _Completions:
+    def __init__(self, gateway):
+        self._gateway = gateway
+
+    def create(self, model, messages, **kwargs):
+        return self._gateway.call("chat", model, messages=messages, **kwargs)
+
+
+class _Chat:
+    def __init__(self, gateway):
+        self.completions = _Completions(gateway)
+
+
+class _Embeddings:
+    def __init__(self, gateway):
+        self._gateway = gateway
+
+    def create(self, model, input, **kwargs):
+        return self._gateway.call("embeddings", model, input=input, **kwargs)
+
+
+class OpenAIGateway:
+    def __init__(self, api_key, base_url=None, limits=None, max_concurrency=64, max_retries=6,
+                 base_delay=0.5, max_delay=30.0, timeout=120.0):
+        """
+        The single path from the agents to the OpenAI API.
+
+        Calls run on one AsyncOpenAI client (a pooled HTTP connection set) driven by a background
+        event loop, behind per-model token buckets for requests and tokens. 429, 5xx and connection
+        errors are retried with exponential backoff and full jitter (honouring Retry-After), and
+        identical requests already in flight share one API call.
+
+        Exposes `chat.completions.create` and `embeddings.create` with the synchronous OpenAI
+        signatures, so agents take it wherever they took an `OpenAI` client, plus `stream_chat`
+        for token-by-token replies.
+
+        Args:
+            api_key (str): OpenAI API key.
+            base_url (str | None): Alternative OpenAI-compatible endpoint.
+            limits (dict | None): {model: {"rpm": int | None, "tpm": int | None}} checked before
+                DEFAULT_LIMITS; a "*" entry applies to every model not listed (so
+                {"*": {"rpm": None, "tpm": None}} disables limiting). Other models use FALLBACK_LIMIT.
+            max_concurrency (int): Requests open at the same time on the client's connection pool.
+            max_retries (int): Retries per request after the first attempt.
+            base_delay (float): Backoff ceiling of the first retry in seconds; doubles per attempt.
+            max_delay (float): Upper bound of a single backoff.
+            timeout (float): Per-request timeout in seconds.
+        """
+        self.limits = limits or {}
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Retries are ours (shared backoff and rate limits), not the client's
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout)
+        self.chat = _Chat(self)
+        self.embeddings = _Embeddings(self)
+
+        self._buckets = {}
+        self._inflight = {}
+        self._counts = {"requests": 0, "retries": 0, "coalesced": 0, "failures": 0, "throttled_seconds": 0.0}
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="openai-gateway", daemon=True)
+        self._thread.start()
+
+    def _limit(self, model):
+        for table, name in ((self.limits, model), (self.limits, "*"), (DEFAULT_LIMITS, model)):
+            if name in table:
+                return table[name]
+        return FALLBACK_LIMIT
+
+    def _model_buckets(self, model):
+        if model not in self._buckets:
+            limit = self._limit(model)
+            self._buckets[model] = tuple(TokenBucket(limit[k]) if limit.get(k) else None for k in ("rpm", "tpm"))
+        return self._buckets[model]
+
+    @staticmethod
+    def _estimate(kind, payload) -> int:
+        if kind == "chat":
+            prompt = sum(estimate_tokens(str(m.get("content") or "")) for m in payload["messages"])
+            return prompt + (payload.get("max_tokens") or 512)
+        inputs = payload["input"]
+        return sum(estimate_tokens(t) for t in ([inputs] if isinstance(inputs, str) else inputs))
+
+    def _retry_delay(self, error, attempt):
+        """Seconds to wait before retrying `error`, or None when it is not worth retrying."""
+        if attempt >= self.max_retries:
+            return None
+        retry_after = 0.0
+        if isinstance(error, APIStatusError):
+            if error.status_code == 429:
+                if getattr(error, "code", None) == "insufficient_quota":
+                    return None
+            elif error.status_code < 500:
+                return None
+            try:
+                retry_after = float(error.response.headers.get("retry-after", 0))
+            except (TypeError, ValueError):
+                retry_after = 0.0
+        elif not isinstance(error, APIConnectionError):  # includes APITimeoutError
+            return None
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return min(self.max_delay, max(backoff, retry_after))
+
+    async def _throttle(self, model, estimate):
+        requests_bucket, tokens_bucket = self._model_buckets(model)
+        waited = 0.0
+        if requests_bucket:
+            waited += await requests_bucket.acquire(1)
+        if tokens_bucket:
+            waited += await tokens_bucket.acquire(estimate)
+        if waited:
+            self._counts["throttled_seconds"] += waited
+            METRICS.inc("vchunter_openai_throttled_seconds_total", waited, model=model)
+
+    def _settle(self, model, estimate, prompt, completion):
+        tokens_bucket = self._model_buckets(model)[1]
+        if tokens_bucket and (prompt or completion):
+            tokens_bucket.adjust(prompt + completion - estimate)
+
+    def _failed(self, model, kind):
+        self._counts["failures"] += 1
+        METRICS.inc("vchunter_openai_failures_total", model=model, kind=kind)
+
+    async def _backoff(self, model, kind, error, attempt, delay):
+        self._counts["retries"] += 1
+        METRICS.inc("vchunter_openai_retries_total", model=model, kind=kind)
+        logging.warning(f"🔁 {model} {kind} failed ({type(error).__name__}: {error}); "
+                        f"retry {attempt}/{self.max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def _send(self, kind, model, payload):
+        estimate = self._estimate(kind, payload)
+        create = self.client.chat.completions.create if kind == "chat" else self.client.embeddings.create
+
+        attempt = 0
+        while True:
+            await self._throttle(model, estimate)
+            async with self._semaphore:
+                self._counts["requests"] += 1
+                METRICS.inc("vchunter_openai_requests_total", model=model, kind=kind)
+                try:
+                    response = await create(model=model, **payload)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        self._failed(model, kind)
+                        raise
+                    error = e
+                else:
+                    error = None
+
+            if error is None:
+                self._settle(model, estimate, *usage_tokens(response))
+                return response
+
+            attempt += 1
+            await self._backoff(model, kind, error, attempt, delay)
+
+    async def _stream(self, model, payload, out):
+        """Push ("token", text) items, then ("done", (prompt, completion)) or ("error", exc), onto `out`."""
+        estimate = self._estimate("chat", payload)
+        attempt, usage = 0, (0, 0)
+        while True:
+            await self._throttle(model, estimate)
+            started = False
+            try:
+                async with self._semaphore:
+                    self._counts["requests"] += 1
+                    METRICS.inc("vchunter_openai_requests_total", model=model, kind="stream")
+                    stream = await self.client.chat.completions.create(
+                        model=model, stream=True, stream_options={"include_usage": True}, **payload)
+                    async with stream:  # closes the connection on cancellation too
+                        async for chunk in stream:
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                started = True
+                                out.put(("token", chunk.choices[0].delta.content))
+                            if getattr(chunk, "usage", None):
+                                usage = usage_tokens(chunk)
+                self._settle(model, estimate, *usage)
+                out.put(("done", usage))
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Once tokens have reached the caller a retry would repeat them, so only a cold stream is retried
+                delay = None if started else self._retry_delay(e, attempt)
+                if delay is None:
+                    self._failed(model, "stream")
+                    out.put(("error", e))
+                    return
+                attempt += 1
+                await self._backoff(model, "stream", e, attempt, delay)
+
+    async def request(self, kind, model, payload):
+        """Coroutine for the gateway loop: identical concurrent requests await the same API call."""
+        key = hashlib.sha256(json.dumps([kind, model, payload], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counts["coalesced"] += 1
+            METRICS.inc("vchunter_openai_coalesced_total", model=model, kind=kind)
+        else:
+            task = self._inflight[key] = self._loop.create_task(self._send(kind, model, payload))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one caller's cancellation doesn't cancel the call the others wait on
+        return await asyncio.shield(task)
+
+    def call(self, kind, model, **payload):
+        """Blocking call from any thread except the gateway loop's own; API errors propagate after retries."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("OpenAIGateway.call() would deadlock on the gateway loop; await request() instead")
+        return asyncio.run_coroutine_threadsafe(self.request(kind, model, payload), self._loop).result()
+
+    async def acall(self, kind, model, **payload):
+        """`call` for coroutines running on another event loop."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.request(kind, model, payload), self._loop))
+
+    def stream_chat(self, model, messages, **kwargs):
+        """
+        Yield a chat completion's text as it is generated, under the same limits and retries as
+        `call` (retried only until the first token). Token usage is recorded once the stream ends;
+        closing the generator early cancels the request.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("OpenAIGateway.stream_chat() would deadlock on the gateway loop")
+        out = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._stream(model, {"messages": messages, **kwargs}, out), self._loop)
+        try:
+            while True:
+                kind, value = out.get()
+                if kind == "token":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    record_tokens(model, *value)
+                    return
+        finally:
+            future.cancel()
+
+    def stats(self) -> dict:
+        return {**self._counts, "throttled_seconds": round(self._counts["throttled_seconds"], 2),
+                "in_flight": len(self._inflight)}
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_gateways = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(api_key, base_url=None) -> OpenAIGateway:
+    """Process-wide OpenAIGateway for this API key / endpoint, so rate limits are shared by every agent."""
+    key = (api_key, base_url)
+    with _gateways_lock:
+        if key not in _gateways:
+            _gateways[key] = OpenAIGateway(api_key, base_url=base_url)
+        return _gateways[key]
@@ -1,23 +1,24 @@
 import requests
-from bs4 import BeautifulSoup
-import time
 import logging
 import traceback
+from agents.crawl_engine import HostThrottle
+from agents.http_cache import get_http_cache
+from agents.html_extract import extract_visible_text
+from agents.site_crawler import USER_AGENT
 
 class PortfolioEnricherAgent:
-    def __init__(self, limit=10, delay=1.0):
+    def __init__(self, limit=10, delay=1.0, throttle=None, cache=None, max_chars=8000, session=None, robots=None):
         self.limit = limit
+        self.max_chars = max_chars
         self.delay = delay
-        self.session = requests.Session()
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (compatible; VC-HunterBot/1.0; +https://yourdomain.com/bot)"
-        }
+        self.throttle = throttle or HostThrottle(delay)
+        self.cache = cache or get_http_cache()
+        self.session = session or requests.Session()
+        self.robots = robots
+        self.headers = {"User-Agent": USER_AGENT}
 
-    def extract_visible_text(self, html: str) -> str:
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-        return " ".join(soup.stripped_strings)
+    def extract_visible_text(self, html: str, max_chars=None) -> str:
+        return extract_visible_text(html, max_chars=max_chars)
 
     def enrich(self, links: list[str]) -> dict:
         company_data = {}
@@ -25,16 +26,17 @@ class PortfolioEnricherAgent:
 
         for url in deduped_urls:
             try:
-                response = self.session.get(url, timeout=10, headers=self.headers)
+                if self.robots is not None and not self.robots.allowed(url):
+                    logging.info(f"[ENRICH 🤖] Disallowed by robots.txt: {url}")
+                    continue
+                response = self.cache.get(self.session, url, timeout=10, headers=self.headers, throttle=self.throttle)
                 if response.status_code == 200:
-                    text = self.extract_visible_text(response.text)
-                    company_data[url] = text[:8000]
+                    company_data[url] = self.extract_visible_text(response.text, max_chars=self.max_chars)
                     logging.info(f"[ENRICH ✅] Scraped {url}")
                 else:
                     logging.warning(f"[ENRICH ⚠️] HTTP {response.status_code} from {url}")
             except Exception as e:
                 logging.error(f"[ENRICH ❌] Failed to scrape {url}: {e}")
                 traceback.print_exc()
-            time.sleep(self.delay)
 
         return company_data
@@ -0,0 +1,205 @@
+# registry.py — Process-wide agents, shared clients and cached pipeline results
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from agents.founder_doc_reader_and_orchestrator import VCHunterOrchestrator, FounderDocReaderAgent
+from agents.llm_embed_gap_match_chat import (
+    ChatbotAgent, FounderMatchAgent, EmbedderAgent, LLMSummarizerAgent, GapAnalysisAgent
+)
+from agents.categorizer_agent import CategorizerAgent
+from agents.relationship_agent import RelationshipAgent
+from agents.visualization_agent import VisualizationAgent
+from agents.similar_company_agent import SimilarCompanyAgent
+from agents.website_scraper_agent import VCWebsiteScraperAgent
+from agents.portfolio_enricher_agent import PortfolioEnricherAgent
+from agents.crawl_engine import CrawlEngine, HostThrottle
+from agents.embedding_store import EmbeddingStore
+from agents.http_cache import HTTPCache, get_http_cache
+from agents.llm_cache import CompletionCache, get_completion_cache
+from agents.run_store import RunStore
+from agents.site_crawler import RobotsCache
+from agents.text_reducer import TextReducer
+from agents.openai_gateway import get_gateway
+
+
+class AgentRegistry:
+    def __init__(self, api_key, base_url=None, crawl_workers=8, http_pool_size=64, max_cached_results=32,
+                 vc_model=None, vc_pack_size=1, client=None, cache_root=None, crawl_delay=1.0):
+        """
+        One set of agents per server process, sharing the OpenAI gateway and a single
+        pooled requests.Session, plus an LRU of pipeline results keyed on the uploaded documents.
+
+        Args:
+            api_key (str): OpenAI API key.
+            base_url (str | None): Alternative OpenAI-compatible endpoint.
+            crawl_workers (int): VC sites crawled concurrently when no index is available.
+            http_pool_size (int): Keep-alive connections per host in the shared requests.Session.
+            max_cached_results (int): Pipeline results kept in memory.
+            vc_model (str | None): Opt-in model tier for bulk VC summaries; None keeps them on gpt-4
+                like founder summaries and chat. Every VC result derives from these summaries.
+            vc_pack_size (int): VCs packed into one summarization request; 1 (the default) sends one
+                per VC. Packing needs a `vc_model` with json_schema structured output support.
+            client (OpenAIGateway | None): Injected OpenAI client; defaults to the shared gateway for
+                `api_key` / `base_url`.
+            cache_root (str | None): Keep the HTTP, completion, embedding and checkpoint caches in this
+                directory instead of the process-wide ones under the default cache root.
+            crawl_delay (float): Minimum seconds between requests to the same host.
+        """
+        # Every agent talks to OpenAI through one rate-limited, retrying gateway
+        self.client = client or get_gateway(api_key, base_url)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=http_pool_size, pool_maxsize=http_pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if cache_root:
+            http_cache = HTTPCache(path=os.path.join(cache_root, "http.sqlite"))
+            completions = CompletionCache(path=os.path.join(cache_root, "completions.sqlite"))
+            embedding_store = EmbeddingStore(directory=os.path.join(cache_root, "embeddings"))
+            run_store = RunStore(os.path.join(cache_root, "runs.sqlite"))
+        else:
+            http_cache, completions, embedding_store, run_store = get_http_cache(), get_completion_cache(), None, RunStore()
+
+        # Scraper and enricher share one politeness gate and one robots.txt cache
+        self.throttle = HostThrottle(crawl_delay)
+        self.robots = RobotsCache(http_cache, self.session)
+
+        self.reader = FounderDocReaderAgent()
+        self.embedder = EmbedderAgent(api_key=api_key, client=self.client, store=embedding_store)
+        self.chatbot = ChatbotAgent(api_key=api_key, cache=completions, client=self.client, embedder=self.embedder)
+        self.agents = {
+            "scraper": VCWebsiteScraperAgent(cache=http_cache, session=self.session, throttle=self.throttle,
+                                             robots=self.robots),
+            "portfolio": PortfolioEnricherAgent(cache=http_cache, session=self.session, throttle=self.throttle,
+                                                robots=self.robots),
+            "summarizer": LLMSummarizerAgent(api_key=api_key, cache=completions, client=self.client,
+                                             vc_model=vc_model, pack_size=vc_pack_size),
+            "embedder": self.embedder,
+            "categorizer": CategorizerAgent(api_key=api_key, cache=completions, client=self.client, incremental=True,
+                                            state_store=run_store, embedding_model=self.embedder.model),
+            "relationship": RelationshipAgent,
+            "visualizer": VisualizationAgent(),
+            "matcher": FounderMatchAgent(),
+            "chatbot": self.chatbot,
+            "gap": GapAnalysisAgent(),
+            "similar": SimilarCompanyAgent(embedder=self.embedder),
+            "crawler": CrawlEngine(max_workers=crawl_workers),
+            "reducer": TextReducer()
+        }
+        self.orchestrator = VCHunterOrchestrator(self.agents, run_store=run_store)
+
+        self.max_cached_results = max_cached_results
+        self._results = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def result_key(documents, index_version=None, founder_vector=None) -> str:
+        """Hash of the uploaded document bytes (in order) plus the VC index version and founder vector mode."""
+        digest = hashlib.sha256()
+        for data in documents:
+            digest.update(hashlib.sha256(data).digest())
+        digest.update(str(index_version).encode("utf-8"))
+        digest.update(str(founder_vector).encode("utf-8"))
+        return digest.hexdigest()
+
+    def extract_text(self, documents) -> str:
+        """Concatenate the uploads' text until the reader's character budget is used up."""
+        full_text = ""
+        for data in documents:
+            remaining = self.reader.max_chars - len(full_text)
+            if remaining <= 0:
+                logging.info("📄 Character budget reached; skipping remaining uploads.")
+                break
+            extracted = self.reader.extract_text(data, max_chars=remaining)
+            logging.info(f"📄 Extracted {len(extracted)} characters from uploaded file.")
+            full_text += extracted + "\n"
+        return full_text
+
+    def analyze(self, documents, index=None, founder_vector=None):
+        """
+        Run the pipeline for a list of uploaded document bytes, reusing the result for an
+        identical submission against the same index. Concurrent identical submissions wait
+        for the first one instead of running the pipeline twice.
+        """
+        founder_vector = founder_vector or self.orchestrator.founder_vector
+        key = self.result_key(documents, index.version if index else None, founder_vector)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                logging.info("⚡ Returning cached analysis for identical documents")
+                return self._results[key]
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self._lock:
+                if key in self._results:
+                    return self._results[key]
+            return self.analyze(documents, index, founder_vector)
+
+        try:
+            results = self.orchestrator.run(self.extract_text(documents), index=index, founder_vector=founder_vector)
+            self._store_result(key, results)
+            return results
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def _store_result(self, key, results):
+        with self._lock:
+            self._results[key] = results
+            while len(self._results) > self.max_cached_results:
+                self._results.popitem(last=False)
+
+    def analyze_stream(self, documents, index=None, founder_vector=None):
+        """
+        `analyze` as a stream of orchestrator events (see VCHunterOrchestrator.run_stream), ending in
+        {"type": "done", "results": ...}. A cached or already running identical submission yields
+        only the final event.
+        """
+        founder_vector = founder_vector or self.orchestrator.founder_vector
+        key = self.result_key(documents, index.version if index else None, founder_vector)
+        with self._lock:
+            owner = key not in self._results and key not in self._inflight
+            if owner:
+                event = self._inflight[key] = threading.Event()
+        if not owner:
+            yield {"type": "done", "results": self.analyze(documents, index, founder_vector)}
+            return
+
+        try:
+            for item in self.orchestrator.run_stream(self.extract_text(documents), index=index,
+                                                     founder_vector=founder_vector):
+                if item["type"] == "done":
+                    self._store_result(key, item["results"])
+                yield item
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(api_key, base_url=None, **options) -> AgentRegistry:
+    """Process-wide AgentRegistry for this API key / endpoint and `options` (AgentRegistry kwargs), built on first use."""
+    key = (api_key, base_url, tuple(sorted(options.items())))
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = _registries[key] = AgentRegistry(api_key, base_url=base_url, **options)
+        return registry
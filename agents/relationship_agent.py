@@ -1,55 +1,125 @@
 import logging
 import numpy as np
-from collections import defaultdict
+from scipy import sparse
 from typing import Dict, List, Any
 
 
 class RelationshipAgent:
-    def __init__(self, vc_to_companies: Dict[str, List[str]], vc_to_vectors: Dict[str, np.ndarray]):
+    BLOCK_ROWS = 512
+
+    def __init__(self, vc_to_companies: Dict[str, List[str]], vc_to_vectors: Dict[str, np.ndarray],
+                 mode: str = "auto", threshold: float = 0.05, top_k: int = 10, dense_limit: int = 200):
         """
         Args:
             vc_to_companies: Dictionary of {VC firm name: [list of portfolio company URLs/domains]}
             vc_to_vectors: Dictionary of {VC firm name: vector representation}
+            mode: "all" emits every pair (the original output), "threshold" keeps pairs whose Jaccard
+                or cosine score is above `threshold`, "top_k" keeps each firm's `top_k` best partners.
+                "auto" uses "all" up to `dense_limit` firms and "top_k" beyond.
+            threshold: Minimum score for "threshold" mode.
+            top_k: Partners kept per firm in "top_k" mode.
+            dense_limit: Largest firm count for which "auto" emits all pairs.
         """
         self.vc_to_companies = vc_to_companies
         self.vc_to_vectors = vc_to_vectors
+        self.mode = mode
+        self.threshold = threshold
+        self.top_k = top_k
+        self.dense_limit = dense_limit
+
+    def _incidence(self, vcs):
+        """Sparse VC × company 0/1 matrix."""
+        company_idx = {}
+        rows, cols = [], []
+        for i, vc in enumerate(vcs):
+            for company in set(self.vc_to_companies.get(vc) or []):
+                rows.append(i)
+                cols.append(company_idx.setdefault(company, len(company_idx)))
+        data = np.ones(len(rows), dtype=np.float64)
+        matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(vcs), len(company_idx)))
+        companies = [None] * len(company_idx)
+        for company, j in company_idx.items():
+            companies[j] = company
+        return matrix, companies
+
+    def _normalized_vectors(self, vcs):
+        """Row-normalized embedding matrix; firms without a usable vector get a zero row (cosine 0.0)."""
+        dim = next((len(v) for v in self.vc_to_vectors.values() if v is not None), 0)
+        matrix = np.zeros((len(vcs), dim), dtype=np.float64)
+        for i, vc in enumerate(vcs):
+            vec = self.vc_to_vectors.get(vc)
+            if vec is None:
+                continue
+            try:
+                matrix[i] = vec
+            except Exception as e:
+                logging.warning(f"Cosine similarity failed for {vc}: {e}")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
 
     def analyze(self) -> Dict[str, List[Dict[str, Any]]]:
-        relationships = []
         vcs = list(self.vc_to_companies.keys())
+        n = len(vcs)
+        if n < 2:
+            return {"co_investment": []}
+
+        incidence, companies = self._incidence(vcs)
+        incidence_t = incidence.T.tocsc()
+        sizes = np.asarray(incidence.sum(axis=1)).ravel()
+        vectors = self._normalized_vectors(vcs)
+
+        mode = self.mode
+        if mode == "auto":
+            mode = "all" if n <= self.dense_limit else "top_k"
+        k = min(self.top_k, n - 1)
 
-        for i in range(len(vcs)):
-            for j in range(i + 1, len(vcs)):
-                a, b = vcs[i], vcs[j]
-                set_a = set(self.vc_to_companies.get(a, []))
-                set_b = set(self.vc_to_companies.get(b, []))
-
-                if not set_a and not set_b:
-                    continue
-
-                shared = set_a & set_b
-                union = set_a | set_b
-                jaccard = len(shared) / len(union) if union else 0.0
-
-                # Cosine similarity between VC embeddings
-                cosine_sim = 0.0
-                try:
-                    vec_a = self.vc_to_vectors[a]
-                    vec_b = self.vc_to_vectors[b]
-                    if vec_a is not None and vec_b is not None:
-                        cosine_sim = float(np.dot(vec_a, vec_b) / (np.linalg.norm(vec_a) * np.linalg.norm(vec_b)))
-                except Exception as e:
-                    logging.warning(f"Cosine similarity failed for {a} and {b}: {e}")
-
-                relationships.append({
-                    "firm_a": a,
-                    "firm_b": b,
-                    "shared_companies": list(shared),
-                    "score": round(jaccard, 3),
-                    "cosine_similarity": round(cosine_sim, 3),
-                    "type": self._classify(jaccard)
-                })
+        # Score rows in blocks so memory stays O(block × n) instead of O(n²)
+        pairs = {}
+        for start in range(0, n, self.BLOCK_ROWS):
+            rows = np.arange(start, min(start + self.BLOCK_ROWS, n))
+            shared = (incidence[rows] @ incidence_t).toarray()
+            unions = sizes[rows, None] + sizes[None, :] - shared
+            jaccard = np.divide(shared, unions, out=np.zeros_like(shared), where=unions > 0)
+            cosine = vectors[rows] @ vectors.T
+
+            # Never pair a firm with itself or two firms without any portfolio
+            valid = unions > 0
+            valid[np.arange(len(rows)), rows] = False
+
+            if mode == "top_k":
+                strength = np.where(valid, np.maximum(jaccard, cosine), -np.inf)
+                best = np.argpartition(-strength, k - 1, axis=1)[:, :k]
+                local, cols = np.repeat(np.arange(len(rows)), k), best.ravel()
+                keep = valid[local, cols]
+                local, cols = local[keep], cols[keep]
+            else:
+                upper = valid & (np.arange(n)[None, :] > rows[:, None])
+                if mode == "threshold":
+                    upper &= (jaccard > self.threshold) | (cosine > self.threshold)
+                local, cols = np.nonzero(upper)
+
+            for r, j in zip(local, cols):
+                i = rows[r]
+                pairs[(min(i, j), max(i, j))] = (float(jaccard[r, j]), float(cosine[r, j]), shared[r, j] > 0)
+
+        relationships = []
+        for (i, j), (score, cosine_sim, has_shared) in sorted(pairs.items()):
+            shared_companies = []
+            if has_shared:
+                cols_a = incidence.indices[incidence.indptr[i]:incidence.indptr[i + 1]]
+                cols_b = incidence.indices[incidence.indptr[j]:incidence.indptr[j + 1]]
+                shared_companies = [companies[c] for c in np.intersect1d(cols_a, cols_b)]
+            relationships.append({
+                "firm_a": vcs[i],
+                "firm_b": vcs[j],
+                "shared_companies": shared_companies,
+                "score": round(score, 3),
+                "cosine_similarity": round(cosine_sim, 3),
+                "type": self._classify(score)
+            })
 
+        logging.info(f"🔗 {len(relationships)} relationships from {n} firms ({mode} mode)")
         return {"co_investment": relationships}
 
     def _classify(self, score: float) -> str:
@@ -0,0 +1,88 @@
+# run_store.py — Checkpoints for resumable pipeline runs: per-VC artifacts and fingerprinted stage results
+
+import base64
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from agents.cache_store import CacheStore
+from agents.utils import cache_dir
+
+FORMAT = 1
+
+
+def _default(obj):
+    if isinstance(obj, np.ndarray):
+        array = np.ascontiguousarray(obj)
+        return {"__ndarray__": base64.b64encode(array.tobytes()).decode("ascii"),
+                "dtype": str(array.dtype), "shape": list(array.shape)}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Cannot checkpoint {type(obj).__name__}")
+
+
+def _object_hook(obj):
+    if "__ndarray__" in obj:
+        return np.frombuffer(base64.b64decode(obj["__ndarray__"]), dtype=obj["dtype"]).reshape(obj["shape"]).copy()
+    return obj
+
+
+def dumps(value) -> bytes:
+    """JSON with numpy arrays inlined as base64; tuples come back as lists. Dict order is kept (and fingerprinted)."""
+    return json.dumps(value, default=_default).encode("utf-8")
+
+
+def loads(data: bytes):
+    return json.loads(data.decode("utf-8"), object_hook=_object_hook)
+
+
+def fingerprint(*values) -> str:
+    """Stable hash of JSON/numpy values, used to decide whether a stage's inputs changed."""
+    digest = hashlib.sha256(str(FORMAT).encode())
+    for value in values:
+        digest.update(dumps(value))
+    return digest.hexdigest()
+
+
+class RunStore:
+    def __init__(self, path=None, ttl=30 * 24 * 3600, max_bytes=1024 * 1024 * 1024):
+        """
+        Local store of pipeline checkpoints, written as soon as each artifact exists.
+
+        Per-VC records hold the scraped site text, the enriched (boilerplate-free) pages, a
+        fingerprint of both and, once available, the summary. Stage records hold a stage's
+        result under the fingerprint of its inputs, so an unchanged stage is not recomputed.
+        State records hold whatever an agent keeps between runs, overwritten on every save.
+
+        Args:
+            path (str | None): SQLite file; defaults to <cache root>/runs.sqlite.
+            ttl (float): Seconds a checkpoint is kept usable.
+            max_bytes (int): Size cap across all checkpoints (LRU eviction).
+        """
+        self.store = CacheStore(path or os.path.join(cache_dir(), "runs.sqlite"), ttl=ttl, max_bytes=max_bytes)
+
+    def get_vc(self, url):
+        """The latest checkpoint for a VC ({"fingerprint", "site_text", "pages", "summary", "saved_at"}) or None."""
+        data = self.store.get(f"vc:{url}")
+        return loads(data) if data is not None else None
+
+    def put_vc(self, url, record):
+        self.store.put(f"vc:{url}", dumps({**record, "saved_at": time.time()}))
+
+    def get_stage(self, name, inputs_fingerprint):
+        data = self.store.get(f"stage:{name}:{inputs_fingerprint}")
+        return loads(data) if data is not None else None
+
+    def put_stage(self, name, inputs_fingerprint, value):
+        self.store.put(f"stage:{name}:{inputs_fingerprint}", dumps(value))
+
+    def get_state(self, name):
+        """Long-lived state an agent carries from run to run (e.g. cluster centroids), or None."""
+        data = self.store.get(f"state:{name}")
+        return loads(data) if data is not None else None
+
+    def put_state(self, name, value):
+        self.store.put(f"state:{name}", dumps(value))
@@ -1,6 +1,5 @@
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import logging
+from agents.vector_index import VectorIndex
 
 class SimilarCompanyAgent:
     def __init__(self, embedder):
@@ -27,22 +26,55 @@ class SimilarCompanyAgent:
         texts = [portfolio_texts[c] for c in companies]
 
         embeddings = self.embedder.embed(texts)
-        if not embeddings or founder_vec is None:
+        if len(embeddings) == 0 or founder_vec is None:
             logging.warning("❌ No embeddings returned in SimilarCompanyAgent.")
             return []
 
-        similarities = cosine_similarity([founder_vec], embeddings)[0]
-        ranked_indices = np.argsort(similarities)[::-1][:top_n]
+        return self.rank(founder_vec, companies, embeddings, company_to_vcs, top_n)
+
+    def rank(self, founder_vec, companies: list, embeddings, company_to_vcs: dict, top_n=5, index=None):
+        """
+        Ranks already-embedded portfolio companies against the founder vector.
+
+        Args:
+            founder_vec (np.ndarray): Embedding vector of the founder's idea.
+            companies (list): Company URLs aligned with `embeddings`.
+            embeddings (np.ndarray): (n_companies, dim) company embeddings.
+            company_to_vcs (dict): Mapping from company URL to list of VC firms that invested.
+            top_n (int): Number of most similar companies to return.
+            index (VectorIndex): Prebuilt index over the companies; an exact one is built when omitted.
+
+        Returns:
+            list of dicts containing 'company_url', 'similarity_score', and 'invested_vcs'
+        """
+        if index is None:
+            if len(companies) == 0 or len(embeddings) == 0:
+                return []
+            index = VectorIndex.build(companies, embeddings)
 
         results = []
-        for idx in ranked_indices:
-            company = companies[idx]
-            score = round(float(similarities[idx]), 3)
+        for company, similarity in index.search(founder_vec, k=top_n):
             vcs = company_to_vcs.get(company, [])
             results.append({
                 "company_url": company,
-                "similarity_score": score,
+                "similarity_score": round(similarity, 3),
                 "invested_vcs": vcs
             })
 
         return results
+
+    def rank_batch(self, founder_vecs, companies: list, embeddings, company_to_vcs: dict, top_n=5):
+        """
+        `rank` for many founders at once, scoring all of them against the companies in one matrix product.
+
+        Returns:
+            list of lists (one per founder, in input order) of the dicts `rank` returns
+        """
+        if len(companies) == 0 or len(embeddings) == 0:
+            return [[] for _ in range(len(founder_vecs))]
+        index = VectorIndex.build(companies, embeddings)
+        return [
+            [{"company_url": company, "similarity_score": round(similarity, 3),
+              "invested_vcs": company_to_vcs.get(company, [])} for company, similarity in ranked]
+            for ranked in index.search_batch(founder_vecs, k=top_n)
+        ]
@@ -0,0 +1,144 @@
+# site_crawler.py — Same-site crawl helpers: registered domains, cached robots.txt and a priority frontier
+
+import heapq
+import logging
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import tldextract
+
+from agents.utils import canonicalize_url
+
+# Sent with every page and robots.txt request, and matched against robots.txt groups. robotparser
+# compares the text before the first "/" with each group's agent name, so the bot name leads.
+USER_AGENT = "VC-HunterBot/1.0 (+https://yourdomain.com/bot)"
+
+# Bundled public suffix list only; tldextract would otherwise download it on first use
+_tld = tldextract.TLDExtract(suffix_list_urls=())
+
+PORTFOLIO_KEYWORDS = ("portfolio", "companies", "investments", "our-companies")
+SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+                   ".zip", ".mp3", ".mp4", ".mov", ".xml", ".json", ".rss")
+NON_COMPANY_DOMAINS = {
+    "linkedin.com", "twitter.com", "x.com", "facebook.com", "instagram.com", "youtube.com", "youtu.be",
+    "medium.com", "substack.com", "github.com", "crunchbase.com", "google.com", "apple.com", "spotify.com",
+    "tiktok.com", "vimeo.com", "wikipedia.org", "bit.ly", "lnkd.in",
+}
+
+
+def registered_domain(url: str) -> str:
+    """eTLD+1 of a URL ("www.sequoiacap.com" → "sequoiacap.com"); IP hosts are returned as-is."""
+    ext = _tld(url)
+    return ".".join(part for part in (ext.domain, ext.suffix) if part).lower()
+
+
+def crawlable_link(base: str, href: str):
+    """Absolute http(s) URL for an href, or None for anchors, mailto:/tel:/javascript: links and binary assets."""
+    href = (href or "").strip()
+    if not href or href.startswith(("#", "mailto:", "tel:", "javascript:", "data:")):
+        return None
+    url = urljoin(base, href).split("#", 1)[0]
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    if parts.path.lower().endswith(SKIP_EXTENSIONS):
+        return None
+    return url
+
+
+class RobotsCache:
+    def __init__(self, http_cache, session, user_agent=USER_AGENT, ttl=24 * 3600, timeout=5):
+        """
+        Parsed robots.txt per origin, shared by every crawl worker.
+
+        The file itself goes through the HTTP cache, so it is revalidated rather than
+        refetched across runs. Missing files allow everything; 401/403 disallow everything.
+
+        Args:
+            http_cache (HTTPCache): Cache used to fetch robots.txt.
+            session: requests.Session (or the requests module) used for fetching.
+            user_agent (str): User-Agent sent for robots.txt and matched against its groups; use the
+                same one the pages are fetched with.
+            ttl (float): Seconds a parsed file is reused in memory.
+            timeout (float): Fetch timeout for robots.txt.
+        """
+        self.http_cache = http_cache
+        self.session = session
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.timeout = timeout
+        self._parsers = {}
+        self._lock = threading.Lock()
+
+    def _parser(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+        with self._lock:
+            entry = self._parsers.get(origin)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+
+        parser = RobotFileParser()
+        try:
+            response = self.http_cache.get(self.session, origin + "/robots.txt", timeout=self.timeout,
+                                           headers={"User-Agent": self.user_agent})
+            if response.status_code in (401, 403):
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(response.text.splitlines())
+        except Exception as e:
+            logging.debug(f"robots.txt unavailable for {origin}: {e}")
+            parser.allow_all = True
+
+        with self._lock:
+            self._parsers[origin] = (parser, time.monotonic())
+        return parser
+
+    def allowed(self, url) -> bool:
+        return self._parser(url).can_fetch(self.user_agent, url)
+
+
+class CrawlFrontier:
+    def __init__(self, keywords):
+        """
+        Priority queue of same-site pages still to fetch, deduplicated on canonical URL.
+
+        Args:
+            keywords (list of str): Path keywords in priority order; a page scores by the first
+                one its path contains (earlier keywords score higher), minus its link depth.
+        """
+        self.keywords = [k.lower() for k in keywords]
+        self._heap = []
+        self._seen = set()
+        self._counter = 0
+
+    def weight(self, url) -> int:
+        path = urlsplit(url).path.lower()
+        for i, keyword in enumerate(self.keywords):
+            if keyword in path:
+                return len(self.keywords) - i
+        return 0
+
+    def push(self, url, depth) -> bool:
+        key = canonicalize_url(url)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        weight = self.weight(url)
+        heapq.heappush(self._heap, (-(weight * 10 - depth), self._counter, url, depth, weight))
+        self._counter += 1
+        return True
+
+    def pop(self):
+        """(url, depth, weight) of the most promising page, or None when empty."""
+        if not self._heap:
+            return None
+        _, _, url, depth, weight = heapq.heappop(self._heap)
+        return url, depth, weight
+
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,134 @@
+# stage_scheduler.py — Runs a DAG of pipeline stages concurrently with timeouts and failure isolation
+
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from agents.instrumentation import span
+
+
+class Stage:
+    def __init__(self, name, fn, deps=(), timeout=None, required=True, default=None):
+        """
+        One node of the pipeline DAG.
+
+        Args:
+            name (str): Unique stage name; also the key of its result.
+            fn (callable): Called with one keyword argument per dependency (its result).
+            deps (iterable of str): Names of stages whose results `fn` needs.
+            timeout (float | None): Seconds before the stage is abandoned.
+            required (bool): If True, a failure or timeout aborts the whole run with the stage's error.
+                Otherwise the stage yields `default` and its dependents still run.
+            default: Result used when a non-required stage fails or times out.
+        """
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.timeout = timeout
+        self.required = required
+        self.default = default
+
+
+class StageScheduler:
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.last_report = {}
+
+    def run(self, stages, on_result=None):
+        """
+        Run every stage as soon as its dependencies are resolved.
+
+        Args:
+            stages (list of Stage): The DAG.
+            on_result (callable | None): Called as on_result(name, result, timing) on this thread as
+                soon as each stage resolves (with its default when a non-required stage fails).
+
+        Returns:
+            dict: {stage name: result}. The timing report (per-stage status and seconds,
+            critical path) is left in `self.last_report`.
+        """
+        stages = {s.name: s for s in stages}
+        for stage in stages.values():
+            missing = [d for d in stage.deps if d not in stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages {missing}")
+
+        results, timings = {}, {}
+        pending = dict(stages)
+        running = {}
+        t0 = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage")
+        try:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(d in results for d in stage.deps):
+                        kwargs = {d: results[d] for d in stage.deps}
+                        future = pool.submit(contextvars.copy_context().run, self._call, stage, kwargs)
+                        running[future] = (stage, time.perf_counter())
+                        del pending[name]
+                if not running:
+                    raise ValueError(f"Stage dependency cycle among {sorted(pending)}")
+
+                deadlines = [start + s.timeout for s, start in running.values() if s.timeout]
+                wait_for = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+                now = time.perf_counter()
+                for future in list(running):
+                    stage, start = running[future]
+                    if future in done:
+                        error = future.exception()
+                        status = "ok" if error is None else "failed"
+                    elif stage.timeout and now - start >= stage.timeout:
+                        future.cancel()
+                        error = TimeoutError(f"Stage {stage.name} timed out after {stage.timeout}s")
+                        status = "timeout"
+                    else:
+                        continue
+                    del running[future]
+                    timings[stage.name] = {"status": status, "start": round(start - t0, 3),
+                                           "end": round(now - t0, 3), "seconds": round(now - start, 3)}
+
+                    if error is None:
+                        results[stage.name] = future.result()
+                    elif stage.required:
+                        logging.error(f"❌ Stage {stage.name} {status}: {error}")
+                        raise error
+                    else:
+                        logging.warning(f"⚠️ Stage {stage.name} {status}, using default: {error}")
+                        results[stage.name] = stage.default
+                    if on_result is not None:
+                        on_result(stage.name, results[stage.name], timings[stage.name])
+        finally:
+            # Abandoned (timed out) stages keep their thread until they return; don't block on them
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.last_report = self._report(stages, timings, time.perf_counter() - t0)
+
+        return results
+
+    @staticmethod
+    def _call(stage, kwargs):
+        with span(f"stage:{stage.name}"):
+            return stage.fn(**kwargs)
+
+    def _report(self, stages, timings, wall_seconds):
+        path = []
+        if timings:
+            current = max(timings, key=lambda n: (timings[n]["end"], timings[n]["start"]))
+            while current is not None:
+                path.append(current)
+                deps = [d for d in stages[current].deps if d in timings]
+                current = max(deps, key=lambda n: timings[n]["end"]) if deps else None
+            path.reverse()
+
+        report = {
+            "stages": timings,
+            "critical_path": path,
+            "critical_path_seconds": round(sum(timings[n]["seconds"] for n in path), 3),
+            "wall_seconds": round(wall_seconds, 3),
+        }
+        if path:
+            logging.info(f"⏱️ Critical path ({report['critical_path_seconds']:.1f}s of {wall_seconds:.1f}s): "
+                         + " → ".join(path))
+        return report
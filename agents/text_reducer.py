@@ -0,0 +1,127 @@
+# text_reducer.py — Strips repeated site boilerplate and near-duplicate pages before summarization
+
+import logging
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from agents.instrumentation import record_text_reduction
+from agents.utils import estimate_tokens, jaccard_similarity
+
+
+class TextReducer:
+    def __init__(self, shingle_size=5, min_host_pages=2, cross_site_fraction=0.5, near_duplicate=0.8,
+                 budget_chars=3000):
+        """
+        Shrinks one VC's scraped text to the distinct content worth a summarization prompt.
+
+        A word shingle counts as boilerplate when it appears on `min_host_pages` pages of the
+        same host (navigation, footers) or on at least `cross_site_fraction` of all pages
+        (cookie banners and widgets shared across sites). Pages whose remaining shingles
+        overlap an earlier page by `near_duplicate` Jaccard or more are left out of the prompt.
+
+        Args:
+            shingle_size (int): Words per shingle.
+            min_host_pages (int): Same-host pages a shingle must repeat on to be boilerplate.
+            cross_site_fraction (float): Share of all pages that marks a shingle as boilerplate.
+            near_duplicate (float): Jaccard similarity at which a page counts as a duplicate.
+            budget_chars (int): Portfolio characters the summarizer keeps (LLMSummarizerAgent cuts at 3000).
+        """
+        self.shingle_size = shingle_size
+        self.min_host_pages = min_host_pages
+        self.cross_site_fraction = cross_site_fraction
+        self.near_duplicate = near_duplicate
+        self.budget_chars = budget_chars
+
+    def _shingles(self, words):
+        k = self.shingle_size
+        return [" ".join(words[i:i + k]).lower() for i in range(max(0, len(words) - k + 1))]
+
+    def _boilerplate(self, pages):
+        """Shingles repeated across pages of one host, or across a large share of all pages."""
+        by_host, overall = defaultdict(lambda: defaultdict(int)), defaultdict(int)
+        for host, shingles in pages:
+            for shingle in set(shingles):
+                by_host[host][shingle] += 1
+                overall[shingle] += 1
+
+        repeated = {s for counts in by_host.values() for s, n in counts.items() if n >= self.min_host_pages}
+        if len(pages) >= 3:
+            threshold = max(2, self.cross_site_fraction * len(pages))
+            repeated.update(s for s, n in overall.items() if n >= threshold)
+        return repeated
+
+    def _distinct(self, indices, shingle_sets):
+        """Indices whose shingle sets are not near-duplicates of an earlier kept one, plus the number dropped."""
+        kept, dropped = [], 0
+        for i in indices:
+            if shingle_sets[i] and any(jaccard_similarity(shingle_sets[i], shingle_sets[j]) >= self.near_duplicate
+                                       for j in kept):
+                dropped += 1
+                continue
+            kept.append(i)
+        return kept, dropped
+
+    def _strip(self, words, shingles, boilerplate):
+        covered = [False] * len(words)
+        for i, shingle in enumerate(shingles):
+            if shingle in boilerplate:
+                covered[i:i + self.shingle_size] = [True] * self.shingle_size
+        return " ".join(w for w, c in zip(words, covered) if not c)
+
+    def _fill_budget(self, texts):
+        """Give every distinct page a fair share of the budget; short pages pass their leftovers on."""
+        shares, remaining = {}, self.budget_chars
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for rank, i in enumerate(order):
+            share = max(0, remaining) // (len(texts) - rank)
+            shares[i] = texts[i] if len(texts[i]) <= share else texts[i][:share].rsplit(" ", 1)[0]
+            remaining -= len(shares[i]) + 1
+        return "\n".join(shares[i] for i in range(len(texts)) if shares[i])
+
+    def reduce(self, site_url, site_text, page_texts):
+        """
+        Args:
+            site_url (str): The VC homepage; `site_text` is attributed to its host.
+            site_text (str): Homepage paragraphs.
+            page_texts (dict): {url: visible text} from PortfolioEnricherAgent.enrich.
+
+        Returns:
+            dict: {"site_text", "portfolio_text", "pages", "stats"}. "pages" maps every URL to its
+            boilerplate-free text (the original when nothing would remain); "portfolio_text" holds the
+            distinct pages packed into the summarizer's budget.
+        """
+        urls = list(page_texts)
+        docs = [(urlparse(site_url).netloc.lower(), site_text)] + [(urlparse(u).netloc.lower(), page_texts[u]) for u in urls]
+        words = [(text or "").split() for _, text in docs]
+        shingles = [self._shingles(w) for w in words]
+
+        # Collapse duplicate pages first, so a page served twice isn't mistaken for its own boilerplate
+        representatives, duplicates = self._distinct(range(len(docs)), [set(s) for s in shingles])
+        boilerplate = self._boilerplate([(docs[i][0], shingles[i]) for i in representatives])
+
+        stripped = [self._strip(w, s, boilerplate) for w, s in zip(words, shingles)]
+        pages = {u: stripped[i + 1] or page_texts[u] for i, u in enumerate(urls)}
+
+        # Pages that only differ in their boilerplate are near-duplicates too
+        candidates = [i for i in representatives if i > 0 and stripped[i]]
+        kept, more = self._distinct(candidates, {i: set(self._shingles(stripped[i].split())) for i in candidates})
+        duplicates += more
+        distinct = [stripped[i] for i in kept]
+
+        reduced_site = stripped[0] or site_text
+        portfolio_text = self._fill_budget(distinct) if distinct else ""
+
+        raw_portfolio = "\n".join(page_texts.values())
+        stats = {
+            "input_tokens": estimate_tokens(site_text + "\n" + raw_portfolio),
+            "kept_tokens": estimate_tokens(reduced_site + "\n" + "\n".join(distinct)),
+            "prompt_tokens_before": estimate_tokens(site_text[:3000] + raw_portfolio[:3000]),
+            "prompt_tokens_after": estimate_tokens(reduced_site[:3000] + portfolio_text[:3000]),
+            "boilerplate_shingles": len(boilerplate),
+            "duplicate_pages": duplicates,
+        }
+        stats["tokens_saved"] = stats["input_tokens"] - stats["kept_tokens"]
+        record_text_reduction(stats["input_tokens"], stats["kept_tokens"])
+        logging.info(f"✂️ {site_url}: {stats['tokens_saved']} tokens of boilerplate/duplicates dropped, "
+                     f"prompt {stats['prompt_tokens_before']} → {stats['prompt_tokens_after']} tokens")
+        return {"site_text": reduced_site, "portfolio_text": portfolio_text, "pages": pages, "stats": stats}
@@ -1,9 +1,17 @@
 # utils.py — Common utility functions
 
+import os
 import re
 import unicodedata
 import logging
 from typing import Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken is optional; fall back to the ~4 chars/token rule of thumb
+    _encoding = None
 
 logging.basicConfig(level=logging.INFO)
 
@@ -48,3 +56,133 @@ def jaccard_similarity(set1: Set[str], set2: Set[str]) -> float:
     score = len(intersection) / len(union) if union else 0.0
     logging.debug(f"Jaccard similarity: {score:.4f}")
     return score
+
+
+def cache_dir(*parts: str) -> str:
+    """
+    Return (and create) a directory under the shared VC Hunter cache root.
+
+    The root defaults to ~/.cache/vchunter and can be moved with the
+    VCHUNTER_CACHE_DIR environment variable. Every Streamlit session in the
+    same server process, and every process on the same machine, shares it.
+
+    Args:
+        *parts (str): Optional sub-directory components.
+
+    Returns:
+        str: Absolute path of the directory.
+    """
+    root = os.getenv("VCHUNTER_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "vchunter")
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+TRACKING_PARAM_PREFIXES = ("utm_", "gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "_hsenc", "_hsmi", "ref_src")
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so trivially different spellings share one cache key and one crawl slot.
+
+    - Lowercases scheme and host, drops default ports and fragments.
+    - Collapses repeated slashes and drops a trailing slash (except for the root path).
+    - Drops tracking parameters (utm_*, gclid, fbclid, ...) and sorts the rest.
+    - Uses "/" for an empty path.
+
+    Args:
+        url (str): The URL to normalize.
+
+    Returns:
+        str: Canonical URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = re.sub(r"/{2,}", "/", parts.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+              if not k.lower().startswith(TRACKING_PARAM_PREFIXES)]
+    return urlunsplit((scheme, host, path, urlencode(sorted(params)), ""))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Count (or estimate) OpenAI tokens in a string.
+
+    Uses tiktoken's cl100k_base encoding when tiktoken is installed, otherwise
+    assumes roughly four characters per token.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        int: Token count.
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut a string down to at most `max_tokens` tokens (see estimate_tokens).
+
+    Args:
+        text (str): The input text.
+        max_tokens (int): Token budget.
+
+    Returns:
+        str: The original text if it fits, otherwise its longest prefix that does.
+    """
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text or ""
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * 4]
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def chunk_text(text: str, max_tokens: int) -> list:
+    """
+    Split text into consecutive chunks of at most `max_tokens` tokens, breaking between
+    sentences where possible (see estimate_tokens).
+
+    Args:
+        text (str): The input text.
+        max_tokens (int): Token budget per chunk.
+
+    Returns:
+        list of str: Chunks in document order; empty for blank text.
+    """
+    chunks, current, current_tokens = [], [], 0
+    for sentence in _SENTENCE_END.split(text or ""):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = estimate_tokens(sentence)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        # A sentence longer than the budget is cut into budget-sized pieces
+        while tokens > max_tokens:
+            piece = truncate_to_tokens(sentence, max_tokens)
+            cut = piece.rfind(" ")
+            piece = piece[:cut] if cut > 0 else piece
+            chunks.append(piece)
+            sentence = sentence[len(piece):].strip()
+            tokens = estimate_tokens(sentence)
+        if sentence:
+            current.append(sentence)
+            current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
@@ -0,0 +1,164 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+
+import numpy as np
+
+from agents.utils import cache_dir
+from agents.vector_index import VectorIndex
+
+INDEX_FORMAT = 1
+
+
+def default_index_dir() -> str:
+    return os.getenv("VCHUNTER_INDEX_DIR") or cache_dir("vc_index")
+
+
+class VCIndex:
+    def __init__(self, summaries, embeddings, clusters, portfolios, portfolio_texts, relationships,
+                 company_names=None, company_embeddings=None, version=None, built_at=None):
+        """
+        Everything the VC half of the pipeline produces, independent of any founder document.
+
+        Args:
+            summaries (dict): {VC url: GPT summary}, in index order.
+            embeddings (np.ndarray): (n_vcs, dim) summary embeddings aligned with `summaries`.
+            clusters (list of dict): Categorizer output (cluster_id, description, members).
+            portfolios (dict): {VC url: [portfolio page URLs]}.
+            portfolio_texts (dict): {portfolio page URL: extracted text}.
+            relationships (dict): RelationshipAgent output ({"co_investment": [...]}).
+            company_names (list of str): Portfolio page URLs aligned with `company_embeddings`.
+            company_embeddings (np.ndarray): (n_companies, dim) portfolio page embeddings.
+            version (str): Identifier of this build; derived from the content when omitted.
+            built_at (float): Unix timestamp of the build.
+        """
+        self.summaries = summaries
+        self.embeddings = embeddings
+        self.clusters = clusters
+        self.portfolios = portfolios
+        self.portfolio_texts = portfolio_texts
+        self.relationships = relationships
+        self.company_names = company_names or []
+        self.company_embeddings = company_embeddings if company_embeddings is not None else np.empty((0, 0), dtype=np.float32)
+        self.built_at = built_at or time.time()
+        self.version = version or self._fingerprint()
+        self._vc_vector_index = None
+        self._company_vector_index = None
+
+    @property
+    def vc_names(self):
+        return list(self.summaries.keys())
+
+    @property
+    def cluster_map(self):
+        return {vc: c["cluster_id"] for c in self.clusters for vc in c["members"]}
+
+    @property
+    def company_to_vcs(self):
+        company_to_vcs = {}
+        for vc, companies in self.portfolios.items():
+            for company in companies:
+                company_to_vcs.setdefault(company, []).append(vc)
+        return company_to_vcs
+
+    @property
+    def vc_vector_index(self) -> VectorIndex:
+        if self._vc_vector_index is None:
+            self._vc_vector_index = VectorIndex.build(self.vc_names, self.embeddings, mode="ivf")
+        return self._vc_vector_index
+
+    @property
+    def company_vector_index(self) -> VectorIndex:
+        if self._company_vector_index is None:
+            self._company_vector_index = VectorIndex.build(self.company_names, self.company_embeddings, mode="ivf")
+        return self._company_vector_index
+
+    def _fingerprint(self) -> str:
+        digest = hashlib.sha256(json.dumps(self.summaries, sort_keys=True).encode("utf-8")).hexdigest()[:8]
+        return time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(self.built_at)) + f"-{digest}"
+
+    def save(self, root=None) -> str:
+        """Write the index to <root>/<version>/ and point <root>/LATEST at it. Returns the version directory."""
+        root = root or default_index_dir()
+        final_dir = os.path.join(root, self.version)
+        tmp_dir = final_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+
+        np.save(os.path.join(tmp_dir, "embeddings.npy"), np.asarray(self.embeddings, dtype=np.float32))
+        np.save(os.path.join(tmp_dir, "company_embeddings.npy"), np.asarray(self.company_embeddings, dtype=np.float32))
+        meta = {
+            "format": INDEX_FORMAT,
+            "version": self.version,
+            "built_at": self.built_at,
+            "summaries": self.summaries,
+            "clusters": self.clusters,
+            "portfolios": self.portfolios,
+            "portfolio_texts": self.portfolio_texts,
+            "relationships": self.relationships,
+            "company_names": self.company_names,
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        self.vc_vector_index.save(os.path.join(tmp_dir, "vc_vectors"))
+        self.company_vector_index.save(os.path.join(tmp_dir, "company_vectors"))
+
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(tmp_dir, final_dir)
+        with open(os.path.join(root, "LATEST.tmp"), "w") as f:
+            f.write(self.version)
+        os.replace(os.path.join(root, "LATEST.tmp"), os.path.join(root, "LATEST"))
+        logging.info(f"💾 Saved VC index {self.version} ({len(self.summaries)} firms) to {final_dir}")
+        return final_dir
+
+    @classmethod
+    def load(cls, root=None, version=None):
+        """
+        Load a saved index (the LATEST one by default). Returns None when nothing has been built yet
+        or the files are unreadable, so callers fall back to building the VC data live.
+        """
+        root = root or default_index_dir()
+        try:
+            if version is None:
+                with open(os.path.join(root, "LATEST")) as f:
+                    version = f.read().strip()
+            directory = os.path.join(root, version)
+            with open(os.path.join(directory, "meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:  # ValueError covers JSON and text decode errors
+            logging.error(f"❌ VC index {version or 'LATEST'} in {root} is unreadable: {e}")
+            return None
+        if not isinstance(meta, dict) or meta.get("format") != INDEX_FORMAT:
+            found = meta.get("format") if isinstance(meta, dict) else None
+            logging.warning(f"⚠️ VC index {version} has format {found}, expected {INDEX_FORMAT}")
+            return None
+
+        try:
+            index = cls(
+                summaries=meta["summaries"],
+                embeddings=np.load(os.path.join(directory, "embeddings.npy"), mmap_mode="r"),
+                clusters=meta["clusters"],
+                portfolios=meta["portfolios"],
+                portfolio_texts=meta["portfolio_texts"],
+                relationships=meta["relationships"],
+                company_names=meta["company_names"],
+                company_embeddings=np.load(os.path.join(directory, "company_embeddings.npy"), mmap_mode="r"),
+                version=meta["version"],
+                built_at=meta["built_at"],
+            )
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            logging.error(f"❌ VC index {version} in {root} is incomplete or corrupt: {e}")
+            return None
+
+        # The search structures are derived data: if one is damaged it is rebuilt from the embeddings on first use
+        for attr, name in (("_vc_vector_index", "vc_vectors"), ("_company_vector_index", "company_vectors")):
+            try:
+                setattr(index, attr, VectorIndex.load(os.path.join(directory, name)))
+            except (OSError, ValueError, KeyError, EOFError) as e:
+                logging.warning(f"⚠️ VC index {version}: {name} unreadable ({e}); rebuilding it when first used")
+        return index
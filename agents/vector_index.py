@@ -0,0 +1,276 @@
+# vector_index.py — Cosine top-k index with an exact float32 mode and an IVF (inverted file) mode
+
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def _top_k(scores, k):
+    """Indices of the k largest scores, best first, via argpartition instead of a full sort."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _kmeans(vectors, n_lists, iterations=10, seed=42):
+    """Spherical k-means (unit vectors, dot-product assignment) in plain NumPy."""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), n_lists * 64), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = sample[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class VectorIndex:
+    def __init__(self, mode="exact", n_lists=None, n_probe=8, min_train_size=1024):
+        """
+        Cosine-similarity top-k index over unit-normalized float32 vectors.
+
+        Args:
+            mode (str): "exact" scans every vector with one matrix-vector product and argpartition.
+                "ivf" clusters vectors into `n_lists` inverted lists and only scans the `n_probe`
+                lists closest to the query (approximate).
+            n_lists (int | None): Number of IVF lists; defaults to ~sqrt(n) at training time.
+            n_probe (int): Lists scanned per query in IVF mode.
+            min_train_size (int): IVF indexes smaller than this are searched exactly.
+        """
+        self.mode = mode
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size
+        self.ids = []
+        self._id_rows = {}
+        self._vectors = np.empty((0, 0), dtype=np.float32)
+        self._size = 0
+        self.centroids = None
+        self._assign = np.empty(0, dtype=np.int32)
+        self._lists = []
+        self._trained_size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def vectors(self):
+        return self._vectors[:self._size]
+
+    def add(self, ids, vectors):
+        """Insert (or overwrite) vectors. IVF lists are updated in place and retrained when the index has grown 4×."""
+        vectors = _normalize(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        if self._size == 0 and self._vectors.shape[1] != vectors.shape[1]:
+            self._vectors = np.empty((0, vectors.shape[1]), dtype=np.float32)
+
+        new_rows = []
+        for id_, vec in zip(ids, vectors):
+            row = self._id_rows.get(id_)
+            if row is None:
+                row = self._append(vec)
+                self._id_rows[id_] = row
+                self.ids.append(id_)
+                new_rows.append(row)
+            else:
+                self._vectors[row] = vec
+                if self.centroids is not None:
+                    self._reassign(row)
+
+        if self.mode == "ivf":
+            if self.centroids is None or self._size >= 4 * self._trained_size:
+                if self._size >= self.min_train_size:
+                    self.train()
+            else:
+                for row in new_rows:
+                    self._reassign(row)
+
+    def _append(self, vec):
+        if self._size == len(self._vectors):
+            capacity = max(1024, 2 * len(self._vectors))
+            grown = np.empty((capacity, len(vec)), dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        self._vectors[self._size] = vec
+        self._size += 1
+        return self._size - 1
+
+    def _reassign(self, row):
+        if row < len(self._assign):
+            old = self._assign[row]
+            self._lists[old] = self._lists[old][self._lists[old] != row]
+        else:
+            self._assign = np.concatenate([self._assign, np.full(row + 1 - len(self._assign), -1, dtype=np.int32)])
+        c = int(np.argmax(self.centroids @ self._vectors[row]))
+        self._assign[row] = c
+        self._lists[c] = np.append(self._lists[c], row)
+
+    def train(self):
+        """(Re)build IVF centroids and inverted lists from the current vectors."""
+        start = time.perf_counter()
+        vectors = self.vectors
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        self.centroids = _kmeans(vectors, min(n_lists, len(vectors)))
+        self._assign = np.empty(len(vectors), dtype=np.int32)
+        for s in range(0, len(vectors), 65536):
+            self._assign[s:s + 65536] = np.argmax(vectors[s:s + 65536] @ self.centroids.T, axis=1)
+        order = np.argsort(self._assign, kind="stable")
+        bounds = np.searchsorted(self._assign[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(self.centroids))]
+        self._trained_size = len(vectors)
+        logging.info(f"🗂️ Trained IVF index: {len(vectors)} vectors, {len(self.centroids)} lists in {time.perf_counter() - start:.2f}s")
+
+    def search(self, query, k=10, n_probe=None):
+        """
+        Return up to k (id, cosine score) pairs, best first.
+
+        Args:
+            query (np.ndarray): Query vector.
+            k (int | None): Number of results; None returns every indexed vector ranked.
+            n_probe (int | None): Overrides the index's n_probe for this query.
+        """
+        if self._size == 0:
+            return []
+        q = _normalize(query)[0]
+        k = self._size if k is None else k
+
+        # A full ranking needs every vector, not just the probed lists, so it is always an exact scan
+        if self.mode == "ivf" and self.centroids is not None and k < self._size:
+            probes = _top_k(self.centroids @ q, n_probe or self.n_probe)
+            rows = np.concatenate([self._lists[c] for c in probes])
+            scores = self._vectors[rows] @ q
+            best = _top_k(scores, k)
+            return [(self.ids[rows[i]], float(scores[i])) for i in best]
+
+        scores = self.vectors @ q
+        return [(self.ids[i], float(scores[i])) for i in _top_k(scores, k)]
+
+    def search_batch(self, queries, k=10, block_size=1024):
+        """
+        Exact top-k for many queries at once: one (block × n) matrix product per `block_size`
+        queries instead of one matrix-vector product (or IVF probe) per query.
+
+        Args:
+            queries (np.ndarray): (n_queries, dim) query vectors.
+            k (int | None): Results per query; None returns every indexed vector ranked.
+            block_size (int): Queries scored per matrix product, bounding the score matrix's memory.
+
+        Returns:
+            list of list: Up to k (id, cosine score) pairs per query, best first.
+        """
+        queries = _normalize(queries)
+        if self._size == 0:
+            return [[] for _ in range(len(queries))]
+        k = self._size if k is None else k
+        results = []
+        for start in range(0, len(queries), block_size):
+            scores = queries[start:start + block_size] @ self.vectors.T
+            for row in scores:
+                results.append([(self.ids[i], float(row[i])) for i in _top_k(row, k)])
+        return results
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "vectors.npy"), self.vectors)
+        if self.centroids is not None:
+            np.save(os.path.join(directory, "centroids.npy"), self.centroids)
+            np.save(os.path.join(directory, "assign.npy"), self._assign[:self._size])
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump({"mode": self.mode, "n_lists": self.n_lists, "n_probe": self.n_probe,
+                       "min_train_size": self.min_train_size, "trained_size": self._trained_size,
+                       "ids": self.ids}, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Load a saved index, or return None if `directory` does not hold one."""
+        try:
+            with open(os.path.join(directory, "index.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        index = cls(mode=meta["mode"], n_lists=meta["n_lists"], n_probe=meta["n_probe"],
+                    min_train_size=meta["min_train_size"])
+        index.ids = meta["ids"]
+        index._id_rows = {id_: i for i, id_ in enumerate(index.ids)}
+        index._vectors = np.load(os.path.join(directory, "vectors.npy"))
+        index._size = len(index._vectors)
+        centroids_path = os.path.join(directory, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index.centroids = np.load(centroids_path)
+            index._assign = np.load(os.path.join(directory, "assign.npy"))
+            index._lists = [np.flatnonzero(index._assign == c) for c in range(len(index.centroids))]
+            index._trained_size = meta["trained_size"]
+        return index
+
+    @classmethod
+    def build(cls, ids, vectors, **kwargs):
+        index = cls(**kwargs)
+        if len(ids):
+            index.add(list(ids), vectors)
+        return index
+
+
+def benchmark(vectors, queries, k=10, n_lists=None, n_probes=(1, 2, 4, 8, 16, 32)):
+    """
+    Recall@k and per-query latency of IVF search at several n_probe values, against exact search.
+
+    Returns:
+        list of dict: {"mode", "n_probe", "recall", "latency_ms"} rows, exact search first.
+    """
+    ids = list(range(len(vectors)))
+    exact = VectorIndex.build(ids, vectors, mode="exact")
+    ivf = VectorIndex.build(ids, vectors, mode="ivf", n_lists=n_lists, min_train_size=1)
+
+    start = time.perf_counter()
+    truth = [{i for i, _ in exact.search(q, k)} for q in queries]
+    rows = [{"mode": "exact", "n_probe": None, "recall": 1.0,
+             "latency_ms": round(1000 * (time.perf_counter() - start) / len(queries), 3)}]
+
+    for n_probe in n_probes:
+        if n_probe > len(ivf.centroids):
+            break
+        start = time.perf_counter()
+        found = [{i for i, _ in ivf.search(q, k, n_probe=n_probe)} for q in queries]
+        latency = 1000 * (time.perf_counter() - start) / len(queries)
+        recall = float(np.mean([len(f & t) / len(t) for f, t in zip(found, truth)]))
+        rows.append({"mode": "ivf", "n_probe": n_probe, "recall": round(recall, 4), "latency_ms": round(latency, 3)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs latency benchmark for VectorIndex on synthetic clustered data.")
+    parser.add_argument("--n", type=int, default=100_000, help="Indexed vectors")
+    parser.add_argument("--dim", type=int, default=256, help="Vector dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Top-k")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(8, args.n // 500), args.dim)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=args.n)] + 0.5 * rng.normal(size=(args.n, args.dim)).astype(np.float32)
+    queries = vectors[rng.integers(args.n, size=args.queries)] + 0.1 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    for row in benchmark(vectors, queries, k=args.k):
+        print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,191 @@
-import matplotlib.pyplot as plt
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
 import seaborn as sns
 import networkx as nx
 import numpy as np
+from matplotlib.figure import Figure
+from sklearn.decomposition import PCA
 from sklearn.manifold import TSNE
 from sklearn.preprocessing import LabelEncoder
 import logging
 
+# Rendered images shared by every session in the process, keyed on the input data
+_render_cache = OrderedDict()
+_render_lock = threading.Lock()
+
+
+class LazyVisuals(Mapping):
+    """
+    Read-only {"cluster_map", "heatmap", "network"} mapping whose values are rendered to
+    image bytes on first access. Holds only the inputs and a content key, never a Figure.
+    """
+
+    def __init__(self, agent, key, inputs):
+        self._agent = agent
+        self._key = key
+        self._inputs = inputs
+
+    def __getitem__(self, name):
+        if name not in VisualizationAgent.CHARTS:
+            raise KeyError(name)
+        return self._agent.render(name, self._key, self._inputs)
+
+    def __iter__(self):
+        return iter(VisualizationAgent.CHARTS)
+
+    def __len__(self):
+        return len(VisualizationAgent.CHARTS)
+
 
 class VisualizationAgent:
+    CHARTS = ("cluster_map", "heatmap", "network")
+
+    def __init__(self, fmt="png", dpi=100, tsne_limit=300, heatmap_limit=50, network_edge_limit=500, cache_size=64):
+        """
+        Args:
+            fmt (str): Image format, "png" or "svg".
+            dpi (int): Raster resolution for PNG output.
+            tsne_limit (int): Above this many firms the cluster map uses PCA instead of t-SNE.
+            heatmap_limit (int): Max firms shown in the heatmap (the most connected ones are kept).
+            network_edge_limit (int): Max edges drawn in the network graph (the strongest ones are kept).
+            cache_size (int): Rendered images kept in the process-wide cache.
+        """
+        self.fmt = fmt
+        self.dpi = dpi
+        self.tsne_limit = tsne_limit
+        self.heatmap_limit = heatmap_limit
+        self.network_edge_limit = network_edge_limit
+        self.cache_size = cache_size
+
     def plot_all(self, embeddings, names, clusters, relationship_map):
         """
-        Generate visualizations:
-            - TSNE VC cluster scatter plot
+        Prepare visualizations without rendering anything yet:
+            - TSNE (or PCA for large inputs) VC cluster scatter plot
             - Heatmap of Jaccard scores
             - Network graph of co-investment relationships
 
         Args:
-            embeddings (list of np.ndarray): VC embeddings
+            embeddings (np.ndarray): VC embeddings, aligned with `names`
             names (list of str): VC firm names
             clusters (list of dict): Cluster objects with cluster_id and members
             relationship_map (dict): Map with relationship types and relationship lists
 
         Returns:
-            dict: Dict of matplotlib figures { "cluster_map", "heatmap", "network" }
+            LazyVisuals: Mapping of { "cluster_map", "heatmap", "network" } to image bytes
+            (None for a chart that failed), rendered on first access and cached.
         """
-        visuals = {}
-
-        try:
-            # Build color labels
-            labels = [f"Cluster {c['cluster_id']}" for c in clusters for _ in c["members"]]
-            flat_names = [name for c in clusters for name in c["members"]]
-            le = LabelEncoder()
-            color_labels = le.fit_transform(labels)
-
-            # TSNE 2D embedding
-            tsne = TSNE(n_components=2, perplexity=5, random_state=42, n_iter=1000)
-            reduced = tsne.fit_transform(embeddings)
-
-            fig1, ax1 = plt.subplots(figsize=(10, 7))
-            scatter = ax1.scatter(reduced[:, 0], reduced[:, 1], c=color_labels, s=100, cmap='tab10')
-            for i, txt in enumerate(flat_names):
-                ax1.annotate(txt[:10], (reduced[i, 0], reduced[i, 1]), fontsize=7)
-            ax1.set_title("VC Cluster Map")
-            visuals["cluster_map"] = fig1
-
-        except Exception as e:
-            logging.warning(f"❌ TSNE plot generation failed: {e}")
-
+        key = self._fingerprint(embeddings, names, clusters, relationship_map)
+        return LazyVisuals(self, key, (embeddings, names, clusters, relationship_map))
+
+    def _fingerprint(self, embeddings, names, clusters, relationship_map):
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+        digest.update(json.dumps([names, clusters, relationship_map], sort_keys=True, default=str).encode("utf-8"))
+        digest.update(f"{self.fmt}:{self.dpi}:{self.tsne_limit}:{self.heatmap_limit}:{self.network_edge_limit}".encode())
+        return digest.hexdigest()
+
+    def render(self, name, key, inputs):
+        cache_key = (key, name)
+        with _render_lock:
+            if cache_key in _render_cache:
+                _render_cache.move_to_end(cache_key)
+                return _render_cache[cache_key]
+
+        draw = {"cluster_map": self._draw_cluster_map, "heatmap": self._draw_heatmap, "network": self._draw_network}[name]
+        image = None
         try:
-            # Heatmap
-            n = len(names)
-            matrix = np.zeros((n, n))
-            name_idx = {name: i for i, name in enumerate(names)}
-
-            for rel_type, pairs in relationship_map.items():
-                for p in pairs:
-                    i, j = name_idx.get(p["firm_a"]), name_idx.get(p["firm_b"])
-                    if i is not None and j is not None:
-                        matrix[i][j] = p["score"]
-                        matrix[j][i] = p["score"]
-
-            fig2, ax2 = plt.subplots(figsize=(10, 8))
-            sns.heatmap(matrix, xticklabels=names, yticklabels=names, cmap="coolwarm", ax=ax2)
-            ax2.set_title("VC Relationship Heatmap")
-            visuals["heatmap"] = fig2
-
+            fig = draw(*inputs)
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=self.fmt, dpi=self.dpi, bbox_inches="tight")
+            fig.clear()
+            image = buffer.getvalue()
         except Exception as e:
-            logging.warning(f"❌ Heatmap generation failed: {e}")
-
+            logging.warning(f"❌ {name} generation failed: {e}")
+
+        with _render_lock:
+            _render_cache[cache_key] = image
+            while len(_render_cache) > self.cache_size:
+                _render_cache.popitem(last=False)
+        return image
+
+    def _project(self, embeddings):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings) > self.tsne_limit:
+            return PCA(n_components=2, svd_solver="randomized", random_state=42).fit_transform(embeddings)
+        perplexity = min(5, len(embeddings) - 1)
         try:
-            # Network Graph
-            G = nx.Graph()
-            for rel_type, pairs in relationship_map.items():
-                for rel in pairs:
-                    if rel["score"] > 0.0:
-                        G.add_edge(rel["firm_a"], rel["firm_b"], weight=rel["score"])
-
-            fig3, ax3 = plt.subplots(figsize=(12, 8))
-            pos = nx.spring_layout(G, k=0.5, seed=42)
-            nx.draw(G, pos, with_labels=True, node_size=700, font_size=8, width=1.0, ax=ax3)
-            ax3.set_title("VC Relationship Network")
-            visuals["network"] = fig3
-
-        except Exception as e:
-            logging.warning(f"❌ Network graph generation failed: {e}")
-
-        return visuals
+            tsne = TSNE(n_components=2, perplexity=perplexity, random_state=42, max_iter=1000)
+        except TypeError:  # scikit-learn < 1.5 calls it n_iter
+            tsne = TSNE(n_components=2, perplexity=perplexity, random_state=42, n_iter=1000)
+        return tsne.fit_transform(embeddings)
+
+    def _draw_cluster_map(self, embeddings, names, clusters, relationship_map):
+        # Build color labels aligned with the embedding rows
+        cluster_of = {name: c["cluster_id"] for c in clusters for name in c["members"]}
+        labels = [f"Cluster {cluster_of.get(name, 'N/A')}" for name in names]
+        color_labels = LabelEncoder().fit_transform(labels)
+
+        reduced = self._project(embeddings)
+        method = "PCA" if len(reduced) > self.tsne_limit else "t-SNE"
+
+        fig = Figure(figsize=(10, 7))
+        ax1 = fig.subplots()
+        ax1.scatter(reduced[:, 0], reduced[:, 1], c=color_labels, s=100 if len(reduced) <= self.tsne_limit else 10, cmap='tab10')
+        if len(reduced) <= self.tsne_limit:
+            for i, txt in enumerate(names):
+                ax1.annotate(txt[:10], (reduced[i, 0], reduced[i, 1]), fontsize=7)
+        ax1.set_title(f"VC Cluster Map ({method})")
+        return fig
+
+    def _draw_heatmap(self, embeddings, names, clusters, relationship_map):
+        name_idx = {name: i for i, name in enumerate(names)}
+        pairs = [p for rel_pairs in relationship_map.values() for p in rel_pairs
+                 if p["firm_a"] in name_idx and p["firm_b"] in name_idx]
+
+        shown = list(names)
+        if len(names) > self.heatmap_limit:
+            # Keep the firms with the most total overlap
+            strength = np.zeros(len(names))
+            for p in pairs:
+                strength[name_idx[p["firm_a"]]] += p["score"]
+                strength[name_idx[p["firm_b"]]] += p["score"]
+            keep = np.sort(np.argsort(-strength, kind="stable")[:self.heatmap_limit])
+            shown = [names[i] for i in keep]
+
+        shown_idx = {name: i for i, name in enumerate(shown)}
+        matrix = np.zeros((len(shown), len(shown)))
+        for p in pairs:
+            i, j = shown_idx.get(p["firm_a"]), shown_idx.get(p["firm_b"])
+            if i is not None and j is not None:
+                matrix[i][j] = p["score"]
+                matrix[j][i] = p["score"]
+
+        fig = Figure(figsize=(10, 8))
+        ax2 = fig.subplots()
+        sns.heatmap(matrix, xticklabels=shown, yticklabels=shown, cmap="coolwarm", ax=ax2)
+        title = "VC Relationship Heatmap"
+        if len(shown) < len(names):
+            title += f" (top {len(shown)} of {len(names)} firms)"
+        ax2.set_title(title)
+        return fig
+
+    def _draw_network(self, embeddings, names, clusters, relationship_map):
+        edges = [rel for pairs in relationship_map.values() for rel in pairs if rel["score"] > 0.0]
+        if len(edges) > self.network_edge_limit:
+            edges = sorted(edges, key=lambda rel: rel["score"], reverse=True)[:self.network_edge_limit]
+
+        G = nx.Graph()
+        for rel in edges:
+            G.add_edge(rel["firm_a"], rel["firm_b"], weight=rel["score"])
+
+        fig = Figure(figsize=(12, 8))
+        ax3 = fig.subplots()
+        pos = nx.spring_layout(G, k=0.5, seed=42)
+        nx.draw(G, pos, with_labels=G.number_of_nodes() <= 100, node_size=700, font_size=8, width=1.0, ax=ax3)
+        ax3.set_title("VC Relationship Network")
+        return fig
@@ -1,27 +1,105 @@
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-import tldextract
 import logging
+import time
+from urllib.parse import urlsplit
+from agents.crawl_engine import HostThrottle
+from agents.http_cache import get_http_cache
+from agents.html_extract import extract
+from agents.site_crawler import (
+    CrawlFrontier, RobotsCache, PORTFOLIO_KEYWORDS, NON_COMPANY_DOMAINS, USER_AGENT, crawlable_link, registered_domain
+)
+from agents.utils import canonicalize_url
 
 class VCWebsiteScraperAgent:
-    def __init__(self, keywords=None):
+    def __init__(self, keywords=None, cache=None, max_paragraphs=15, max_bytes=2_000_000, session=None,
+                 max_pages=6, max_seconds=20.0, max_depth=2, max_portfolio_links=30, throttle=None, robots=None):
+        """
+        Crawls one VC site per call: the homepage plus the most promising same-site pages.
+
+        Args:
+            keywords (list of str): Path keywords in priority order for the crawl frontier.
+            cache (HTTPCache | None): Page cache; defaults to the process-wide one.
+            max_paragraphs (int): <p> texts kept across all crawled pages (homepage first).
+            max_bytes (int): Markup parsed per page.
+            session: requests.Session used for fetching.
+            max_pages (int): Per-VC fetch budget, homepage included.
+            max_seconds (float): Per-VC time budget; no new page is started after it.
+            max_depth (int): Link depth followed from the homepage.
+            max_portfolio_links (int): Portfolio company links returned.
+            throttle (HostThrottle | None): Per-host politeness gate shared with the enricher.
+            robots (RobotsCache | None): robots.txt cache; one is created over `cache` by default.
+        """
         self.keywords = keywords or ["portfolio", "companies", "investments", "our-companies", "team", "about"]
+        self.cache = cache or get_http_cache()
+        self.max_paragraphs = max_paragraphs
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+        self.max_portfolio_links = max_portfolio_links
+        self.throttle = throttle or HostThrottle(1.0)
+        self.robots = robots or RobotsCache(self.cache, self.session)
+
+    @staticmethod
+    def _is_company_profile(url):
+        # e.g. /portfolio/acme: a page *under* a portfolio listing describes one company
+        segments = [s for s in urlsplit(url).path.lower().split("/") if s]
+        return len(segments) >= 2 and any(k in s for s in segments[:-1] for k in PORTFOLIO_KEYWORDS)
+
+    @staticmethod
+    def _add_company(companies, key, link, weight):
+        # One entry per company; links seen on portfolio-like pages rank first, then discovery order
+        if key not in companies:
+            companies[key] = (-weight, len(companies), link)
+        elif -weight < companies[key][0]:
+            companies[key] = (-weight, companies[key][1], link)
 
     def scrape(self, url):
         try:
-            res = requests.get(url, timeout=10, headers={"User-Agent": "Mozilla/5.0"})
-            soup = BeautifulSoup(res.text, "html.parser")
+            start = time.monotonic()
+            site = registered_domain(url)
+            frontier = CrawlFrontier(self.keywords)
+            frontier.push(url, 0)
+            paragraphs, companies = [], {}
+            stats = {"fetched": 0, "robots_blocked": 0, "failed": 0}
+
+            while len(frontier) and stats["fetched"] < self.max_pages and time.monotonic() - start < self.max_seconds:
+                page_url, depth, weight = frontier.pop()
+                if not self.robots.allowed(page_url):
+                    stats["robots_blocked"] += 1
+                    continue
+                stats["fetched"] += 1
+                res = self.cache.get(self.session, page_url, timeout=10, headers={"User-Agent": USER_AGENT},
+                                     throttle=self.throttle)
+                if res.status_code != 200:
+                    stats["failed"] += 1
+                    continue
+                page = extract(res.text, max_text_chars=0, max_paragraphs=self.max_paragraphs, max_bytes=self.max_bytes)
+                paragraphs.extend(page["paragraphs"][:self.max_paragraphs - len(paragraphs)])
 
-            links = [urljoin(url, a["href"]) for a in soup.find_all("a", href=True)]
-            portfolio_links = [link for link in links if any(k in link.lower() for k in self.keywords)]
+                for href in page["links"]:
+                    link = crawlable_link(page_url, href)
+                    if link is None:
+                        continue
+                    domain = registered_domain(link)
+                    if domain == site:
+                        if self._is_company_profile(link):
+                            self._add_company(companies, canonicalize_url(link), link, weight)
+                        elif depth < self.max_depth and frontier.weight(link) > 0:
+                            frontier.push(link, depth + 1)
+                    elif domain and domain not in NON_COMPANY_DOMAINS:
+                        self._add_company(companies, domain, link, weight)
 
-            paragraphs = soup.find_all("p")
-            text_content = {i: p.get_text(strip=True) for i, p in enumerate(paragraphs[:15])}
+            ranked = sorted(companies.values())[:self.max_portfolio_links]
+            portfolio_links = list(dict.fromkeys(canonicalize_url(link) for _, _, link in ranked))
+            stats.update(seconds=round(time.monotonic() - start, 2), portfolio_links=len(portfolio_links))
+            logging.info(f"🕸️ Crawled {url}: {stats}")
 
             return {
-                "site_text": text_content,
-                "portfolio_links": list(set(portfolio_links))
+                "site_text": dict(enumerate(paragraphs)),
+                "portfolio_links": portfolio_links,
+                "crawl_stats": stats
             }
 
         except Exception as e:
@@ -1,18 +1,12 @@
 import os
 import logging
+import uuid
 import streamlit as st
 from dotenv import load_dotenv
 
-from agents.founder_doc_reader_and_orchestrator import VCHunterOrchestrator, FounderDocReaderAgent
-from agents.llm_embed_gap_match_chat import (
-    ChatbotAgent, FounderMatchAgent, EmbedderAgent, LLMSummarizerAgent, GapAnalysisAgent
-)
-from agents.categorizer_agent import CategorizerAgent
-from agents.relationship_agent import RelationshipAgent
-from agents.visualization_agent import VisualizationAgent
-from agents.similar_company_agent import SimilarCompanyAgent
-from agents.website_scraper_agent import VCWebsiteScraperAgent
-from agents.portfolio_enricher_agent import PortfolioEnricherAgent
+from agents.instrumentation import start_metrics_server
+from agents.registry import get_registry
+from agents.vc_index import VCIndex
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -21,11 +15,38 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 openai_api_key = os.getenv("OPENAI_API_KEY")
+# Opt-in bulk VC summarization: a faster model tier and/or several VCs per request (see AgentRegistry)
+registry_options = {"vc_model": os.getenv("VCHUNTER_VC_MODEL") or None,
+                    "vc_pack_size": int(os.getenv("VCHUNTER_VC_PACK_SIZE") or 1)}
+
+# Optional Prometheus endpoint (process-wide counters for crawl bytes, tokens, cache hit rates, stage time),
+# on loopback unless VCHUNTER_METRICS_HOST widens the bind (e.g. 0.0.0.0 for a remote scraper)
+metrics_port = os.getenv("VCHUNTER_METRICS_PORT")
+if metrics_port:
+    start_metrics_server(int(metrics_port), host=os.getenv("VCHUNTER_METRICS_HOST", "127.0.0.1"))
 
 # Streamlit UI setup
 st.set_page_config(page_title="VC Hunter", layout="wide")
 st.title("🧠 VC Hunter App")
 st.markdown("Upload one or more white papers to analyze startup fit, VC categories, co-investment networks, and portfolio signals.")
+show_profile = st.sidebar.checkbox("⏱️ Show run profile", value=False)
+founder_vector = st.sidebar.radio(
+    "🧩 Founder vector", ["summary", "chunks"],
+    format_func=lambda mode: {"summary": "GPT-4 summary", "chunks": "Whole document (faster)"}[mode],
+    help="Match on an embedding of the GPT-4 summary, or on pooled embeddings of the whole document "
+         "(the summary is then produced alongside, for display only).")
+
+@st.cache_resource
+def load_vc_index():
+    """Load the prebuilt VC index once per server process (see build_index.py)."""
+    return VCIndex.load()
+
+
+vc_index = load_vc_index()
+if vc_index:
+    st.caption(f"VC index {vc_index.version} · {len(vc_index.summaries)} firms")
+else:
+    st.warning("No prebuilt VC index found — each run will crawl VC sites from scratch. Run `python build_index.py` to build one.")
 
 # Session state setup
 if "founder_docs" not in st.session_state:
@@ -39,94 +60,168 @@ if uploaded_files:
     st.session_state["founder_docs"] = uploaded_files
     st.success(f"{len(uploaded_files)} document(s) uploaded.")
 
-# Run Analysis
-if st.button("🚀 Run Analysis") and st.session_state["founder_docs"] and openai_api_key:
-    try:
-        st.info("⏳ Running full intelligence pipeline... This may take 1–3 minutes.")
-        logger.info("🚀 Starting VC Hunter Analysis")
+# Result sections, in page order. Each renders from a (possibly partial) results dict into its own slot,
+# so a section can appear as soon as its stage finishes and be redrawn in place later.
+def render_founder_summary(results):
+    st.subheader("📝 Founder Summary")
+    st.write(results["founder_summary"])
 
-        # Initialize agents
-        reader = FounderDocReaderAgent()
-        summarizer = LLMSummarizerAgent(api_key=openai_api_key)
-        embedder = EmbedderAgent(api_key=openai_api_key)
-        categorizer = CategorizerAgent(api_key=openai_api_key)
-        relationship = RelationshipAgent
-        visualizer = VisualizationAgent()
-        matcher = FounderMatchAgent()
-        chatbot = ChatbotAgent(api_key=openai_api_key)
-        gap = GapAnalysisAgent()
-        scraper = VCWebsiteScraperAgent()
-        portfolio = PortfolioEnricherAgent()
-        similar = SimilarCompanyAgent(embedder=embedder)
-
-        agents = {
-            "scraper": scraper,
-            "portfolio": portfolio,
-            "summarizer": summarizer,
-            "embedder": embedder,
-            "categorizer": categorizer,
-            "relationship": relationship,
-            "visualizer": visualizer,
-            "matcher": matcher,
-            "chatbot": chatbot,
-            "gap": gap,
-            "similar": similar
-        }
-
-        orchestrator = VCHunterOrchestrator(agents)
-
-        # Combine all uploaded docs into one text blob
-        full_text = ""
-        for file in st.session_state["founder_docs"]:
-            extracted = reader.extract_text(file)
-            logger.info(f"📄 Extracted {len(extracted)} characters from uploaded file.")
-            full_text += extracted + "\n"
-
-        # Run orchestration
-        results = orchestrator.run(full_text)
-        st.session_state["results"] = results
-        st.success("✔️ Analysis complete.")
-        logger.info("✅ VC Hunter analysis completed successfully.")
 
-    except Exception as e:
-        logger.exception(f"❌ Pipeline execution failed: {e}")
-        st.error(f"Pipeline execution failed: {e}")
-        st.stop()
+def render_vc_summaries(results, limit=100):
+    summaries = results["vc_summary_map"]
+    with st.expander(f"🏦 {len(summaries)} VC firms summarized"):
+        for vc, summary in list(summaries.items())[-limit:]:
+            st.markdown(f"- **{vc}**: {summary[:300]}")
+        if len(summaries) > limit:
+            st.caption(f"…and {len(summaries) - limit} more")
 
-# Show results
-results = st.session_state.get("results")
-if results:
-    st.subheader("📝 Founder Summary")
-    st.write(results["founder_summary"])
 
+def render_clusters(results):
     st.subheader("📊 VC Clustering")
     for cluster in results["clusters"]:
         st.markdown(f"**Cluster {cluster['cluster_id']}:** {cluster['description']}")
         st.markdown(", ".join(cluster["members"]))
 
+
+def render_visuals(results):
     st.subheader("🧭 Visual Intelligence")
-    for title, fig in results["visuals"].items():
-        st.pyplot(fig)
+    for title, image in results["visuals"].items():
+        if image:
+            st.image(image, caption=title.replace("_", " ").title())
 
+
+def render_relationships(results):
     st.subheader("🤝 VC Co-Investment & Relationships")
     for r in results["relationships"]["co_investment"][:10]:
         st.markdown(f"- **{r['firm_a']}** and **{r['firm_b']}** → {r['type']} (Jaccard: {r['score']}, Cosine: {r['cosine_similarity']})")
 
+
+def render_matches(results):
     st.subheader("💡 Top VC Matches")
     for match in results["matches"]:
         st.markdown(f"- **{match['vc']}** | Score: {match['score']} | Cluster: {match['cluster']}")
 
+
+def render_similar_companies(results):
     st.subheader("🔍 Similar Portfolio Companies")
     for item in results["similar_companies"]:
         st.markdown(f"- **{item['company_url']}** backed by: {', '.join(item['invested_vcs'])} (Score: {item['similarity_score']})")
 
+
+def render_gap(results):
     st.subheader("🚪 Strategic Gap Opportunities")
     for gap_item in results["gap"]:
         st.markdown(f"- Cluster {gap_item['cluster']} | Similarity: {gap_item['similarity']}")
 
+
+SECTIONS = {
+    "founder_summary": render_founder_summary,
+    "vc_summary_map": render_vc_summaries,
+    "clusters": render_clusters,
+    "visuals": render_visuals,
+    "relationships": render_relationships,
+    "matches": render_matches,
+    "similar_companies": render_similar_companies,
+    "gap": render_gap,
+}
+# Orchestrator stage → results key it fills
+STAGE_SECTIONS = {"founder_summary": "founder_summary", "clusters": "clusters", "relationships": "relationships",
+                  "visuals": "visuals", "matches": "matches", "similar": "similar_companies", "gap": "gap"}
+
+
+def render(slot, key, results):
+    with slot.container():
+        SECTIONS[key](results)
+
+
+# Run Analysis
+run_clicked = st.button("🚀 Run Analysis") and st.session_state["founder_docs"] and openai_api_key
+status = st.empty()
+slots = {key: st.empty() for key in SECTIONS}
+
+if run_clicked:
+    try:
+        logger.info("🚀 Starting VC Hunter Analysis")
+        progress = status.progress(0.0, text="⏳ Reading your documents...")
+
+        # Shared agents are built once per server process; identical uploads hit the result cache
+        registry = get_registry(openai_api_key, **registry_options)
+        documents = [file.getvalue() for file in st.session_state["founder_docs"]]
+        partial = {"vc_summary_map": {}}
+        for event in registry.analyze_stream(documents, index=vc_index, founder_vector=founder_vector):
+            if event["type"] == "vc_summary":
+                if event["summary"]:
+                    partial["vc_summary_map"][event["vc"]] = event["summary"]
+                    render(slots["vc_summary_map"], "vc_summary_map", partial)
+                progress.progress(event["done"] / event["total"] * 0.5,
+                                  text=f"🌐 Crawled and summarized {event['done']}/{event['total']} VC firms")
+            elif event["type"] == "stage":
+                stage, key = event["stage"], STAGE_SECTIONS.get(event["stage"])
+                if key:
+                    partial[key] = event["result"]
+                    render(slots[key], key, partial)
+                elif stage == "vc_index":
+                    # A prebuilt index arrives whole: its clusters and relationships are ready at once
+                    partial.setdefault("clusters", event["result"].clusters)
+                    partial.setdefault("relationships", event["result"].relationships)
+                    for key in ("clusters", "relationships"):
+                        render(slots[key], key, partial)
+                # The crawl (when there is one) takes the first half of the bar
+                base = 0.5 if partial["vc_summary_map"] else 0.0
+                progress.progress(base + (1 - base) * event["completed"] / event["total"],
+                                  text=f"✔️ {stage.replace('_', ' ')} ({event['completed']}/{event['total']} stages)")
+            elif event["type"] == "done":
+                st.session_state["results"] = event["results"]
+
+        status.success("✔️ Analysis complete.")
+        logger.info("✅ VC Hunter analysis completed successfully.")
+
+    except Exception as e:
+        logger.exception(f"❌ Pipeline execution failed: {e}")
+        status.error(f"Pipeline execution failed: {e}")
+        st.stop()
+
+# Show results (redrawn in place over the live sections)
+results = st.session_state.get("results")
+if results:
+    results = {**results, "vc_summary_map": results["vc_index"].summaries}
+    for key, slot in slots.items():
+        render(slot, key, results)
+
+    trace = results.get("trace")
+    if show_profile and trace:
+        with st.expander(f"⏱️ Run profile · {trace['run_id']} · {trace['wall_seconds']}s", expanded=True):
+            stage_report = trace.get("stage_report") or {}
+            if stage_report.get("critical_path"):
+                st.markdown(f"**Critical path** ({stage_report['critical_path_seconds']}s): "
+                            + " → ".join(stage_report["critical_path"]))
+            st.markdown("**Time per agent / stage**")
+            st.table([{"span": name, **agg} for name, agg in
+                      sorted(trace["span_summary"].items(), key=lambda kv: -kv[1]["seconds"])])
+            if trace["tokens"]:
+                st.markdown("**LLM tokens**")
+                st.table([{"model": model, **usage} for model, usage in trace["tokens"].items()])
+            if trace["cache"]:
+                st.markdown("**Cache hit rates**")
+                st.table([{"cache": name, **c} for name, c in trace["cache"].items()])
+            if trace["http"]:
+                st.markdown("**Crawl bytes per host**")
+                st.table([{"host": host, **h} for host, h in
+                          sorted(trace["http"].items(), key=lambda kv: -kv[1]["bytes"])])
+
     st.subheader("💬 Ask About Your Profile")
+    if "chat_session" not in st.session_state:
+        st.session_state["chat_session"] = uuid.uuid4().hex
     user_question = st.text_input("Ask anything about your startup or the VC landscape...")
-    if user_question:
-        chatbot = ChatbotAgent(api_key=openai_api_key)  # Reinstantiating here ensures availability
-        response = chatbot.create(results["vc_summaries"], results["founder_summary"])
-        st.write(response)
+    if user_question and user_question != st.session_state.get("last_question"):
+        # Stream the answer as it is generated; follow-ups in this browser session reuse its context
+        chatbot = get_registry(openai_api_key, **registry_options).chatbot
+        placeholder, answer = st.empty(), ""
+        for token in chatbot.stream(user_question, results["vc_index"], results["founder_summary"],
+                                    session_id=st.session_state["chat_session"]):
+            answer += token
+            placeholder.markdown(answer)
+        st.session_state["last_question"], st.session_state["last_answer"] = user_question, answer
+    elif user_question:
+        # Streamlit reruns the script on every widget change; don't ask the same question twice
+        st.write(st.session_state.get("last_answer", ""))
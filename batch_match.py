@@ -0,0 +1,158 @@
+"""Score a directory of founder documents against a prebuilt VC index in one pass.
+
+Usage:
+    python batch_match.py DOCS_DIR [--out results.jsonl|results.parquet] [--index DIR] [--version V]
+                          [--workers N] [--top-k K] [--similar N] [--founder-vector chunks [--pooling attention]]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from agents.founder_doc_reader_and_orchestrator import FounderDocReaderAgent
+from agents.registry import AgentRegistry
+from agents.vc_index import VCIndex, default_index_dir
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DOCUMENT_EXTENSIONS = (".pdf", ".docx", ".txt", ".md")
+
+_reader = None
+
+
+def _init_reader():
+    # One reader (and documents.sqlite connection) per worker process; big PDFs stay in this process
+    global _reader
+    _reader = FounderDocReaderAgent(page_workers=1)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return _reader.extract_text(f.read())
+
+
+def find_documents(root):
+    """Founder documents under `root`, recursively, in a stable order."""
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        paths.extend(os.path.join(dirpath, name) for name in filenames if name.lower().endswith(DOCUMENT_EXTENSIONS))
+    return sorted(paths)
+
+
+def write_results(rows, path):
+    """JSONL by default; Parquet (nested columns kept as lists/structs) for a .parquet path."""
+    if path.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.Table.from_pylist(rows), path)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match many founder documents against one VC index.")
+    parser.add_argument("docs_dir", help="Directory of founder documents (.pdf, .docx, .txt, .md), searched recursively")
+    parser.add_argument("--out", default="matches.jsonl", help="Output file; .jsonl or .parquet (default: matches.jsonl)")
+    parser.add_argument("--index", default=None, help=f"Index root directory (default: {default_index_dir()})")
+    parser.add_argument("--version", default=None, help="Index version to load (default: latest)")
+    parser.add_argument("--workers", type=int, default=8, help="Documents read and summarized concurrently")
+    parser.add_argument("--top-k", type=int, default=10, help="VC matches kept per founder (0 keeps all)")
+    parser.add_argument("--similar", type=int, default=5, help="Similar portfolio companies kept per founder")
+    parser.add_argument("--founder-vector", choices=("summary", "chunks"), default="summary",
+                        help="Embed each founder's summary, or the whole document in chunks pooled into one vector")
+    parser.add_argument("--pooling", choices=("mean", "attention"), default="mean",
+                        help="Chunk pooling for --founder-vector chunks")
+    args = parser.parse_args()
+
+    if not args.out.endswith((".jsonl", ".parquet")):
+        parser.error("--out must end in .jsonl or .parquet")
+    if args.out.endswith(".parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+
+    load_dotenv()
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        parser.error("OPENAI_API_KEY is not set")
+
+    index = VCIndex.load(args.index, args.version)
+    if index is None:
+        parser.error("No VC index found; build one with build_index.py")
+
+    paths = find_documents(args.docs_dir)
+    if not paths:
+        parser.error(f"No founder documents found in {args.docs_dir}")
+
+    registry = AgentRegistry(openai_api_key)
+    summarizer, matcher = registry.agents["summarizer"], registry.agents["matcher"]
+    matcher.top_k = args.top_k or None
+    start = time.perf_counter()
+
+    # PDF parsing is pure Python, so documents are read in processes; summaries are API-bound, so threads
+    with ProcessPoolExecutor(max_workers=min(args.workers, os.cpu_count() or 1), initializer=_init_reader) as pool:
+        texts = list(pool.map(_read, paths))
+    logger.info(f"📄 Read {len(paths)} documents in {time.perf_counter() - start:.1f}s")
+
+    readable = [i for i, text in enumerate(texts) if text.strip() and not text.startswith("Error reading file")]
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        pending = pool.map(summarizer.summarize_founder, [texts[i] for i in readable])
+        if args.founder_vector == "chunks":
+            # Summaries are only shown in the output, so whole documents are embedded while they run
+            embedded = readable
+            founder_vecs = registry.embedder.embed_documents([texts[i] for i in readable], pooling=args.pooling)
+        summaries = dict(zip(readable, pending))
+    logger.info(f"🧠 Summarized {len(readable)} founders in {time.perf_counter() - start:.1f}s")
+
+    if args.founder_vector == "summary":
+        embedded = [i for i in readable if summaries[i]]
+        founder_vecs = registry.embedder.embed([summaries[i] for i in embedded])
+    if len(founder_vecs) != len(embedded):
+        logger.error("❌ Founder embedding failed; writing summaries only")
+        embedded, founder_vecs = [], founder_vecs[:0]
+
+    # Every founder against every VC (and portfolio company) in one matrix product each
+    matches = matcher.match_batch(founder_vecs, index.embeddings, index.vc_names, index.cluster_map)
+    gaps = registry.agents["gap"].detect_batch(founder_vecs, index.embeddings, [c["cluster_id"] for c in index.clusters])
+    similar = registry.agents["similar"].rank_batch(founder_vecs, index.company_names, index.company_embeddings,
+                                                    index.company_to_vcs, top_n=args.similar)
+    scored = {i: (matches[j], gaps[j], similar[j]) for j, i in enumerate(embedded)}
+
+    rows = []
+    for i, path in enumerate(paths):
+        row_matches, row_gap, row_similar = scored.get(i, ([], [], []))
+        error = None
+        if i not in summaries:
+            error = texts[i] if texts[i].startswith("Error reading file") else "No text extracted"
+        elif i not in scored:
+            error = "Summarization or embedding failed"
+        rows.append({
+            "document": os.path.relpath(path, args.docs_dir),
+            "index_version": index.version,
+            "founder_vector": args.founder_vector,
+            "summary": summaries.get(i, ""),
+            "top_vc": row_matches[0]["vc"] if row_matches else None,
+            "top_score": row_matches[0]["score"] if row_matches else None,
+            "matches": row_matches,
+            "gap": row_gap,
+            "similar_companies": row_similar,
+            "error": error,
+        })
+    # Best-matching founders first; unscored documents last
+    rows.sort(key=lambda r: -(r["top_score"] if r["top_score"] is not None else float("-inf")))
+
+    write_results(rows, args.out)
+    logger.info(f"✅ {len(scored)}/{len(paths)} founders matched against {len(index.vc_names)} VCs "
+                f"in {time.perf_counter() - start:.1f}s → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Offline benchmark harness: local stand-ins for the OpenAI API and VC websites, plus timed scenarios.
+
+Run with `python -m benchmarks.run --help`.
+"""
@@ -0,0 +1,217 @@
+# fake_openai.py — Deterministic OpenAI-compatible endpoint (chat completions and embeddings) for offline runs
+
+import base64
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from benchmarks.local_server import LocalServer, QuietHandler
+
+_WORD = re.compile(r"[a-z][a-z0-9]+")
+
+
+@lru_cache(maxsize=65536)
+def _word_vector(word, dim):
+    return np.random.default_rng(zlib.crc32(word.encode("utf-8"))).standard_normal(dim).astype(np.float32)
+
+
+def fake_embedding(text, dim=256) -> np.ndarray:
+    """
+    Hashed bag-of-words vector. Texts that share vocabulary land close together,
+    so clustering, matching and similarity search have real structure to find.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in _WORD.findall(text.lower()):
+        vector += _word_vector(word, dim)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else _word_vector("<empty>", dim) / np.linalg.norm(_word_vector("<empty>", dim))
+
+
+def fake_completion(messages, max_words=40) -> str:
+    """Deterministic 'summary': the prompt's most frequent content words, so downstream text stays on-topic."""
+    text = " ".join(m.get("content") or "" for m in messages if m.get("role") != "system").lower()
+    counts = Counter(w for w in _WORD.findall(text) if len(w) > 3)
+    top = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:max_words]
+    return "Focus areas: " + ", ".join(word for word, _ in top) + "."
+
+
+def fake_structured_completion(messages, keys) -> str:
+    """
+    JSON object answering a packed prompt: each key's value is `fake_completion` of the prompt text
+    from that key up to the next one, so every entry is summarized from its own section.
+    """
+    text = " ".join(m.get("content") or "" for m in messages if m.get("role") != "system")
+    starts = sorted((text.find(key), key) for key in keys if key in text)
+    bounds = [start for start, _ in starts[1:]] + [len(text)]
+    sections = {key: text[start:end] for (start, key), end in zip(starts, bounds)}
+    return json.dumps({key: fake_completion([{"content": sections.get(key, "")}]) for key in keys})
+
+
+def _tokens(text):
+    return len(text) // 4 + 1
+
+
+class _OpenAIHandler(QuietHandler):
+    def do_POST(self):
+        owner = self.server.owner
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        status, retry_after = owner.injected_error()
+        if status:
+            self.send_body(status, json.dumps({"error": {"message": f"injected {status}", "type": "bench"}}).encode("utf-8"),
+                           "application/json", {"Retry-After": str(retry_after)} if retry_after is not None else None)
+            return
+        if self.path.endswith("/chat/completions") and payload.get("stream"):
+            self.send_events(owner.chat_events(payload))
+            return
+        if self.path.endswith("/chat/completions"):
+            body = owner.chat(payload)
+        elif self.path.endswith("/embeddings"):
+            body = owner.embeddings(payload)
+        else:
+            self.send_body(404, b'{"error": {"message": "not found"}}', "application/json")
+            return
+        self.send_body(200, json.dumps(body).encode("utf-8"), "application/json")
+
+    def send_events(self, events):
+        # Server-sent events until [DONE]; the connection closes afterwards instead of using chunked encoding
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for event in events:
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client stopped reading (a cancelled stream)
+
+
+class FakeOpenAIServer(LocalServer):
+    handler_class = _OpenAIHandler
+
+    def __init__(self, chat_latency=0.05, embed_latency=0.02, latency_per_1k_tokens=0.0, dim=256,
+                 error_rate=0.0, seed=0, stream_token_latency=0.0, host="127.0.0.1", port=0):
+        """
+        Stand-in for the OpenAI REST API: point an `OpenAI(base_url=server.base_url)` client at it.
+
+        Args:
+            chat_latency (float): Seconds slept per chat completion.
+            embed_latency (float): Seconds slept per embeddings request (per batch, not per input).
+            latency_per_1k_tokens (float): Extra seconds per 1,000 prompt tokens, for both endpoints.
+            dim (int): Embedding dimensionality.
+            error_rate (float): Share of requests answered with a transient 429 or 500 instead.
+            seed (int): Seed for which requests fail.
+            stream_token_latency (float): Seconds between streamed tokens; `chat_latency` is the time to the first.
+        """
+        super().__init__(host, port)
+        self.chat_latency = chat_latency
+        self.embed_latency = embed_latency
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+        self.dim = dim
+        self.error_rate = error_rate
+        self.stream_token_latency = stream_token_latency
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scripted = []
+        self.counters = Counter()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def _count(self, **values):
+        with self._lock:
+            self.counters.update(values)
+
+    def fail_next(self, *statuses, retry_after=None):
+        """Answer the next requests with these statuses, in order, before any random `error_rate` failures."""
+        with self._lock:
+            self._scripted.extend((status, retry_after) for status in statuses)
+
+    def injected_error(self):
+        """(status, Retry-After seconds or None) failing this request (counted under "errors"), or (None, None)."""
+        with self._lock:
+            if self._scripted:
+                self.counters.update(errors=1)
+                return self._scripted.pop(0)
+            if not self.error_rate or self._random.random() >= self.error_rate:
+                return None, None
+            self.counters.update(errors=1)
+            return self._random.choice((429, 500)), None
+
+    def _sleep(self, base, prompt_tokens):
+        pause = base + self.latency_per_1k_tokens * prompt_tokens / 1000
+        if pause > 0:
+            time.sleep(pause)
+
+    def chat(self, payload):
+        messages = payload.get("messages", [])
+        prompt_tokens = sum(_tokens(m.get("content") or "") for m in messages)
+        schema = ((payload.get("response_format") or {}).get("json_schema") or {}).get("schema")
+        if schema:
+            content = fake_structured_completion(messages, list(schema.get("properties", {})))
+        else:
+            content = fake_completion(messages)
+        completion_tokens = _tokens(content)
+        self._sleep(self.chat_latency, prompt_tokens)
+        self._count(chat_requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        return {
+            "id": f"chatcmpl-bench-{zlib.crc32(content.encode('utf-8')):08x}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": payload.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def chat_events(self, payload):
+        """The same completion as `chat`, as streamed chunks (one per word) plus a final usage chunk."""
+        messages = payload.get("messages", [])
+        prompt_tokens = sum(_tokens(m.get("content") or "") for m in messages)
+        content = fake_completion(messages)
+        completion_tokens = _tokens(content)
+        self._sleep(self.chat_latency, prompt_tokens)
+        self._count(chat_streams=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        base = {"id": f"chatcmpl-bench-{zlib.crc32(content.encode('utf-8')):08x}", "object": "chat.completion.chunk",
+                "created": 0, "model": payload.get("model")}
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            if i and self.stream_token_latency:
+                time.sleep(self.stream_token_latency)
+            delta = {"role": "assistant", "content": word} if i == 0 else {"content": " " + word}
+            yield {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            yield {**base, "choices": [], "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                                    "total_tokens": prompt_tokens + completion_tokens}}
+
+    def embeddings(self, payload):
+        inputs = payload.get("input", [])
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        prompt_tokens = sum(_tokens(t) for t in inputs)
+        self._sleep(self.embed_latency, prompt_tokens)
+        self._count(embedding_requests=1, embedding_inputs=len(inputs), embedding_tokens=prompt_tokens)
+
+        as_base64 = payload.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(text, self.dim)
+            encoded = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii") if as_base64 else vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": encoded})
+        return {"object": "list", "data": data, "model": payload.get("model"),
+                "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens}}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
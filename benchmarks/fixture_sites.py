@@ -0,0 +1,191 @@
+# fixture_sites.py — Synthetic VC universe (firm sites, portfolio pages, company pages) served over local HTTP
+
+import hashlib
+import random
+import re
+import sys
+import threading
+
+from benchmarks.local_server import LocalServer, QuietHandler
+
+SECTORS = {
+    "fintech": ["payments", "lending", "banking", "ledger", "compliance", "underwriting", "treasury", "card",
+                "fraud", "wallet", "settlement", "brokerage"],
+    "health": ["clinical", "patients", "diagnostics", "therapeutics", "hospital", "genomics", "biotech",
+               "trials", "care", "pharmacy", "imaging", "telehealth"],
+    "climate": ["carbon", "solar", "battery", "grid", "hydrogen", "emissions", "storage", "electrification",
+                "recycling", "wind", "geothermal", "mobility"],
+    "devtools": ["developers", "observability", "deployment", "kubernetes", "testing", "compiler", "api",
+                 "databases", "runtime", "open-source", "infrastructure", "ci"],
+    "security": ["identity", "threat", "encryption", "endpoint", "zero-trust", "vulnerability", "firewall",
+                 "authentication", "privacy", "soc", "malware", "detection"],
+    "ai": ["models", "inference", "training", "agents", "gpus", "datasets", "vision", "language",
+           "embeddings", "retrieval", "robotics", "autonomy"],
+    "consumer": ["brands", "shoppers", "subscription", "creators", "community", "marketplace", "apparel",
+                 "beauty", "food", "gaming", "social", "retail"],
+    "enterprise": ["workflow", "sales", "procurement", "hr", "erp", "analytics", "collaboration", "crm",
+                   "automation", "finance", "legal", "operations"],
+}
+FILLER = ["we", "partner", "with", "founders", "building", "the", "future", "of", "early", "stage", "seed",
+          "series", "capital", "teams", "market", "global", "category", "leaders", "invest", "backing"]
+BOILERPLATE = ("© Synthetic Ventures. All rights reserved. Privacy policy · Terms of use · Cookie settings · "
+               "Subscribe to our newsletter for portfolio news and insights.")
+_SYLLABLES = ["ka", "lo", "mi", "ra", "ve", "zu", "no", "ti", "sa", "qu", "ex", "ly", "da", "po", "ri", "fen"]
+
+
+def _rng(*parts):
+    return random.Random(":".join(str(p) for p in parts))
+
+
+def _loopback(block, n):
+    """Distinct loopback address per site on Linux (the whole 127/8 is routed to lo), else 127.0.0.1."""
+    if not sys.platform.startswith("linux"):
+        return "127.0.0.1"
+    return f"127.{block + n // 62500}.{(n // 250) % 250}.{n % 250 + 1}"
+
+
+class FixtureUniverse:
+    def __init__(self, n_firms, seed=0, companies_per_firm=6, paragraphs=8):
+        """
+        Deterministic synthetic VC universe. Firms lean towards one or two sectors, back companies
+        from those sectors and share some of them, so clustering, co-investment and similarity
+        search see realistic structure.
+
+        Args:
+            n_firms (int): Number of VC firms (20, 200 and 2,000 in the standard scenarios).
+            seed (int): Seed for every generated name, page and portfolio.
+            companies_per_firm (int): Portfolio links on each firm's homepage.
+            paragraphs (int): Paragraphs of body text per page.
+        """
+        self.n_firms = n_firms
+        self.seed = seed
+        self.n_paragraphs = paragraphs
+        self.port = None
+        sectors = list(SECTORS)
+        rng = _rng(seed, "universe", n_firms)
+
+        n_companies = max(20, n_firms * companies_per_firm // 2)
+        self.companies = []
+        by_sector = {s: [] for s in sectors}
+        for j in range(n_companies):
+            sector = sectors[j % len(sectors)]
+            name = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+            company = {"id": j, "slug": f"{name.lower()}-{j}", "name": name, "sector": sector}
+            self.companies.append(company)
+            by_sector[sector].append(company)
+        self._companies_by_slug = {c["slug"]: c for c in self.companies}
+
+        self.firms = []
+        for i in range(n_firms):
+            primary = sectors[rng.randrange(len(sectors))]
+            secondary = rng.choice([s for s in sectors if s != primary])
+            pool = by_sector[primary] * 3 + by_sector[secondary]
+            portfolio = []
+            while len(portfolio) < min(companies_per_firm, len(set(c["id"] for c in pool))):
+                company = rng.choice(pool)
+                if company not in portfolio:
+                    portfolio.append(company)
+            self.firms.append({"id": i, "name": f"Synthetic Ventures {i}", "sectors": [primary, secondary],
+                               "portfolio": portfolio})
+
+    # URLs are only known once the server has a port
+    def firm_url(self, i):
+        return f"http://{_loopback(0, i)}:{self.port}/firm/{i}/"
+
+    def company_url(self, company):
+        return f"http://{_loopback(1, company['id'])}:{self.port}/companies/{company['slug']}"
+
+    @property
+    def vc_urls(self):
+        return [self.firm_url(i) for i in range(self.n_firms)]
+
+    def paragraphs(self, sectors, *seed_parts):
+        rng = _rng(self.seed, *seed_parts)
+        vocab = [w for s in sectors for w in SECTORS[s]]
+        out = []
+        for _ in range(self.n_paragraphs):
+            words = [rng.choice(vocab) if rng.random() < 0.45 else rng.choice(FILLER) for _ in range(rng.randint(25, 45))]
+            out.append(" ".join(words).capitalize() + ".")
+        return out
+
+    @staticmethod
+    def _page(title, paragraphs, links):
+        nav = "".join(f'<li><a href="{href}">{text}</a></li>' for href, text in links)
+        body = "".join(f"<p>{p}</p>" for p in paragraphs)
+        return (f"<!DOCTYPE html><html><head><title>{title}</title>"
+                f"<style>body {{ font-family: sans-serif; }} .hero {{ padding: 4rem; }}</style>"
+                f"<script>window.dataLayer = window.dataLayer || []; function gtag(){{dataLayer.push(arguments);}}</script>"
+                f"</head><body><nav><ul>{nav}</ul></nav><main><h1>{title}</h1>{body}</main>"
+                f"<footer><p>{BOILERPLATE}</p></footer></body></html>")
+
+    def render(self, path):
+        """HTML for a request path, or None for a 404."""
+        if path == "/robots.txt":
+            return "User-agent: *\nAllow: /\n"
+        match = re.fullmatch(r"/firm/(\d+)/(portfolio|about|team|news)?", path)
+        if match and int(match.group(1)) < self.n_firms:
+            firm = self.firms[int(match.group(1))]
+            page = match.group(2) or "home"
+            if page == "portfolio":
+                links = [(self.company_url(c), c["name"]) for c in firm["portfolio"]]
+                return self._page(f"{firm['name']} portfolio", [f"{c['name']} — {c['sector']}" for c in firm["portfolio"]], links)
+            links = [("portfolio", "Portfolio"), ("about", "About"), ("team", "Team"), ("news", "News")]
+            if page == "home":
+                links += [(self.company_url(c), c["name"]) for c in firm["portfolio"]]
+            return self._page(f"{firm['name']} {page}", self.paragraphs(firm["sectors"], "firm", firm["id"], page), links)
+        match = re.fullmatch(r"/companies/([\w-]+)", path)
+        if match and match.group(1) in self._companies_by_slug:
+            company = self._companies_by_slug[match.group(1)]
+            return self._page(company["name"], self.paragraphs([company["sector"]], "company", company["id"]), [])
+        return None
+
+
+class _FixtureHandler(QuietHandler):
+    def do_GET(self):
+        owner = self.server.owner
+        html = owner.universe.render(self.path.split("?", 1)[0])
+        if html is None:
+            self.send_body(404, b"not found", "text/plain")
+            return
+        body = html.encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            owner.count(0)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        owner.count(len(body))
+        content_type = "text/plain" if self.path == "/robots.txt" else "text/html; charset=utf-8"
+        self.send_body(200, body, content_type, {"ETag": etag, "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+
+class FixtureSiteServer(LocalServer):
+    handler_class = _FixtureHandler
+
+    def __init__(self, universe, port=0):
+        """
+        Serve a FixtureUniverse. On Linux every firm and company gets its own loopback address,
+        so per-host throttling behaves as it would on the real web; the server therefore binds
+        all interfaces there.
+
+        Args:
+            universe (FixtureUniverse): Sites to serve; its `port` is set on `start()`.
+            port (int): Port to bind; 0 picks a free one.
+        """
+        super().__init__("0.0.0.0" if sys.platform.startswith("linux") else "127.0.0.1", port)
+        self.universe = universe
+        self.requests = 0
+        self.bytes_served = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        super().start()
+        self.universe.port = self.port
+        return self
+
+    def count(self, nbytes):
+        with self._lock:
+            self.requests += 1
+            self.bytes_served += nbytes
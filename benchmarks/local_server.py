@@ -0,0 +1,59 @@
+# local_server.py — Background ThreadingHTTPServer shared by the benchmark stand-ins
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoints
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalServer:
+    handler_class = QuietHandler
+
+    def __init__(self, host="127.0.0.1", port=0):
+        """
+        HTTP server running on a daemon thread; usable as a context manager.
+
+        Args:
+            host (str): Address to bind.
+            port (int): Port to bind; 0 picks a free one (see `self.port` after `start()`).
+        """
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        # The handler reaches back to this object through `self.server.owner`
+        self._server = ThreadingHTTPServer((self.host, self.port), self.handler_class)
+        self._server.daemon_threads = True
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True, name=type(self).__name__).start()
+        logging.info(f"🧪 {type(self).__name__} listening on {self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
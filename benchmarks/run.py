@@ -0,0 +1,275 @@
+"""Offline benchmarks for the VC Hunter pipeline.
+
+Starts a fake OpenAI-compatible endpoint and a fixture web server, then times
+`VCHunterOrchestrator.run` end to end (cold and warm caches) and the heavy agents
+in isolation at 20, 200 and 2,000 firms. Results are written as sorted, indented
+JSON so two runs can be compared with `diff` or `git diff`.
+
+Usage:
+    python -m benchmarks.run [--scales 20 200 2000] [--repeat 3] [--scenarios NAME ...] [--out FILE]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+import sklearn
+
+from benchmarks.fake_openai import FakeOpenAIServer, fake_embedding
+from benchmarks.fixture_sites import FixtureSiteServer, FixtureUniverse
+
+logger = logging.getLogger(__name__)
+
+FOUNDER_TEXT = (
+    "We are building inference infrastructure for clinical diagnostics. Our models read imaging and genomics "
+    "data at the point of care, so hospitals can run trials and triage patients with language agents that "
+    "explain every retrieval step. We are raising a seed round from investors who back ai and health founders."
+)
+
+
+def build_registry(client, cache_root, crawl_workers=8, crawl_delay=1.0):
+    """Production AgentRegistry wiring around the bench gateway, with every cache under `cache_root`."""
+    from agents.registry import AgentRegistry
+    return AgentRegistry("bench", client=client, cache_root=cache_root, crawl_workers=crawl_workers,
+                         crawl_delay=crawl_delay)
+
+
+class Bench:
+    def __init__(self, args, openai_server, site_server):
+        self.args = args
+        self.openai_server = openai_server
+        self.site_server = site_server
+        from agents.openai_gateway import OpenAIGateway
+        # Same gateway as production (retries, coalescing), minus rate limits the fake server doesn't have
+        self.client = OpenAIGateway("bench", base_url=openai_server.base_url, limits={"*": {"rpm": None, "tpm": None}},
+                                    base_delay=0.05)
+        self._workdir = tempfile.mkdtemp(prefix="vchunter-bench-")
+
+    def close(self):
+        self.client.close()
+        shutil.rmtree(self._workdir, ignore_errors=True)
+
+    def _cache_root(self):
+        return tempfile.mkdtemp(dir=self._workdir)
+
+    def _orchestrator(self, cache_root):
+        return build_registry(self.client, cache_root, self.args.crawl_workers, self.args.crawl_delay).orchestrator
+
+    def _timed_run(self, orchestrator, universe):
+        api_before, sites_before = self.openai_server.stats(), (self.site_server.requests, self.site_server.bytes_served)
+        start = time.perf_counter()
+        results = orchestrator.run(FOUNDER_TEXT, vc_urls=universe.vc_urls)
+        seconds = time.perf_counter() - start
+
+        api_after = self.openai_server.stats()
+        report = results["stage_report"]
+        details = {
+            "firms_summarized": len(results["vc_summaries"]),
+            "clusters": len(results["clusters"]),
+            "co_investment_pairs": len(results["relationships"].get("co_investment", [])),
+            "top_matches": [_strip_port(m["vc"]) for m in results["matches"][:3]],
+            "similar_companies": len(results["similar_companies"]),
+            "openai": {k: api_after.get(k, 0) - api_before.get(k, 0) for k in api_after},
+            "http_requests": self.site_server.requests - sites_before[0],
+            "http_bytes": self.site_server.bytes_served - sites_before[1],
+            "critical_path": report.get("critical_path", []),
+            "stage_seconds": {name: t["seconds"] for name, t in report.get("stages", {}).items()},
+        }
+        return seconds, details
+
+    # Scenarios: each returns (seconds, details) for one trial
+
+    def orchestrator_run_cold(self, universe, data):
+        return self._timed_run(self._orchestrator(self._cache_root()), universe)
+
+    def orchestrator_run_warm(self, universe, data):
+        orchestrator = self._orchestrator(self._cache_root())
+        orchestrator.run(FOUNDER_TEXT, vc_urls=universe.vc_urls)
+        return self._timed_run(orchestrator, universe)
+
+    def relationship_analyze(self, universe, data):
+        from agents.relationship_agent import RelationshipAgent
+        start = time.perf_counter()
+        relationships = RelationshipAgent(data["vc_to_companies"], data["vc_to_vectors"]).analyze()
+        seconds = time.perf_counter() - start
+        return seconds, {kind: len(pairs) for kind, pairs in relationships.items()}
+
+    def categorizer_dynamic_cluster(self, universe, data):
+        from agents.categorizer_agent import CategorizerAgent
+        categorizer = CategorizerAgent(api_key="bench", client=self.client)  # fresh: no warm-start centroids
+        start = time.perf_counter()
+        labels = categorizer.dynamic_cluster(data["embeddings"])
+        seconds = time.perf_counter() - start
+        report = categorizer.last_cluster_report
+        return seconds, {"algorithm": report.get("algorithm"), "k": report.get("k"),
+                         "silhouette": report.get("silhouette"), "labels": len(set(map(int, labels)))}
+
+    def visualization_plot_all(self, universe, data):
+        from agents.relationship_agent import RelationshipAgent
+        from agents.visualization_agent import VisualizationAgent
+        if "relationships" not in data:
+            data["relationships"] = RelationshipAgent(data["vc_to_companies"], data["vc_to_vectors"]).analyze()
+        visualizer = VisualizationAgent(cache_size=0)  # render every chart on every trial
+        start = time.perf_counter()
+        visuals = visualizer.plot_all(data["embeddings"], data["names"], data["clusters"], data["relationships"])
+        images = {name: visuals[name] for name in visuals}
+        seconds = time.perf_counter() - start
+        return seconds, {name: image is not None for name, image in images.items()}
+
+    def _summarize_vcs(self, universe, pack_size):
+        from agents.llm_cache import CompletionCache
+        from agents.llm_embed_gap_match_chat import LLMSummarizerAgent
+        completions = CompletionCache(path=os.path.join(self._cache_root(), "completions.sqlite"))
+        summarizer = LLMSummarizerAgent(api_key="bench", cache=completions, client=self.client, pack_size=pack_size)
+        vcs = {
+            universe.firm_url(f["id"]): (
+                "\n".join(universe.paragraphs(f["sectors"], "firm", f["id"], "home")),
+                "\n".join(" ".join(universe.paragraphs([c["sector"]], "company", c["id"]))
+                          for c in f["portfolio"]),
+            )
+            for f in universe.firms
+        }
+        api_before = self.openai_server.stats()
+        start = time.perf_counter()
+        summaries = summarizer.summarize_many(vcs)
+        seconds = time.perf_counter() - start
+        stats = summarizer.stats()
+        return seconds, {
+            "vcs": len(vcs),
+            "summarized": sum(1 for s in summaries.values() if s),
+            "vcs_per_minute": round(60 * len(vcs) / seconds, 1),
+            "tokens_per_vc": stats["tokens_per_vc"],
+            "chat_requests": self.openai_server.stats().get("chat_requests", 0) - api_before.get("chat_requests", 0),
+            "fallbacks": stats.get("fallbacks", 0),
+        }
+
+    def vc_summaries_single(self, universe, data):
+        return self._summarize_vcs(universe, pack_size=1)
+
+    def vc_summaries_packed(self, universe, data):
+        return self._summarize_vcs(universe, pack_size=8)
+
+    SCENARIOS = ["orchestrator_run_cold", "orchestrator_run_warm", "relationship_analyze",
+                 "categorizer_dynamic_cluster", "visualization_plot_all", "vc_summaries_single", "vc_summaries_packed"]
+
+    def isolated_inputs(self, universe):
+        """Agent inputs derived straight from the fixture universe, without crawling or the API."""
+        names = universe.vc_urls
+        embeddings = np.stack([
+            fake_embedding(" ".join(universe.paragraphs(f["sectors"], "firm", f["id"], "home")), self.args.dim)
+            for f in universe.firms
+        ]).astype(np.float32)
+        clusters = [{"cluster_id": c, "members": names[c::8]} for c in range(min(8, len(names)))]
+        return {
+            "names": names,
+            "embeddings": embeddings,
+            "vc_to_vectors": dict(zip(names, embeddings)),
+            "vc_to_companies": {universe.firm_url(f["id"]): [universe.company_url(c) for c in f["portfolio"]]
+                                for f in universe.firms},
+            "clusters": clusters,
+        }
+
+    def run_scale(self, n_firms):
+        universe = FixtureUniverse(n_firms, seed=self.args.seed)
+        self.site_server.universe = universe
+        universe.port = self.site_server.port
+        data = self.isolated_inputs(universe)
+
+        results = {}
+        for name in self.args.scenarios:
+            samples, details = [], None
+            for _ in range(self.args.repeat):
+                seconds, details = getattr(self, name)(universe, data)
+                samples.append(seconds)
+            results[name] = {
+                "seconds": {"min": round(min(samples), 3), "median": round(statistics.median(samples), 3),
+                            "max": round(max(samples), 3)},
+                "details": details,
+            }
+            logger.info(f"⏱️ {n_firms} firms · {name}: {min(samples):.3f}s (min of {len(samples)})")
+        return results
+
+
+def _strip_port(url):
+    # Fixture URLs carry an ephemeral port; drop it so results diff cleanly across runs
+    parts = urlsplit(url)
+    return parts._replace(netloc=parts.hostname or "").geturl()
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the VC Hunter pipeline offline.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[20, 200, 2000], help="Numbers of firms")
+    parser.add_argument("--scenarios", nargs="+", default=Bench.SCENARIOS, choices=Bench.SCENARIOS)
+    parser.add_argument("--repeat", type=int, default=3, help="Trials per scenario (min/median/max reported)")
+    parser.add_argument("--out", default=os.path.join("benchmarks", "results.json"), help="Results file")
+    parser.add_argument("--seed", type=int, default=0, help="Fixture universe seed")
+    parser.add_argument("--dim", type=int, default=256, help="Fake embedding dimensionality")
+    parser.add_argument("--chat-latency", type=float, default=0.05, help="Seconds per fake chat completion")
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="Seconds per fake embeddings request")
+    parser.add_argument("--latency-per-1k-tokens", type=float, default=0.0, help="Extra fake API seconds per 1k prompt tokens")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake API requests failing with 429/500")
+    parser.add_argument("--crawl-workers", type=int, default=8, help="VC sites crawled concurrently")
+    parser.add_argument("--crawl-delay", type=float, default=0.0,
+                        help="Per-host politeness delay (the pipeline default is 1.0; the fixture server needs none)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show pipeline INFO logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logger.setLevel(logging.INFO)
+
+    # Anything that still reaches for the process-wide caches lands in a throwaway directory
+    scratch = tempfile.mkdtemp(prefix="vchunter-bench-cache-")
+    os.environ["VCHUNTER_CACHE_DIR"] = scratch
+
+    openai_server = FakeOpenAIServer(chat_latency=args.chat_latency, embed_latency=args.embed_latency,
+                                     latency_per_1k_tokens=args.latency_per_1k_tokens, dim=args.dim,
+                                     error_rate=args.error_rate, seed=args.seed).start()
+    site_server = FixtureSiteServer(FixtureUniverse(0, seed=args.seed)).start()
+    bench = Bench(args, openai_server, site_server)
+    try:
+        results = {str(n): bench.run_scale(n) for n in args.scales}
+    finally:
+        bench.close()
+        openai_server.stop()
+        site_server.stop()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "sklearn": sklearn.__version__,
+            "args": {k: v for k, v in vars(args).items() if k not in ("out", "verbose")},
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    logger.info(f"✅ Benchmark results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
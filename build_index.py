@@ -0,0 +1,52 @@
+"""Build the founder-independent VC index that app.py loads at startup.
+
+Usage:
+    python build_index.py [--out DIR] [--workers N] [--urls-file FILE] [--vc-model MODEL] [--vc-pack-size N]
+"""
+import argparse
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from agents.founder_doc_reader_and_orchestrator import VC_URLS
+from agents.registry import AgentRegistry
+from agents.vc_index import default_index_dir
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl, summarize, embed and cluster the VC universe once.")
+    parser.add_argument("--out", default=None, help=f"Index root directory (default: {default_index_dir()})")
+    parser.add_argument("--workers", type=int, default=8, help="Number of VC sites crawled concurrently")
+    parser.add_argument("--urls-file", default=None, help="Optional file with one VC URL per line")
+    parser.add_argument("--vc-model", default=os.getenv("VCHUNTER_VC_MODEL") or None,
+                        help="Model for VC summaries (default: $VCHUNTER_VC_MODEL, else gpt-4)")
+    parser.add_argument("--vc-pack-size", type=int, default=int(os.getenv("VCHUNTER_VC_PACK_SIZE") or 1),
+                        help="VCs per summarization request; above 1 needs a --vc-model with structured "
+                             "output (default: $VCHUNTER_VC_PACK_SIZE, else 1)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    openai_api_key = os.getenv("OPENAI_API_KEY")
+    if not openai_api_key:
+        parser.error("OPENAI_API_KEY is not set")
+
+    vc_urls = VC_URLS
+    if args.urls_file:
+        with open(args.urls_file) as f:
+            vc_urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    registry = AgentRegistry(openai_api_key, crawl_workers=args.workers, vc_model=args.vc_model,
+                             vc_pack_size=args.vc_pack_size)
+
+    logger.info(f"🏗️ Building VC index for {len(vc_urls)} firms")
+    index = registry.orchestrator.build_vc_index(vc_urls)
+    path = index.save(args.out)
+    logger.info(f"✅ VC index {index.version} written to {path}")
+
+
+if __name__ == "__main__":
+    main()
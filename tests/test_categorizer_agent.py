@@ -0,0 +1,98 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from agents.categorizer_agent import CategorizerAgent
+from agents.llm_cache import CompletionCache
+from agents.run_store import RunStore
+
+
+class SlowChatClient:
+    """Answers every chat request after a short pause, so concurrent runs overlap."""
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        time.sleep(0.02)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Shared thesis."))], usage=None)
+
+
+def _universe(seed, n=40, dim=8):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(4, dim)) * 5
+    vectors = centers[np.arange(n) % 4] + rng.normal(size=(n, dim))
+    names = [f"run{seed}-vc{i}" for i in range(n)]
+    return vectors, names, {name: f"summary of {name}" for name in names}
+
+
+def test_concurrent_categorize_on_a_shared_agent(tmp_path):
+    agent = CategorizerAgent(api_key="test", n_clusters=4, client=SlowChatClient(),
+                             cache=CompletionCache(path=str(tmp_path / "completions.sqlite")))
+    results, errors = {}, []
+
+    def run(seed):
+        try:
+            vectors, names, summaries = _universe(seed)
+            results[seed] = (names, agent.categorize(vectors, names, summaries))
+        except Exception as e:  # pragma: no cover - surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    for names, clusters in results.values():
+        assert clusters, "a concurrent run lost its clusters"
+        assert sorted(m for c in clusters for m in c["members"]) == sorted(names)
+
+
+def test_incremental_new_vc_joins_existing_clusters(tmp_path):
+    agent = CategorizerAgent(api_key="test", n_clusters=4, client=SlowChatClient(), incremental=True,
+                             cache=CompletionCache(path=str(tmp_path / "completions.sqlite")),
+                             state_store=RunStore(str(tmp_path / "runs.sqlite")), embedding_model="test-embedding")
+    vectors, names, summaries = _universe(0)
+
+    before = agent.categorize(vectors[:-1], names[:-1], summaries)
+    after = agent.categorize(vectors, names, summaries)
+
+    assert agent.last_incremental_report["mode"] == "assign"
+    assert agent.last_incremental_report["assigned"] == 1
+    old_ids = {m: c["cluster_id"] for c in before for m in c["members"]}
+    new_ids = {m: c["cluster_id"] for c in after for m in c["members"]}
+    assert {m: new_ids[m] for m in old_ids} == old_ids
+    assert new_ids[names[-1]] in set(old_ids.values())
+
+    # A firm whose crawl failed drops out without forcing a recluster
+    agent.categorize(vectors[1:], names[1:], summaries)
+    assert agent.last_incremental_report["mode"] == "assign"
+    assert agent.last_incremental_report["assigned"] == 0
+
+
+def test_concurrent_incremental_runs(tmp_path):
+    agent = CategorizerAgent(api_key="test", n_clusters=4, client=SlowChatClient(), incremental=True,
+                             cache=CompletionCache(path=str(tmp_path / "completions.sqlite")),
+                             state_store=RunStore(str(tmp_path / "runs.sqlite")))
+    universes = [_universe(seed % 3) for seed in range(6)]
+    results, errors = [], []
+
+    def run(universe):
+        try:
+            results.append((universe[1], agent.categorize(*universe)))
+        except Exception as e:  # pragma: no cover - surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(universe,)) for universe in universes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors and len(results) == len(universes)
+    for names, clusters in results:
+        assert sorted(m for c in clusters for m in c["members"]) == sorted(names)
@@ -0,0 +1,80 @@
+import io
+import os
+import tempfile
+import zipfile
+
+from agents import document_ingest
+from agents.document_ingest import read_document, sniff_format
+
+
+def _pdf(pages):
+    """A minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = io.BytesIO(), []
+    out.write(b"%PDF-1.4\n")
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    return out.getvalue()
+
+
+def _docx(paragraphs):
+    w = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", f'<w:document xmlns:w="{w}"><w:body>{body}</w:body></w:document>')
+    return buffer.getvalue()
+
+
+def test_txt_stops_at_budget():
+    data = ("founder thesis " * 20_000).encode("utf-8")
+    full = read_document(data)
+    result = read_document(data, max_chars=1000)
+    assert result["format"] == "txt" and result["truncated"]
+    assert len(result["text"]) == 1000 and full["text"].startswith(result["text"])
+    assert result["units_read"] < full["units_read"]
+
+
+def test_docx_stops_at_budget():
+    data = _docx([f"Paragraph {i} about clinical AI." for i in range(500)])
+    assert sniff_format(data) == "docx"
+    result = read_document(data, max_chars=200)
+    assert result["truncated"] and result["text"].startswith("Paragraph 0 about clinical AI.")
+    assert len(result["text"]) == 200 and result["units_read"] < 500
+
+
+def test_small_pdf_read_in_process():
+    data = _pdf([f"Page {i} of the deck" for i in range(5)])
+    result = read_document(data)
+    assert result["format"] == "pdf" and not result["truncated"] and result["units_read"] == 5
+    assert "Page 0 of the deck" in result["text"] and "Page 4 of the deck" in result["text"]
+
+
+def test_large_pdf_keeps_page_order_and_budget():
+    data = _pdf([f"Page {i} of the deck" for i in range(48)])
+    temp_before = set(os.listdir(tempfile.gettempdir()))
+
+    full = read_document(data, workers=2)
+    assert full["units_read"] == 48 and not full["truncated"]
+    assert document_ingest._pdf_pool is not None  # extracted by the shared pool, not the in-process fallback
+    positions = [full["text"].index(f"Page {i} of") for i in range(48)]
+    assert positions == sorted(positions)
+
+    result = read_document(data, max_chars=100, workers=2)
+    assert result["truncated"] and result["units_read"] < 48 and full["text"].startswith(result["text"])
+    assert set(os.listdir(tempfile.gettempdir())) <= temp_before
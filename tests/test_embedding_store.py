@@ -0,0 +1,32 @@
+import numpy as np
+
+from agents.embedding_store import EmbeddingStore
+
+
+def test_two_instances_share_a_directory(tmp_path):
+    a = EmbeddingStore(directory=str(tmp_path))
+    b = EmbeddingStore(directory=str(tmp_path))
+
+    a.add(["k1"], np.full((1, 3), 1.0))
+    b.add(["k2"], np.full((1, 3), 2.0))
+    a.add(["k3"], np.full((1, 3), 3.0))
+
+    assert a.get(["k1"])["k1"].tolist() == [1.0, 1.0, 1.0]
+    assert a.get(["k2"])["k2"].tolist() == [2.0, 2.0, 2.0]
+    assert b.get(["k3"])["k3"].tolist() == [3.0, 3.0, 3.0]
+
+    fresh = EmbeddingStore(directory=str(tmp_path))
+    assert sorted(fresh.rows) == ["k1", "k2", "k3"]
+    assert {k: v.tolist()[0] for k, v in fresh.get(["k1", "k2", "k3"]).items()} == {"k1": 1.0, "k2": 2.0, "k3": 3.0}
+
+
+def test_unindexed_tail_is_skipped_not_overwritten(tmp_path):
+    store = EmbeddingStore(directory=str(tmp_path))
+    store.add(["k1"], np.full((1, 3), 1.0))
+    with open(store.matrix_path, "ab") as f:  # a writer that crashed before updating the index
+        f.write(np.full(3, 9.0, dtype=np.float32).tobytes()[:8])
+
+    store.add(["k2"], np.full((1, 3), 2.0))
+    fresh = EmbeddingStore(directory=str(tmp_path))
+    assert fresh.get(["k1"])["k1"].tolist() == [1.0, 1.0, 1.0]
+    assert fresh.get(["k2"])["k2"].tolist() == [2.0, 2.0, 2.0]
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from agents.http_cache import HTTPCache
+
+
+class _Session:
+    """Serves canned responses and remembers the headers of every request."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.sent.append(dict(headers or {}))
+        status, text, response_headers = self.responses.pop(0)
+        return SimpleNamespace(status_code=status, text=text, content=text.encode("utf-8"), headers=response_headers)
+
+
+def test_no_made_up_last_modified(tmp_path):
+    cache = HTTPCache(path=str(tmp_path / "http.sqlite"), ttl=0)
+    session = _Session([(200, "v1", {}), (200, "v2", {})])
+
+    cache.get(session, "https://example.com/a")
+    response = cache.get(session, "https://example.com/a")
+
+    assert "If-Modified-Since" not in session.sent[1]
+    assert "If-None-Match" not in session.sent[1]
+    assert response.text == "v2"
+
+
+def test_revalidates_with_server_validators(tmp_path):
+    cache = HTTPCache(path=str(tmp_path / "http.sqlite"), ttl=0)
+    validators = {"ETag": '"abc"', "Last-Modified": "Mon, 05 Oct 2026 10:00:00 GMT"}
+    session = _Session([(200, "v1", validators), (304, "", {})])
+
+    cache.get(session, "https://example.com/a")
+    response = cache.get(session, "https://example.com/a")
+
+    assert session.sent[1]["If-None-Match"] == '"abc"'
+    assert session.sent[1]["If-Modified-Since"] == "Mon, 05 Oct 2026 10:00:00 GMT"
+    assert response.from_cache and response.text == "v1"
+    assert cache.stats()["revalidated"] == 1
@@ -0,0 +1,41 @@
+import tracemalloc
+
+import numpy as np
+
+from agents.instrumentation import span, start_run
+
+
+def test_span_peaks_are_per_span():
+    tracemalloc.start()
+    try:
+        with start_run("test") as trace:
+            with span("big"):
+                block = np.ones(64 * 1024 * 1024 // 8)
+                del block
+            with span("small"):
+                np.ones(1024)
+    finally:
+        tracemalloc.stop()
+
+    big, small = trace.spans
+    assert big["traced_peak_delta_mb"] >= 60
+    # The earlier allocation no longer shows up once its span has ended
+    assert small["traced_peak_delta_mb"] < 1
+    assert small["traced_peak_mb"] < big["traced_peak_mb"]
+    assert trace.to_dict()["span_summary"]["big"]["max_traced_peak_delta_mb"] >= 60
+
+
+def test_nested_spans_share_the_inner_peak():
+    tracemalloc.start()
+    try:
+        with start_run("test") as trace:
+            with span("outer"):
+                with span("inner"):
+                    np.ones(16 * 1024 * 1024 // 8)
+    finally:
+        tracemalloc.stop()
+
+    inner, outer = trace.spans
+    assert inner["traced_peak_delta_mb"] >= 15
+    assert outer["traced_peak_delta_mb"] >= inner["traced_peak_delta_mb"]
+    assert "rss_delta_mb" in outer
@@ -0,0 +1,87 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from agents.llm_cache import CompletionCache
+from agents.llm_embed_gap_match_chat import ChatbotAgent, LLMSummarizerAgent
+
+
+def _index(version, n=12, dim=8):
+    names = [f"vc{i}" for i in range(n)]
+    clusters = [{"cluster_id": c, "members": names[c::3], "description": f"cluster {c}"} for c in range(3)]
+    return SimpleNamespace(version=version, vc_names=names, clusters=clusters,
+                           embeddings=np.random.default_rng(version).normal(size=(n, dim)).astype(np.float32))
+
+
+def _chatbot(tmp_path):
+    return ChatbotAgent(api_key="test", client=object(), embedder=object(),
+                        cache=CompletionCache(path=str(tmp_path / "completions.sqlite")))
+
+
+def test_cluster_centroids_kept_per_index_version(tmp_path):
+    chatbot = _chatbot(tmp_path)
+    old, new = _index(1), _index(2)
+    expected = chatbot._cluster_centroids(old)
+    chatbot._cluster_centroids(new)
+
+    # A session still on the old index gets its centroids back without recomputing them
+    old.clusters = None
+    ids, centroids = chatbot._cluster_centroids(old)
+    assert ids == expected[0] and np.array_equal(centroids, expected[1])
+
+
+def test_cluster_centroids_across_concurrent_sessions(tmp_path):
+    chatbot = _chatbot(tmp_path)
+    indexes = [_index(version) for version in range(2)]
+    errors = []
+
+    def run(index):
+        try:
+            for _ in range(200):
+                ids, centroids = chatbot._cluster_centroids(index)
+                assert ids == [0, 1, 2] and centroids.shape == (3, 8)
+        except Exception as e:  # pragma: no cover - surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(indexes[i % 2],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+class PackClient:
+    """Answers packed requests with every VC but `missing`, and single requests with a fixed summary."""
+
+    def __init__(self, missing):
+        self.missing = missing
+        self.requests = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, response_format=None, **kwargs):
+        self.requests.append((messages[0]["content"], response_format))
+        if response_format:
+            keys = response_format["json_schema"]["schema"]["properties"]
+            content = json.dumps({key: f"Packed summary of {key}." for key in keys if key != self.missing})
+        else:
+            content = "Single summary."
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+def test_packed_reply_missing_a_vc_retries_only_that_vc(tmp_path):
+    vcs = {f"https://vc{i}.example": (f"Site of fund {i}.", f"Portfolio of fund {i}.") for i in range(4)}
+    client = PackClient(missing="https://vc2.example")
+    summarizer = LLMSummarizerAgent(api_key="test", client=client, vc_model="gpt-4o-mini", pack_size=4,
+                                    cache=CompletionCache(path=str(tmp_path / "completions.sqlite")))
+
+    summaries = summarizer.summarize_many(vcs)
+
+    assert summaries["https://vc2.example"] == "Single summary."
+    assert all(summaries[url] == f"Packed summary of {url}." for url in vcs if url != "https://vc2.example")
+    packed = [content for content, response_format in client.requests if response_format]
+    single = [content for content, response_format in client.requests if not response_format]
+    assert len(packed) == 1 and len(single) == 1 and "Site of fund 2." in single[0]
+    assert summarizer.stats()["fallbacks"] == 1
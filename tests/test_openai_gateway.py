@@ -0,0 +1,89 @@
+import threading
+import time
+
+import pytest
+from openai import APIStatusError
+
+from agents.openai_gateway import OpenAIGateway
+from benchmarks.fake_openai import FakeOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "Summarize seed investors in clinical diagnostics."}]
+
+
+@pytest.fixture
+def server():
+    with FakeOpenAIServer(chat_latency=0.0, embed_latency=0.0) as fake:
+        yield fake
+
+
+def _gateway(server, **options):
+    return OpenAIGateway("test", base_url=server.base_url, limits={"*": {"rpm": None, "tpm": None}},
+                         base_delay=0.01, **options)
+
+
+def test_retries_transient_errors(server):
+    gateway = _gateway(server)
+    try:
+        server.fail_next(500, 429)
+        response = gateway.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        assert response.choices[0].message.content.startswith("Focus areas:")
+        assert gateway.stats()["retries"] == 2 and gateway.stats()["failures"] == 0
+        assert server.stats()["errors"] == 2 and server.stats()["chat_requests"] == 1
+    finally:
+        gateway.close()
+
+
+def test_honours_retry_after(server):
+    gateway = _gateway(server)
+    try:
+        server.fail_next(429, retry_after=0.5)
+        start = time.perf_counter()
+        gateway.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        assert time.perf_counter() - start >= 0.5
+    finally:
+        gateway.close()
+
+
+def test_client_errors_and_exhausted_retries_raise(server):
+    gateway = _gateway(server, max_retries=1)
+    try:
+        server.fail_next(400)
+        with pytest.raises(APIStatusError):
+            gateway.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        assert gateway.stats()["retries"] == 0
+
+        server.fail_next(500, 500)
+        with pytest.raises(APIStatusError):
+            gateway.chat.completions.create(model="gpt-4", messages=MESSAGES)
+        assert gateway.stats()["retries"] == 1 and gateway.stats()["failures"] == 2
+    finally:
+        gateway.close()
+
+
+def test_identical_requests_share_one_call():
+    with FakeOpenAIServer(chat_latency=0.3) as server:
+        gateway = _gateway(server)
+        try:
+            replies = []
+            threads = [threading.Thread(target=lambda: replies.append(
+                gateway.chat.completions.create(model="gpt-4", messages=MESSAGES).choices[0].message.content))
+                for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert len(replies) == 5 and len(set(replies)) == 1
+            assert server.stats()["chat_requests"] == 1 and gateway.stats()["coalesced"] == 4
+        finally:
+            gateway.close()
+
+
+def test_stream_retried_before_first_token(server):
+    gateway = _gateway(server)
+    try:
+        expected = gateway.chat.completions.create(model="gpt-4", messages=MESSAGES).choices[0].message.content
+        server.fail_next(503)
+        assert "".join(gateway.stream_chat("gpt-4", MESSAGES)) == expected
+        assert gateway.stats()["retries"] == 1 and server.stats()["chat_streams"] == 1
+    finally:
+        gateway.close()
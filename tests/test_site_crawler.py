@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+from agents.site_crawler import USER_AGENT, CrawlFrontier, RobotsCache, crawlable_link
+from agents.utils import canonicalize_url
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTPS://Example.COM:443//portfolio//?utm_source=x&b=2&a=1#team") == \
+        "https://example.com/portfolio?a=1&b=2"
+    assert canonicalize_url("http://example.com:80") == "http://example.com/"
+    assert canonicalize_url("http://example.com:8080/about/") == "http://example.com:8080/about"
+    assert canonicalize_url("https://example.com/?gclid=abc") == "https://example.com/"
+
+
+def test_crawlable_link():
+    base = "https://fund.example/team/"
+    assert crawlable_link(base, "../portfolio#top") == "https://fund.example/portfolio"
+    assert crawlable_link(base, " /companies ") == "https://fund.example/companies"
+    for href in ("", "#about", "mailto:hi@fund.example", "tel:123", "javascript:void(0)",
+                 "/deck.PDF", "logo.png", "ftp://fund.example/file"):
+        assert crawlable_link(base, href) is None
+
+
+def test_frontier_orders_by_keyword_and_depth_and_dedupes():
+    frontier = CrawlFrontier(["portfolio", "companies"])
+    assert frontier.push("https://fund.example/about", 1)
+    assert frontier.push("https://fund.example/companies", 2)
+    assert frontier.push("https://fund.example/portfolio", 2)
+    assert not frontier.push("https://FUND.example/portfolio/?utm_medium=email", 1)
+    assert len(frontier) == 3
+
+    assert frontier.pop() == ("https://fund.example/portfolio", 2, 2)
+    assert frontier.pop() == ("https://fund.example/companies", 2, 1)
+    assert frontier.pop() == ("https://fund.example/about", 1, 0)
+    assert frontier.pop() is None
+
+
+class _RobotsOnly:
+    def __init__(self, text):
+        self.text = text
+        self.headers = []
+
+    def get(self, session, url, timeout=None, headers=None, throttle=None):
+        self.headers.append(headers)
+        return SimpleNamespace(status_code=200, text=self.text)
+
+
+def test_robots_checked_for_the_fetching_user_agent():
+    cache = _RobotsOnly("User-agent: VC-HunterBot\nDisallow: /private\n\nUser-agent: *\nDisallow: /\n")
+    robots = RobotsCache(cache, session=None)
+    assert robots.allowed("https://fund.example/portfolio")
+    assert not robots.allowed("https://fund.example/private/deals")
+    assert cache.headers[0] == {"User-Agent": USER_AGENT}
@@ -0,0 +1,72 @@
+import functools
+
+import numpy as np
+
+from agents.categorizer_agent import NO_DESCRIPTION, CategorizerAgent
+from agents.founder_doc_reader_and_orchestrator import VCHunterOrchestrator
+from agents.relationship_agent import RelationshipAgent
+from agents.run_store import RunStore
+
+
+def test_empty_results_are_recognised():
+    assert VCHunterOrchestrator._is_empty({"co_investment": []})
+    assert VCHunterOrchestrator._is_empty(([], np.empty((0, 0))))
+    assert VCHunterOrchestrator._is_empty([])
+    assert not VCHunterOrchestrator._is_empty({"co_investment": [{"vc_a": "a", "vc_b": "b"}]})
+    assert not VCHunterOrchestrator._is_empty((["c"], np.ones((1, 2))))
+
+
+class _Embedder:
+    model = "test-embedding"
+
+
+def _orchestrator(tmp_path, relationship):
+    orchestrator = VCHunterOrchestrator.__new__(VCHunterOrchestrator)
+    orchestrator.embedder = _Embedder()
+    orchestrator.relationship = relationship
+    orchestrator.run_store = RunStore(str(tmp_path / "runs.sqlite"))
+    return orchestrator
+
+
+def test_checkpoint_key_covers_stage_config(tmp_path):
+    calls = []
+
+    def stage(**inputs):
+        calls.append(inputs)
+        return {"co_investment": [{"pair": len(calls)}]}
+
+    default = _orchestrator(tmp_path, RelationshipAgent)
+    assert default._checkpointed("relationships", stage)(x=1) == {"co_investment": [{"pair": 1}]}
+    assert default._checkpointed("relationships", stage)(x=1) == {"co_investment": [{"pair": 1}]}
+    assert len(calls) == 1
+
+    top_k = _orchestrator(tmp_path, functools.partial(RelationshipAgent, mode="top_k", top_k=3))
+    assert top_k._checkpointed("relationships", stage)(x=1) == {"co_investment": [{"pair": 2}]}
+
+
+def test_empty_relationships_are_not_checkpointed(tmp_path):
+    calls = []
+
+    def stage(**inputs):
+        calls.append(inputs)
+        return {"co_investment": []}
+
+    orchestrator = _orchestrator(tmp_path, RelationshipAgent)
+    orchestrator._checkpointed("relationships", stage)(x=1)
+    orchestrator._checkpointed("relationships", stage)(x=1)
+    assert len(calls) == 2
+
+
+def test_undescribed_clusters_are_not_checkpointed(tmp_path):
+    calls = []
+
+    def stage(**inputs):
+        calls.append(inputs)
+        return [{"cluster_id": 0, "description": NO_DESCRIPTION, "members": ["a"]},
+                {"cluster_id": 1, "description": "Seed-stage health funds.", "members": ["b"]}]
+
+    orchestrator = _orchestrator(tmp_path, RelationshipAgent)
+    orchestrator.categorizer = CategorizerAgent(api_key="test", client=object(), cache=object())
+    orchestrator._checkpointed("clusters", stage)(x=1)
+    orchestrator._checkpointed("clusters", stage)(x=1)
+    assert len(calls) == 2
@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+
+from agents.vc_index import VCIndex
+
+
+def _saved_index(root):
+    rng = np.random.default_rng(0)
+    summaries = {f"https://vc{i}.example": f"Fund {i} backs seed-stage health founders." for i in range(6)}
+    index = VCIndex(summaries=summaries, embeddings=rng.normal(size=(6, 8)).astype(np.float32),
+                    clusters=[{"cluster_id": 0, "description": "Health", "members": list(summaries)}],
+                    portfolios={}, portfolio_texts={}, relationships={"co_investment": []})
+    return index, index.save(str(root))
+
+
+def _truncate(path, keep=10):
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:keep])
+
+
+def test_load_round_trip_and_missing_index(tmp_path):
+    index, _ = _saved_index(tmp_path)
+    loaded = VCIndex.load(str(tmp_path))
+    assert loaded.version == index.version and loaded.vc_names == index.vc_names
+    assert VCIndex.load(str(tmp_path / "nothing-built")) is None
+
+
+def test_corrupt_meta_returns_none(tmp_path):
+    _, directory = _saved_index(tmp_path)
+    _truncate(os.path.join(directory, "meta.json"))
+    assert VCIndex.load(str(tmp_path)) is None
+
+
+def test_truncated_embeddings_return_none(tmp_path):
+    _, directory = _saved_index(tmp_path)
+    _truncate(os.path.join(directory, "embeddings.npy"), keep=100)
+    assert VCIndex.load(str(tmp_path)) is None
+
+
+def test_damaged_vector_index_is_rebuilt(tmp_path):
+    index, directory = _saved_index(tmp_path)
+    _truncate(os.path.join(directory, "vc_vectors", "index.json"))
+    loaded = VCIndex.load(str(tmp_path))
+    assert loaded is not None
+    assert loaded.vc_vector_index.search(np.asarray(index.embeddings[2]), k=1)[0][0] == "https://vc2.example"
@@ -0,0 +1,29 @@
+import numpy as np
+
+from agents.vector_index import VectorIndex
+
+
+def _vectors(n=3000, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(30, dim))
+    return (centers[rng.integers(len(centers), size=n)] + 0.3 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def test_ivf_full_ranking_matches_exact():
+    vectors = _vectors()
+    ids = [f"vc-{i}" for i in range(len(vectors))]
+    exact = VectorIndex.build(ids, vectors, mode="exact")
+    ivf = VectorIndex.build(ids, vectors, mode="ivf", n_probe=2)
+    assert ivf.centroids is not None
+
+    query = vectors[7]
+    assert [i for i, _ in ivf.search(query, k=None)] == [i for i, _ in exact.search(query, k=None)]
+    assert len(ivf.search(query, k=len(vectors) + 5)) == len(vectors)
+
+
+def test_ivf_top_k_still_probes():
+    vectors = _vectors()
+    ids = list(range(len(vectors)))
+    ivf = VectorIndex.build(ids, vectors, mode="ivf", n_probe=2)
+    results = ivf.search(vectors[0], k=10)
+    assert len(results) == 10 and results[0][0] == 0